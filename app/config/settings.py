@@ -12,13 +12,94 @@ class Settings(BaseSettings):
     APP_NAME: str = "AI Career Planning API"
     APP_VERSION: str = "0.1.0"
     APP_DESCRIPTION: str = "AI destekli kariyer planlama uygulaması"
+    METRICS_ENABLED: bool = True
+    # /admin endpoint'leri için X-Admin-Token değeri (boşsa yönetici endpoint'leri kapalıdır)
+    ADMIN_API_TOKEN: str = ""
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 0
     
     # Veritabanı ayarları
     DATABASE_URL: str = "sqlite+aiosqlite:///./career_planner.db"
+    DB_READ_POOL_SIZE: int = 4
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_BUSY_TIMEOUT_SECONDS: float = 5.0
+    WRITE_BUFFER_FLUSH_INTERVAL_SECONDS: float = 0.005
+    WRITE_BUFFER_MAX_BATCH_SIZE: int = 500
+    # Yanıttan sonra commit'i beklenen sohbet mesajları için yeniden deneme
+    CHAT_PERSIST_MAX_ATTEMPTS: int = 3
+    CHAT_PERSIST_RETRY_DELAY_SECONDS: float = 0.5
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 3600.0
     
     # Gemini API ayarları
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_MAX_CONCURRENCY: int = 32
+    GEMINI_TIMEOUT_SECONDS: float = 60.0
+    DISCONNECT_POLL_INTERVAL_SECONDS: float = 0.5
+    GEMINI_MAX_PENDING_CALLS: int = 128
+    GEMINI_MAX_RETRIES: int = 2
+    GEMINI_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    GEMINI_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    GEMINI_SLOW_CALL_SECONDS: float = 30.0
+    GEMINI_BREAKER_WINDOW: int = 20
+    GEMINI_BREAKER_MIN_CALLS: int = 10
+    GEMINI_BREAKER_FAILURE_RATIO: float = 0.5
+    GEMINI_BREAKER_OPEN_SECONDS: float = 30.0
+    
+    # Prompt bağlam bütçesi ayarları (yaklaşık token)
+    CHAT_PLAN_TOKEN_BUDGET: int = 2500
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500
+    CHAT_SUMMARY_TOKEN_BUDGET: int = 500
+    CHAT_RECENT_MESSAGES: int = 10
+    CHAT_HISTORY_MAX_PAGE_SIZE: int = 100
+    CHAT_SUMMARY_BATCH_SIZE: int = 10
+    SUMMARY_INPUT_TOKEN_BUDGET: int = 4000
+    QUESTION_HISTORY_TOKEN_BUDGET: int = 2000
+    QA_ENTRY_MIN_TOKENS: int = 50
+    
+    # Sohbet yanıtı önbelleği ayarları
+    CHAT_CACHE_ENABLED: bool = True
+    CHAT_CACHE_MAX_SIZE: int = 1000
+    CHAT_CACHE_MAX_ROWS: int = 50000
+    CHAT_CACHE_TTL_SECONDS: float = 86400.0
+    CHAT_CACHE_CONTEXT_MESSAGES: int = 2
+    CHAT_CACHE_PRUNE_EVERY: int = 500
+    
+    # Gemini kullanım ve maliyet takibi (fiyatlar 1 milyon token başına USD)
+    GEMINI_INPUT_PRICE_PER_MILLION: float = 0.075
+    GEMINI_OUTPUT_PRICE_PER_MILLION: float = 0.30
+    USAGE_FLUSH_INTERVAL_SECONDS: float = 5.0
+    USAGE_MAX_DAYS: int = 90
+    USER_DAILY_TOKEN_QUOTA: int = 0
+    
+    # Arama ayarları
+    SEARCH_MAX_PAGE_SIZE: int = 50
+    SEARCH_MAX_TERMS: int = 8
+    SEARCH_MIN_PREFIX_LENGTH: int = 2
+    
+    # Anket ayarları
+    QUESTION_PREFETCH_ENABLED: bool = True
+    QUESTION_PREFETCH_MAX_TASKS: int = 64
+    FIRST_QUESTION_POOL_ENABLED: bool = True
+    FIRST_QUESTION_POOL_SIZE: int = 50
+    FIRST_QUESTION_POOL_LOW_WATERMARK: int = 10
+    FIRST_QUESTION_POOL_BATCH_SIZE: int = 10
+    
+    # Idempotency-Key ayarları (tekrarlanan isteklerin ilk yanıtı bu süre boyunca saklanır)
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = 86400.0
+    # Yanıtı saklanmamış ayrılmış anahtar (ör. çöken bir işçiden kalan) bu süreden sonra yeniden kullanılabilir
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: float = 60.0
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+    IDEMPOTENCY_PRUNE_EVERY: int = 1000
+    
+    # Arka plan iş kuyruğu ayarları
+    JOB_WORKER_COUNT: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY_SECONDS: float = 5.0
+    JOB_RETRY_MAX_DELAY_SECONDS: float = 300.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_STALE_AFTER_SECONDS: float = 300.0
+    JOB_LONG_POLL_MAX_SECONDS: float = 30.0
     
     class Config:
         env_file = ".env"
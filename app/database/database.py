@@ -1,197 +1,1014 @@
-import aiosqlite
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.config.settings import get_settings
+from app.database.memory_repository import MemoryRepository
+from app.database.migrations import run_migrations
+from app.database.pool import close_pool, get_pool, open_pool
+from app.database.repository import Repository
+from app.database.sqlite_repository import SQLiteRepository
+from app.database.write_buffer import get_write_buffer, start_write_buffer, stop_write_buffer
+from app.services.metrics import timed_query
+from app.services.plan_sections import plan_text
 
 # Log
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Veritabanı
-DATABASE_URL = "career_planner.db"
+# Desteklenen veritabanı adresleri
+SQLITE_URL_PREFIXES = ("sqlite+aiosqlite:///", "sqlite:///")
+MEMORY_URL_PREFIX = "memory://"
+
+# Kullanıcı, anket, plan ve konuşma verilerinin etkin deposu
+_repository: Optional[Repository] = None
+
+def parse_database_url(database_url: str) -> Tuple[str, str]:
+    """DATABASE_URL değerinden depo türünü ("sqlite" veya "memory") ve SQLite veritabanı adresini döndürür.
+
+    `sqlite+aiosqlite:///./career_planner.db` göreli, `sqlite:////var/db/app.db`
+    mutlak yoldur. `memory://` ve `sqlite:///:memory:` için dosya açılmaz;
+    adres, bu bağlantıya özel paylaşımlı bellek içi SQLite veritabanıdır.
+    """
+    if database_url.startswith(MEMORY_URL_PREFIX):
+        return "memory", _memory_database()
+    for prefix in SQLITE_URL_PREFIXES:
+        if database_url.startswith(prefix) and len(database_url) > len(prefix):
+            path = database_url[len(prefix):]
+            return "sqlite", _memory_database() if path == ":memory:" else path
+    raise ValueError(f"Desteklenmeyen veritabanı adresi: {database_url}")
+
+def _memory_database() -> str:
+    # Havuzdaki tüm bağlantılar aynı bellek içi veritabanını paylaşır; ad her açılışta farklıdır
+    return f"file:career-planner-{uuid.uuid4().hex}?mode=memory&cache=shared"
+
+def is_persistent_database(database_url: str) -> bool:
+    """Adres kalıcı bir SQLite dosyasını mı gösteriyor"""
+    return database_url.startswith(SQLITE_URL_PREFIXES) and not database_url.endswith(":memory:")
+
+async def connect_db() -> None:
+    """Uygulama ömrü boyunca kullanılacak depoyu, bağlantı havuzunu ve yazma tamponunu açar.
+
+    Depo `Settings.DATABASE_URL` ile seçilir. `memory://` ile kullanıcı, anket,
+    plan ve konuşma verileri bellekte tutulur; işler, önbellekler, idempotency
+    anahtarları ve kullanım özetleri gibi depo dışındaki tablolar bu bağlantıya
+    özel bellek içi bir SQLite veritabanında tutulduğu için diske hiçbir şey
+    yazılmaz. Bu veritabanındaki kullanıcı, anket, plan ve konuşma tabloları
+    boştur; depo dışındaki işlevler kullanıcıları yalnızca user_id ile tanır.
+    """
+    global _repository
+    settings = get_settings()
+    backend, database = parse_database_url(settings.DATABASE_URL)
+    pool = await open_pool(
+        database,
+        read_pool_size=settings.DB_READ_POOL_SIZE,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        busy_timeout=settings.DB_BUSY_TIMEOUT_SECONDS
+    )
+    write_buffer = start_write_buffer(
+        pool,
+        flush_interval=settings.WRITE_BUFFER_FLUSH_INTERVAL_SECONDS,
+        max_batch_size=settings.WRITE_BUFFER_MAX_BATCH_SIZE
+    )
+    _repository = SQLiteRepository(pool, write_buffer) if backend == "sqlite" else MemoryRepository()
+    logger.info(f"Veritabanı deposu: {type(_repository).__name__}")
+
+async def disconnect_db() -> None:
+    """Yazma tamponundaki kayıtları diske yazar ve bağlantı havuzunu kapatır"""
+    global _repository
+    await stop_write_buffer()
+    await close_pool()
+    _repository = None
+
+def get_repository() -> Repository:
+    """Etkin depoyu döndürür"""
+    if _repository is None:
+        raise RuntimeError("Veritabanı deposu açık değil")
+    return _repository
 
 async def init_db() -> None:
-    """Veritabanı başlatılır ve gerekli tablolar oluşturulur"""
-    try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
-            # Kullanıcılar tablosu
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    email TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Sorular ve cevaplar tablosu
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS questionnaire (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    question_number INTEGER NOT NULL,
-                    question TEXT NOT NULL,
-                    answer TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
+    """Veritabanı başlatılır ve bekleyen şema geçişleri uygulanır"""
+    try:
+        async with get_pool().writer() as db:
+            version = await run_migrations(db)
+            logger.info(f"Veritabanı şeması güncel (sürüm {version})")
+    except Exception as e:
+        logger.error(f"Veritabanı başlatma hatası: {e}")
+        raise
+
+@timed_query
+async def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    """E-posta adresine göre kullanıcıyı getirir"""
+    return await get_repository().get_user_by_email(email)
+
+@timed_query
+async def create_user(email: str) -> Optional[int]:
+    """Yeni bir kullanıcı oluşturur ve kullanıcı ID'sini döndürür"""
+    return await get_repository().create_user(email)
+
+@timed_query
+async def upsert_user(email: str) -> Optional[int]:
+    """Kullanıcıyı oluşturur veya mevcut kullanıcının ID'sini döndürür"""
+    return await get_repository().upsert_user(email)
+
+@timed_query
+async def save_question_answer(user_id: int, question_number: int, question: str, answer: str) -> bool:
+    """Soru ve cevabın kaydedilmesi; soru numarası zaten cevaplanmışsa False döndürülür, diğer hatalar çağırana iletilir"""
+    return await get_repository().save_question_answer(user_id, question_number, question, answer)
+
+@timed_query
+async def save_question_answers(user_id: int, answers: List[Dict[str, Any]]) -> int:
+    """Birden fazla soru-cevabın tek işlemde (transaction) kaydedilmesi.
+
+    Cevaplananların bekleyen soruları da aynı işlemde silinir. Cevaplardan biri
+    kaydedilemezse (ör. aynı soru numarası zaten cevaplanmışsa) hiçbiri
+    kaydedilmez: aynı soru numarası zaten cevaplanmışsa 0 döndürülür, diğer
+    hatalar çağırana iletilir. Kaydedilen cevap sayısını döndürür.
+    """
+    return await get_repository().save_question_answers(user_id, answers)
+
+@timed_query
+async def get_user_answers(user_id: int) -> List[Dict[str, Any]]:
+    """Kullanıcının tüm cevaplarının alınması"""
+    return await get_repository().get_user_answers(user_id)
+
+@timed_query
+async def get_user_answers_version(user_id: int) -> Dict[str, Any]:
+    """Kullanıcının cevap sayısı, son cevap ID'si ve son cevap zamanının alınması (koşullu istekler için)"""
+    return await get_repository().get_user_answers_version(user_id)
+
+@timed_query
+async def get_pending_question(user_id: int, question_number: int) -> Optional[Dict[str, Any]]:
+    """Kullanıcı için hazırlanmış bekleyen sorunun alınması"""
+    return await get_repository().get_pending_question(user_id, question_number)
+
+@timed_query
+async def save_pending_question(user_id: int, question_number: int, question: str, 
+                                context_hash: str) -> Optional[str]:
+    """Bekleyen sorunun kaydedilmesi; aynı bağlam için daha önce kaydedilmiş soru varsa o döndürülür"""
+    return await get_repository().save_pending_question(user_id, question_number, question, context_hash)
+
+@timed_query
+async def delete_pending_question(user_id: int, question_number: int) -> bool:
+    """Cevaplanan sorunun bekleyen sorulardan silinmesi"""
+    return await get_repository().delete_pending_question(user_id, question_number)
+
+@timed_query
+async def get_first_question_pool() -> List[Dict[str, Any]]:
+    """Hazır ilk sorular havuzunun eskiden yeniye alınması"""
+    try:
+        async with get_pool().reader() as db:
+            async with db.execute(
+                "SELECT id, question FROM first_question_pool ORDER BY id"
+            ) as cursor:
+                results = await cursor.fetchall()
+                return [dict(row) for row in results]
+    except Exception as e:
+        logger.error(f"İlk soru havuzunu alma hatası: {e}")
+        return []
+
+@timed_query
+async def add_first_questions(questions: List[str]) -> List[Dict[str, Any]]:
+    """Hazır ilk sorular havuzuna soru eklenmesi; havuzda zaten olan sorular atlanır"""
+    try:
+        async with get_pool().writer() as db:
+            added = []
+            for question in questions:
+                async with db.execute(
+                    """
+                    INSERT INTO first_question_pool (question) VALUES (?)
+                    ON CONFLICT (question) DO NOTHING
+                    RETURNING id, question
+                    """,
+                    (question,)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                    if result:
+                        added.append(dict(result))
+            await db.commit()
+            return added
+    except Exception as e:
+        logger.error(f"İlk soru havuzuna ekleme hatası: {e}")
+        return []
+
+@timed_query
+async def delete_first_question(question_id: int) -> bool:
+    """Kullanılan ilk sorunun havuzdan silinmesi"""
+    try:
+        await get_write_buffer().execute(
+            "DELETE FROM first_question_pool WHERE id = ?", (question_id,)
+        )
+        return True
+    except Exception as e:
+        logger.error(f"İlk soru silme hatası: {e}")
+        return False
+
+@timed_query
+async def save_career_plan(user_id: int, sections: List[Dict[str, Any]]) -> Optional[int]:
+    """Kariyer planının bölümleriyle birlikte tek işlemde kaydedilmesi; plan ID'sini döndürür"""
+    return await get_repository().save_career_plan(user_id, sections)
+
+# Toplu plan yenileme aracının sorguları depo yerine doğrudan SQLite tablolarını kullanır;
+# araç yalnızca kalıcı SQLite veritabanıyla çalışır (bkz. is_persistent_database)
+
+@timed_query
+async def get_completed_questionnaire_users(after_user_id: int, min_answers: int,
+                                            limit: int) -> List[int]:
+    """Anketi tamamlamış kullanıcıların ID'lerinin artan sırayla sayfa sayfa alınması"""
+    try:
+        async with get_pool().reader() as db:
+            async with db.execute(
+                """
+                SELECT user_id FROM questionnaire 
+                WHERE user_id > ? 
+                GROUP BY user_id 
+                HAVING COUNT(*) >= ? 
+                ORDER BY user_id 
+                LIMIT ?
+                """,
+                (after_user_id, min_answers, limit)
+            ) as cursor:
+                return [row["user_id"] for row in await cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Anketi tamamlayan kullanıcıları alma hatası: {e}")
+        raise
+
+@timed_query
+async def count_completed_questionnaire_users(after_user_id: int, min_answers: int) -> int:
+    """ID'si verilen kullanıcıdan büyük, anketi tamamlamış kullanıcı sayısı"""
+    try:
+        async with get_pool().reader() as db:
+            async with db.execute(
+                """
+                SELECT COUNT(*) FROM (
+                    SELECT user_id FROM questionnaire 
+                    WHERE user_id > ? 
+                    GROUP BY user_id 
+                    HAVING COUNT(*) >= ?
                 )
-            """)
-            
-            # Kariyer planları tablosu
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS career_plans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    plan_content TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
+                """,
+                (after_user_id, min_answers)
+            ) as cursor:
+                return (await cursor.fetchone())[0]
+    except Exception as e:
+        logger.error(f"Anketi tamamlayan kullanıcıları sayma hatası: {e}")
+        raise
+
+@timed_query
+async def get_answers_for_users(user_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Birden fazla kullanıcının cevaplarının tek sorguda alınması"""
+    if not user_ids:
+        return {}
+    try:
+        placeholders = ", ".join("?" for _ in user_ids)
+        async with get_pool().reader() as db:
+            async with db.execute(
+                f"""
+                SELECT user_id, question_number, question, answer 
+                FROM questionnaire 
+                WHERE user_id IN ({placeholders}) 
+                ORDER BY user_id, question_number
+                """,
+                user_ids
+            ) as cursor:
+                answers: Dict[int, List[Dict[str, Any]]] = {user_id: [] for user_id in user_ids}
+                async for row in cursor:
+                    answers[row["user_id"]].append({
+                        "question_number": row["question_number"],
+                        "question": row["question"],
+                        "answer": row["answer"]
+                    })
+                return answers
+    except Exception as e:
+        logger.error(f"Kullanıcıların cevaplarını alma hatası: {e}")
+        raise
+
+@timed_query
+async def start_plan_backfill_run(run_id: str) -> Dict[str, Any]:
+    """Toplu plan yenileme çalıştırmasının oluşturulması; varsa kaldığı yer döndürülür"""
+    try:
+        async with get_pool().writer() as db:
+            await db.execute(
+                "INSERT INTO plan_backfill_runs (run_id) VALUES (?) ON CONFLICT (run_id) DO NOTHING",
+                (run_id,)
+            )
+            await db.commit()
+            async with db.execute(
+                """
+                SELECT run_id, last_user_id, processed, failed, started_at, finished_at 
+                FROM plan_backfill_runs WHERE run_id = ?
+                """,
+                (run_id,)
+            ) as cursor:
+                return dict(await cursor.fetchone())
+    except Exception as e:
+        logger.error(f"Plan yenileme çalıştırması başlatma hatası: {e}")
+        raise
+
+@timed_query
+async def get_plan_backfill_failures(run_id: str, after_user_id: int, limit: int) -> List[int]:
+    """Çalıştırmada planı oluşturulamayan kullanıcıların ID'lerinin sayfa sayfa alınması"""
+    try:
+        async with get_pool().reader() as db:
+            async with db.execute(
+                """
+                SELECT user_id FROM plan_backfill_failures 
+                WHERE run_id = ? AND user_id > ? 
+                ORDER BY user_id 
+                LIMIT ?
+                """,
+                (run_id, after_user_id, limit)
+            ) as cursor:
+                return [row["user_id"] for row in await cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Plan yenileme hatalarını alma hatası: {e}")
+        raise
+
+@timed_query
+async def save_plan_backfill_chunk(run_id: str, plans: List[Tuple[int, List[Dict[str, Any]]]],
+                                   failures: List[Tuple[int, str]],
+                                   last_user_id: Optional[int]) -> None:
+    """Bir grup kullanıcının yeni planlarının, hatalarının ve kaldığı yerin tek işlemde kaydedilmesi.
+
+    Yeni planlar en son plan olarak eklenir; bölümler tek executemany ile yazılır.
+    last_user_id None ise (hatalıların yeniden denenmesi) kaldığı yer değişmez.
+    """
+    try:
+        async with get_pool().writer() as db:
+            section_rows = []
+            for user_id, sections in plans:
+                cursor = await db.execute(
+                    "INSERT INTO career_plans (user_id, plan_content, updated_at) VALUES (?, '', CURRENT_TIMESTAMP)",
+                    (user_id,)
                 )
-            """)
-            
-            # Konuşma geçmişi tablosu
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS conversations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    message TEXT NOT NULL,
-                    is_user BOOLEAN NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
+                section_rows.extend(
+                    (cursor.lastrowid, section["key"], section["title"], section["position"], section["content"])
+                    for section in sections
                 )
-            """)
-            
+            await db.executemany(
+                """
+                INSERT INTO career_plan_sections (plan_id, section_key, title, position, content) 
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                section_rows
+            )
+            await db.executemany(
+                "DELETE FROM plan_backfill_failures WHERE run_id = ? AND user_id = ?",
+                [(run_id, user_id) for user_id, _ in plans]
+            )
+            await db.executemany(
+                """
+                INSERT INTO plan_backfill_failures (run_id, user_id, error) VALUES (?, ?, ?)
+                ON CONFLICT (run_id, user_id) DO UPDATE SET 
+                    error = excluded.error,
+                    attempts = attempts + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                [(run_id, user_id, error) for user_id, error in failures]
+            )
+            await db.execute(
+                """
+                UPDATE plan_backfill_runs SET 
+                    last_user_id = COALESCE(?, last_user_id),
+                    processed = processed + ?,
+                    failed = (SELECT COUNT(*) FROM plan_backfill_failures WHERE run_id = ?),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = ?
+                """,
+                (last_user_id, len(plans), run_id, run_id)
+            )
             await db.commit()
-            logger.info("Veritabanı tabloları başarıyla oluşturuldu")
     except Exception as e:
-        logger.error(f"Veritabanı başlatma hatası: {e}")
+        logger.error(f"Plan yenileme sonuçlarını kaydetme hatası: {e}")
         raise
 
-async def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-    """E-posta adresine göre kullanıcıyı getirir"""
+@timed_query
+async def finish_plan_backfill_run(run_id: str) -> Dict[str, Any]:
+    """Çalıştırmanın tamamlandı olarak işaretlenmesi; son sayaçlar döndürülür"""
+    try:
+        async with get_pool().writer() as db:
+            await db.execute(
+                "UPDATE plan_backfill_runs SET finished_at = CURRENT_TIMESTAMP WHERE run_id = ?",
+                (run_id,)
+            )
+            await db.commit()
+            async with db.execute(
+                """
+                SELECT run_id, last_user_id, processed, failed, started_at, finished_at 
+                FROM plan_backfill_runs WHERE run_id = ?
+                """,
+                (run_id,)
+            ) as cursor:
+                return dict(await cursor.fetchone())
+    except Exception as e:
+        logger.error(f"Plan yenileme çalıştırmasını bitirme hatası: {e}")
+        raise
+
+@timed_query
+async def save_career_plan_sections(plan_id: int, sections: List[Dict[str, Any]]) -> bool:
+    """Planın verilen bölümlerinin güncellenmesi; planın sürümü artırılır.
+
+    Bölümleri olmayan eski planlarda tüm bölümler verilir; plan metni bölümlere
+    taşındığı için plan_content temizlenir.
+    """
+    return await get_repository().save_career_plan_sections(plan_id, sections)
+
+@timed_query
+async def get_latest_career_plan(user_id: int) -> Optional[Dict[str, Any]]:
+    """Kullanıcının son kariyer planının bölümleriyle birlikte alınması.
+
+    Dönen sözlükte id, version, plan_content (yalnızca eski planlarda dolu),
+    created_at, updated_at ve sıralı bölümler (sections) bulunur.
+    """
+    return await get_repository().get_latest_career_plan(user_id)
+
+async def get_career_plan(user_id: int) -> Optional[str]:
+    """Kullanıcının kariyer planının metin olarak alınması (bölümler başlıklarıyla birleştirilir)"""
+    plan = await get_latest_career_plan(user_id)
+    return plan_text(plan) if plan else None
+
+@timed_query
+async def get_career_plan_version(user_id: int) -> Optional[Dict[str, Any]]:
+    """Son planın yalnızca kimlik, sürüm ve güncelleme zamanının alınması (koşullu istekler için)"""
+    return await get_repository().get_career_plan_version(user_id)
+
+@timed_query
+async def get_career_plan_section(user_id: int, section_key: str) -> Optional[Dict[str, Any]]:
+    """Kullanıcının son kariyer planının tek bir bölümünün alınması"""
+    return await get_repository().get_career_plan_section(user_id, section_key)
+
+@timed_query
+async def save_conversation_message(user_id: int, message: str, is_user: bool) -> bool:
+    """Konuşma mesajının kaydedilmesi"""
+    try:
+        # Mesaj kalıcı olana kadar beklenir; bekleyen istek iptal edilse de yazma sürer
+        await asyncio.shield(queue_conversation_message(user_id, message, is_user))
+        return True
+    except Exception as e:
+        logger.error(f"Konuşma mesajı kaydetme hatası: {e}")
+        return False
+
+def queue_conversation_message(user_id: int, message: str, is_user: bool) -> "asyncio.Future[None]":
+    """Konuşma mesajını kaydetmeye başlar ve commit edilmesini beklemeden döndürür.
+
+    Dönen Future mesaj commit edildiğinde None ile tamamlanır. Kullanıcının geçmişini
+    okuyan sorgular bekleyen yazmaları beklediği için sonraki okumalar mesajı görür.
+    """
+    return get_repository().queue_conversation_message(user_id, message, is_user)
+
+async def wait_for_pending_writes(user_id: int) -> None:
+    """Kullanıcının bekleyen yazmaları commit edilene kadar bekler"""
+    await get_repository().wait_for_pending_writes(user_id)
+
+@timed_query
+async def get_chat_context(user_id: int, history_limit: int) -> Dict[str, Any]:
+    """Sohbet promptu için planı, konuşma özetini ve son mesajları birlikte alır.
+
+    Kullanıcının bekleyen yazmalarını beklemez; gerekiyorsa çağıran önce
+    wait_for_pending_writes çağırır. Dönen sözlükte career_plan (metin),
+    conversation_summary ve yeniden eskiye sıralı conversation_history bulunur.
+    """
+    return await get_repository().get_chat_context(user_id, history_limit)
+
+@timed_query
+async def get_conversation_history(user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    """Kullanıcının konuşma geçmişinin alınması"""
+    try:
+        return await get_repository().get_conversation_page(user_id, limit)
+    except Exception as e:
+        logger.error(f"Konuşma geçmişi alma hatası: {e}")
+        return []
+
+@timed_query
+async def get_conversation_page(user_id: int, limit: int, 
+                                before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+    """Konuşma geçmişinin (created_at, id) imlecinden önceki sayfasının yeniden eskiye alınması.
+
+    İmleç, önceki sayfanın son mesajının (created_at, id) değeridir; sayfa
+    maliyeti konuşmanın uzunluğuna bağlı değildir.
+    """
+    return await get_repository().get_conversation_page(user_id, limit, before)
+
+async def iter_conversation_history(user_id: int, page_size: int, 
+                                    before: Optional[Tuple[str, int]] = None
+                                    ) -> AsyncIterator[Dict[str, Any]]:
+    """Konuşma geçmişini sayfa sayfa okuyarak yeniden eskiye mesaj mesaj döndürür.
+
+    Bellekte aynı anda en fazla bir sayfa tutulur; SQLite deposunda okuma
+    bağlantısı sayfalar arasında havuza geri verilir.
+    """
+    while True:
+        page = await get_conversation_page(user_id, page_size, before)
+        for message in page:
+            yield message
+        if len(page) < page_size:
+            return
+        before = (page[-1]["created_at"], page[-1]["id"])
+
+@timed_query
+async def search_user_content(user_id: int, match_terms: str, sources: List[str], 
+                              limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+    """Kullanıcının sohbetlerinde ve planlarında alaka sırasına göre arama yapılması.
+
+    match_terms FTS5 sorgu ifadesidir (ör. '"python" "veri"*'): tırnak içindeki
+    kelimelerin hepsi geçmeli, `*` ile biten kelime önek olarak eşleşir. Farklı
+    kaynakların sonuçları puana göre (küçük puan daha alakalı) birleştirilir.
+    """
+    return await get_repository().search_user_content(user_id, match_terms, sources, limit, offset)
+
+@timed_query
+async def get_conversation_summary(user_id: int) -> Optional[Dict[str, Any]]:
+    """Kullanıcının konuşma özetinin alınması"""
+    return await get_repository().get_conversation_summary(user_id)
+
+@timed_query
+async def save_conversation_summary(user_id: int, summary: str, last_message_id: int) -> bool:
+    """Konuşma özetinin kaydedilmesi"""
+    return await get_repository().save_conversation_summary(user_id, summary, last_message_id)
+
+@timed_query
+async def get_cached_chat_response(cache_key: str, max_age_seconds: float) -> Optional[str]:
+    """Süresi dolmamış önbellekteki sohbet yanıtının alınması"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
-            db.row_factory = aiosqlite.Row
+        async with get_pool().reader() as db:
             async with db.execute(
-                "SELECT * FROM users WHERE email = ?", (email,)
+                """
+                SELECT response FROM chat_response_cache 
+                WHERE cache_key = ? AND created_at >= datetime('now', ?)
+                """,
+                (cache_key, f"-{int(max_age_seconds)} seconds")
             ) as cursor:
                 result = await cursor.fetchone()
-                if result:
-                    return dict(result)
-                return None
+                return result["response"] if result else None
     except Exception as e:
-        logger.error(f"Kullanıcı alma hatası: {e}")
+        logger.error(f"Önbellekteki sohbet yanıtını alma hatası: {e}")
         return None
 
-async def create_user(email: str) -> Optional[int]:
-    """Yeni bir kullanıcı oluşturur ve kullanıcı ID'sini döndürür"""
+@timed_query
+async def save_cached_chat_response(cache_key: str, response: str) -> bool:
+    """Sohbet yanıtının önbelleğe kaydedilmesi"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
+        await get_write_buffer().execute(
+            """
+            INSERT INTO chat_response_cache (cache_key, response) VALUES (?, ?)
+            ON CONFLICT (cache_key) DO UPDATE SET 
+                response = excluded.response,
+                created_at = CURRENT_TIMESTAMP,
+                last_used_at = CURRENT_TIMESTAMP
+            """,
+            (cache_key, response)
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Sohbet yanıtını önbelleğe kaydetme hatası: {e}")
+        return False
+
+@timed_query
+async def touch_cached_chat_response(cache_key: str) -> bool:
+    """Önbellekteki yanıtın son kullanım zamanının güncellenmesi (LRU)"""
+    try:
+        await get_write_buffer().execute(
+            "UPDATE chat_response_cache SET last_used_at = CURRENT_TIMESTAMP WHERE cache_key = ?",
+            (cache_key,)
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Önbellek kullanım zamanı güncelleme hatası: {e}")
+        return False
+
+@timed_query
+async def prune_chat_response_cache(max_age_seconds: float, max_rows: int) -> int:
+    """Süresi dolmuş yanıtların ve satır sınırını aşan en az kullanılan yanıtların silinmesi"""
+    try:
+        async with get_pool().writer() as db:
             cursor = await db.execute(
-                "INSERT INTO users (email) VALUES (?)", (email,)
+                "DELETE FROM chat_response_cache WHERE created_at < datetime('now', ?)",
+                (f"-{int(max_age_seconds)} seconds",)
+            )
+            deleted = cursor.rowcount
+            cursor = await db.execute(
+                """
+                DELETE FROM chat_response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM chat_response_cache 
+                    ORDER BY last_used_at DESC 
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_rows,)
             )
+            deleted += cursor.rowcount
             await db.commit()
-            return cursor.lastrowid
+            return deleted
     except Exception as e:
-        logger.error(f"Kullanıcı oluşturma hatası: {e}")
-        return None
+        logger.error(f"Sohbet yanıtı önbelleği temizleme hatası: {e}")
+        return 0
 
-async def save_question_answer(user_id: int, question_number: int, question: str, answer: str) -> bool:
-    """Soru ve cevabın kaydedilmesi"""
+@timed_query
+async def get_idempotency_record(user_id: int, idempotency_key: str,
+                                 max_age_seconds: float) -> Optional[Dict[str, Any]]:
+    """Süresi dolmamış idempotency anahtarı kaydının (istek özeti, saklanan yanıt ve completed_at) alınması.
+
+    completed_at boşsa anahtar ayrılmış, istek hâlâ işleniyordur.
+    """
+    try:
+        await get_write_buffer().barrier(user_id)
+        async with get_pool().reader() as db:
+            async with db.execute(
+                """
+                SELECT request_hash, status_code, response, completed_at FROM idempotency_keys 
+                WHERE user_id = ? AND idempotency_key = ? AND created_at >= datetime('now', ?)
+                """,
+                (user_id, idempotency_key, f"-{int(max_age_seconds)} seconds")
+            ) as cursor:
+                result = await cursor.fetchone()
+                return dict(result) if result else None
+    except Exception as e:
+        logger.error(f"Idempotency anahtarı alma hatası: {e}")
+        raise
+
+@timed_query
+async def reserve_idempotency_key(user_id: int, idempotency_key: str, request_hash: str,
+                                  max_age_seconds: float, lock_timeout_seconds: float) -> bool:
+    """Anahtarı işlem çalıştırılmadan önce ayırır; anahtar ayrıldıysa True döndürür.
+
+    Süresi dolmuş kaydın ve yanıtı `lock_timeout_seconds` içinde saklanmamış
+    ayırmanın yerine yeni ayırma yazılır. Ayırma tek yazıcı bağlantısında
+    yapıldığı için aynı anahtarı yalnızca bir istek (ve bir işçi süreci) alabilir.
+    """
+    try:
+        async with get_pool().writer() as db:
+            async with db.execute(
+                """
+                INSERT INTO idempotency_keys (user_id, idempotency_key, request_hash, status_code, response) 
+                VALUES (?, ?, ?, 0, '')
+                ON CONFLICT (user_id, idempotency_key) DO UPDATE SET 
+                    request_hash = excluded.request_hash,
+                    status_code = 0,
+                    response = '',
+                    completed_at = NULL,
+                    created_at = CURRENT_TIMESTAMP
+                WHERE idempotency_keys.created_at < datetime('now', ?) 
+                   OR (idempotency_keys.completed_at IS NULL 
+                       AND idempotency_keys.created_at < datetime('now', ?))
+                RETURNING user_id
+                """,
+                (user_id, idempotency_key, request_hash,
+                 f"-{int(max_age_seconds)} seconds", f"-{int(lock_timeout_seconds)} seconds")
+            ) as cursor:
+                reserved = await cursor.fetchone() is not None
+            await db.commit()
+            return reserved
+    except Exception as e:
+        logger.error(f"Idempotency anahtarı ayırma hatası: {e}")
+        raise
+
+@timed_query
+async def save_idempotency_record(user_id: int, idempotency_key: str, request_hash: str,
+                                  status_code: int, response: str) -> bool:
+    """Ayrılmış idempotency anahtarına isteğin yanıtının kaydedilmesi"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
+        await get_write_buffer().execute(
+            """
+            INSERT INTO idempotency_keys 
+                (user_id, idempotency_key, request_hash, status_code, response, completed_at) 
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id, idempotency_key) DO UPDATE SET 
+                request_hash = excluded.request_hash,
+                status_code = excluded.status_code,
+                response = excluded.response,
+                completed_at = CURRENT_TIMESTAMP
+            """,
+            (user_id, idempotency_key, request_hash, status_code, response),
+            user_id=user_id
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Idempotency anahtarı kaydetme hatası: {e}")
+        return False
+
+@timed_query
+async def release_idempotency_key(user_id: int, idempotency_key: str) -> bool:
+    """Başarısız isteğin ayırmasının silinmesi; anahtar aynı istekle yeniden denenebilir"""
+    try:
+        async with get_pool().writer() as db:
             await db.execute(
                 """
-                INSERT INTO questionnaire (user_id, question_number, question, answer) 
-                VALUES (?, ?, ?, ?)
+                DELETE FROM idempotency_keys 
+                WHERE user_id = ? AND idempotency_key = ? AND completed_at IS NULL
                 """,
-                (user_id, question_number, question, answer)
+                (user_id, idempotency_key)
             )
             await db.commit()
             return True
     except Exception as e:
-        logger.error(f"Soru-cevap kaydetme hatası: {e}")
+        logger.error(f"Idempotency anahtarı bırakma hatası: {e}")
         return False
 
-async def get_user_answers(user_id: int) -> List[Dict[str, Any]]:
-    """Kullanıcının tüm cevaplarının alınması"""
+@timed_query
+async def prune_idempotency_keys(max_age_seconds: float) -> int:
+    """Süresi dolmuş idempotency anahtarlarının silinmesi"""
+    try:
+        async with get_pool().writer() as db:
+            cursor = await db.execute(
+                "DELETE FROM idempotency_keys WHERE created_at < datetime('now', ?)",
+                (f"-{int(max_age_seconds)} seconds",)
+            )
+            await db.commit()
+            return cursor.rowcount
+    except Exception as e:
+        logger.error(f"Idempotency anahtarı temizleme hatası: {e}")
+        return 0
+
+@timed_query
+async def add_llm_usage(rows: List[Tuple[str, int, str, int, int, int, int]]) -> bool:
+    """Gemini kullanım toplamlarının günlük özet tablosuna eklenmesi.
+
+    Her satır (gün, user_id, işlem, çağrı, prompt token, çıktı token, gecikme ms)
+    biçimindedir; mevcut satırın değerlerine eklenir.
+    """
+    try:
+        async with get_pool().writer() as db:
+            await db.executemany(
+                """
+                INSERT INTO llm_usage_daily 
+                    (day, user_id, operation, calls, prompt_tokens, output_tokens, latency_ms) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (day, user_id, operation) DO UPDATE SET 
+                    calls = calls + excluded.calls,
+                    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    latency_ms = latency_ms + excluded.latency_ms
+                """,
+                rows
+            )
+            await db.commit()
+            return True
+    except Exception as e:
+        logger.error(f"Gemini kullanımı kaydetme hatası: {e}")
+        return False
+
+@timed_query
+async def get_user_token_usage(user_id: int, day: str) -> int:
+    """Kullanıcının verilen gündeki toplam token kullanımı"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
-            db.row_factory = aiosqlite.Row
+        async with get_pool().reader() as db:
             async with db.execute(
                 """
-                SELECT question_number, question, answer 
-                FROM questionnaire 
-                WHERE user_id = ? 
-                ORDER BY question_number
+                SELECT COALESCE(SUM(prompt_tokens + output_tokens), 0) FROM llm_usage_daily 
+                WHERE user_id = ? AND day = ?
                 """,
-                (user_id,)
+                (user_id, day)
             ) as cursor:
-                results = await cursor.fetchall()
-                return [dict(row) for row in results]
+                return (await cursor.fetchone())[0]
     except Exception as e:
-        logger.error(f"Kullanıcı cevaplarını alma hatası: {e}")
-        return []
+        logger.error(f"Token kullanımı alma hatası: {e}")
+        raise
 
-async def save_career_plan(user_id: int, plan_content: str) -> bool:
-    """Kariyer planının kaydedilmesi"""
+@timed_query
+async def get_user_llm_usage(user_id: int, since_day: str) -> List[Dict[str, Any]]:
+    """Kullanıcının verilen günden itibaren gün ve işlem başına Gemini kullanımı (yeniden eskiye)"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
-            await db.execute(
-                "INSERT INTO career_plans (user_id, plan_content) VALUES (?, ?)",
-                (user_id, plan_content)
+        async with get_pool().reader() as db:
+            async with db.execute(
+                """
+                SELECT day, operation, calls, prompt_tokens, output_tokens, latency_ms 
+                FROM llm_usage_daily 
+                WHERE user_id = ? AND day >= ? 
+                ORDER BY day DESC, operation
+                """,
+                (user_id, since_day)
+            ) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Kullanıcının Gemini kullanımını alma hatası: {e}")
+        raise
+
+@timed_query
+async def get_llm_usage_by_operation(since_day: str) -> List[Dict[str, Any]]:
+    """Verilen günden itibaren işlem başına toplam Gemini kullanımı"""
+    try:
+        async with get_pool().reader() as db:
+            async with db.execute(
+                """
+                SELECT operation, SUM(calls) AS calls, SUM(prompt_tokens) AS prompt_tokens, 
+                       SUM(output_tokens) AS output_tokens, SUM(latency_ms) AS latency_ms 
+                FROM llm_usage_daily 
+                WHERE day >= ? 
+                GROUP BY operation
+                """,
+                (since_day,)
+            ) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"İşlem başına Gemini kullanımını alma hatası: {e}")
+        raise
+
+@timed_query
+async def get_top_llm_users(since_day: str, limit: int) -> List[Dict[str, Any]]:
+    """Verilen günden itibaren en çok token kullanan kullanıcılar"""
+    try:
+        async with get_pool().reader() as db:
+            async with db.execute(
+                """
+                SELECT user_id, SUM(calls) AS calls, SUM(prompt_tokens) AS prompt_tokens, 
+                       SUM(output_tokens) AS output_tokens, SUM(latency_ms) AS latency_ms 
+                FROM llm_usage_daily 
+                WHERE day >= ? AND user_id != 0 
+                GROUP BY user_id 
+                ORDER BY SUM(prompt_tokens + output_tokens) DESC 
+                LIMIT ?
+                """,
+                (since_day, limit)
+            ) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"En çok kullanan kullanıcıları alma hatası: {e}")
+        raise
+
+@timed_query
+async def get_unsummarized_messages(user_id: int, after_message_id: int, 
+                                    keep_recent: int) -> List[Dict[str, Any]]:
+    """Özete henüz eklenmemiş, son `keep_recent` mesajdan eski mesajların alınması"""
+    return await get_repository().get_unsummarized_messages(user_id, after_message_id, keep_recent)
+
+@timed_query
+async def create_job(user_id: int, job_type: str, max_attempts: int) -> Optional[int]:
+    """Yeni bir arka plan işi oluşturur ve iş ID'sini döndürür"""
+    try:
+        async with get_pool().writer() as db:
+            cursor = await db.execute(
+                "INSERT INTO jobs (user_id, job_type, max_attempts, progress) VALUES (?, ?, ?, ?)",
+                (user_id, job_type, max_attempts, "Sırada bekliyor")
             )
             await db.commit()
-            return True
+            return cursor.lastrowid
     except Exception as e:
-        logger.error(f"Kariyer planı kaydetme hatası: {e}")
-        return False
+        logger.error(f"İş oluşturma hatası: {e}")
+        return None
 
-async def get_career_plan(user_id: int) -> Optional[str]:
-    """Kullanıcının kariyer planının alınması"""
+@timed_query
+async def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    """İşin alınması"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
-            db.row_factory = aiosqlite.Row
+        async with get_pool().reader() as db:
+            async with db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)) as cursor:
+                result = await cursor.fetchone()
+                if result:
+                    return dict(result)
+                return None
+    except Exception as e:
+        logger.error(f"İş alma hatası: {e}")
+        return None
+
+@timed_query
+async def get_active_job(user_id: int, job_type: str) -> Optional[Dict[str, Any]]:
+    """Kullanıcının sırada bekleyen veya çalışan işinin alınması"""
+    try:
+        async with get_pool().reader() as db:
             async with db.execute(
-                "SELECT plan_content FROM career_plans WHERE user_id = ? ORDER BY created_at DESC LIMIT 1",
-                (user_id,)
+                """
+                SELECT * FROM jobs 
+                WHERE user_id = ? AND job_type = ? AND status IN ('queued', 'running') 
+                ORDER BY id DESC 
+                LIMIT 1
+                """,
+                (user_id, job_type)
             ) as cursor:
                 result = await cursor.fetchone()
                 if result:
-                    return result["plan_content"]
+                    return dict(result)
                 return None
     except Exception as e:
-        logger.error(f"Kariyer planı alma hatası: {e}")
+        logger.error(f"Aktif iş alma hatası: {e}")
         return None
 
-async def save_conversation_message(user_id: int, message: str, is_user: bool) -> bool:
-    """Konuşma mesajının kaydedilmesi"""
+@timed_query
+async def claim_next_job(stale_after_seconds: float) -> Optional[Dict[str, Any]]:
+    """Çalışmaya hazır ilk işi alır ve çalışıyor olarak işaretler.
+
+    Uzun süredir güncellenmeyen 'running' işler (ör. çöken bir işçiden kalanlar)
+    deneme hakkı kaldıysa tekrar alınır; hakkı bitenler başarısız olarak işaretlenir.
+    """
+    stale_before = f"-{int(stale_after_seconds)} seconds"
+    try:
+        async with get_pool().writer() as db:
+            await db.execute(
+                """
+                UPDATE jobs 
+                SET status = 'failed', progress = 'Başarısız', 
+                    error = 'İşçi yanıt vermedi, deneme hakkı doldu', updated_at = CURRENT_TIMESTAMP 
+                WHERE status = 'running' AND updated_at <= datetime('now', ?) 
+                  AND attempts >= max_attempts
+                """,
+                (stale_before,)
+            )
+            async with db.execute(
+                """
+                UPDATE jobs 
+                SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP 
+                WHERE id = (
+                    SELECT id FROM jobs 
+                    WHERE (status = 'queued' AND run_after <= CURRENT_TIMESTAMP) 
+                       OR (status = 'running' AND updated_at <= datetime('now', ?) 
+                           AND attempts < max_attempts) 
+                    ORDER BY id 
+                    LIMIT 1
+                ) 
+                RETURNING *
+                """,
+                (stale_before,)
+            ) as cursor:
+                result = await cursor.fetchone()
+            await db.commit()
+            if result:
+                return dict(result)
+            return None
+    except Exception as e:
+        logger.error(f"İş alma hatası: {e}")
+        return None
+
+@timed_query
+async def update_job_progress(job_id: int, progress: str) -> bool:
+    """İşin ilerleme durumunun güncellenmesi"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
+        async with get_pool().writer() as db:
             await db.execute(
-                "INSERT INTO conversations (user_id, message, is_user) VALUES (?, ?, ?)",
-                (user_id, message, is_user)
+                "UPDATE jobs SET progress = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (progress, job_id)
             )
             await db.commit()
             return True
     except Exception as e:
-        logger.error(f"Konuşma mesajı kaydetme hatası: {e}")
+        logger.error(f"İş ilerleme güncelleme hatası: {e}")
         return False
 
-async def get_conversation_history(user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
-    """Kullanıcının konuşma geçmişinin alınması"""
+@timed_query
+async def complete_job(job_id: int) -> bool:
+    """İşin tamamlandı olarak işaretlenmesi"""
     try:
-        async with aiosqlite.connect(DATABASE_URL) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
+        async with get_pool().writer() as db:
+            await db.execute(
                 """
-                SELECT message, is_user, created_at 
-                FROM conversations 
-                WHERE user_id = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
+                UPDATE jobs 
+                SET status = 'completed', progress = 'Tamamlandı', error = NULL, 
+                    updated_at = CURRENT_TIMESTAMP 
+                WHERE id = ?
                 """,
-                (user_id, limit)
-            ) as cursor:
-                results = await cursor.fetchall()
-                return [dict(row) for row in results]
+                (job_id,)
+            )
+            await db.commit()
+            return True
     except Exception as e:
-        logger.error(f"Konuşma geçmişi alma hatası: {e}")
-        return [] 
\ No newline at end of file
+        logger.error(f"İş tamamlama hatası: {e}")
+        return False
+
+@timed_query
+async def requeue_job(job_id: int) -> bool:
+    """Durdurulan işin hemen tekrar alınabilecek şekilde sıraya geri konması; deneme sayılmaz"""
+    try:
+        async with get_pool().writer() as db:
+            await db.execute(
+                """
+                UPDATE jobs 
+                SET status = 'queued', progress = 'Sırada bekliyor', attempts = MAX(attempts - 1, 0), 
+                    run_after = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP 
+                WHERE id = ? AND status = 'running'
+                """,
+                (job_id,)
+            )
+            await db.commit()
+            return True
+    except Exception as e:
+        logger.error(f"İş sıraya geri koyma hatası: {e}")
+        return False
+
+@timed_query
+async def fail_job(job_id: int, error: str, retry_delay_seconds: Optional[float]) -> bool:
+    """İşin hatasının kaydedilmesi; gecikme verilirse iş yeniden sıraya alınır"""
+    try:
+        async with get_pool().writer() as db:
+            if retry_delay_seconds is None:
+                await db.execute(
+                    """
+                    UPDATE jobs 
+                    SET status = 'failed', progress = 'Başarısız', error = ?, 
+                        updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = ?
+                    """,
+                    (error, job_id)
+                )
+            else:
+                await db.execute(
+                    """
+                    UPDATE jobs 
+                    SET status = 'queued', progress = 'Yeniden denenecek', error = ?, 
+                        run_after = datetime('now', ?), updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = ?
+                    """,
+                    (error, f"+{int(retry_delay_seconds)} seconds", job_id)
+                )
+            await db.commit()
+            return True
+    except Exception as e:
+        logger.error(f"İş hatası kaydetme hatası: {e}")
+        return False
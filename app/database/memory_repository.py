@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.database.repository import Repository
+from app.services.plan_sections import format_plan
+
+# Log
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Arama ifadesindeki tırnaklı kelimeler ('"python" "veri"*')
+_MATCH_TERM_PATTERN = re.compile(r'"([^"]*)"(\*?)')
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Parça (snippet) uzunluğu: FTS5 snippet() ile aynı kelime sayısı
+_SNIPPET_TOKENS = 16
+
+def _now() -> str:
+    """SQLite CURRENT_TIMESTAMP biçiminde şu anki UTC zamanı"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def _fold(text: str) -> str:
+    """Aramada büyük/küçük harf ve aksanları yok sayar (FTS5 unicode61 remove_diacritics 2 gibi)"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+class MemoryRepository(Repository):
+    """Verileri süreç belleğinde tutan depo; testler ve ölçümler içindir.
+
+    SQLite deposuyla aynı dönüş biçimlerini ve kısıtları (tekil e-posta, kullanıcı
+    başına tekil soru numarası) uygular. Her işlem olay döngüsünde kesintisiz
+    çalıştığı için yazmalar hemen görünür ve bekleyen yazma yoktur. Veriler süreç
+    kapanınca kaybolur; her örnek diğerlerinden bağımsızdır.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._answers: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self._pending_questions: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._plans: Dict[int, Dict[str, Any]] = {}
+        self._plans_by_user: Dict[int, List[Dict[str, Any]]] = {}
+        self._messages: Dict[int, List[Dict[str, Any]]] = {}
+        self._summaries: Dict[int, Dict[str, Any]] = {}
+
+    def _next_id(self, table: str) -> int:
+        self._ids[table] = self._ids.get(table, 0) + 1
+        return self._ids[table]
+
+    # Kullanıcılar
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user = self._users.get(email)
+        return dict(user) if user else None
+
+    async def create_user(self, email: str) -> Optional[int]:
+        if email in self._users:
+            logger.error("Kullanıcı oluşturma hatası: UNIQUE constraint failed: users.email")
+            return None
+        user = {"id": self._next_id("users"), "email": email, "created_at": _now()}
+        self._users[email] = user
+        return user["id"]
+
+    async def upsert_user(self, email: str) -> Optional[int]:
+        user = self._users.get(email)
+        if user:
+            return user["id"]
+        return await self.create_user(email)
+
+    # Anket
+
+    def _insert_answer(self, user_id: int, question_number: int, question: str, answer: str) -> None:
+        self._answers.setdefault(user_id, {})[question_number] = {
+            "id": self._next_id("questionnaire"),
+            "question_number": question_number,
+            "question": question,
+            "answer": answer,
+            "created_at": _now()
+        }
+
+    async def save_question_answer(self, user_id: int, question_number: int,
+                                   question: str, answer: str) -> bool:
+        if question_number in self._answers.get(user_id, {}):
+            logger.warning("Soru-cevap kaydedilmedi, cevap zaten var: UNIQUE constraint failed: questionnaire.user_id, questionnaire.question_number")
+            return False
+        self._insert_answer(user_id, question_number, question, answer)
+        return True
+
+    async def save_question_answers(self, user_id: int, answers: List[Dict[str, Any]]) -> int:
+        answered = self._answers.get(user_id, {})
+        numbers = [qa["question_number"] for qa in answers]
+        if len(set(numbers)) != len(numbers) or any(number in answered for number in numbers):
+            logger.warning("Toplu soru-cevap kaydedilmedi, cevap zaten var")
+            return 0
+        for qa in answers:
+            self._insert_answer(user_id, qa["question_number"], qa["question"], qa["answer"])
+            self._pending_questions.pop((user_id, qa["question_number"]), None)
+        return len(answers)
+
+    async def get_user_answers(self, user_id: int) -> List[Dict[str, Any]]:
+        answers = self._answers.get(user_id, {})
+        return [
+            {"question_number": number, "question": answers[number]["question"], "answer": answers[number]["answer"]}
+            for number in sorted(answers)
+        ]
+
+    async def get_user_answers_version(self, user_id: int) -> Dict[str, Any]:
+        answers = list(self._answers.get(user_id, {}).values())
+        return {
+            "count": len(answers),
+            "last_id": max((answer["id"] for answer in answers), default=0),
+            "updated_at": max((answer["created_at"] for answer in answers), default=None)
+        }
+
+    async def get_pending_question(self, user_id: int, question_number: int) -> Optional[Dict[str, Any]]:
+        pending = self._pending_questions.get((user_id, question_number))
+        if pending:
+            return {"question": pending["question"], "context_hash": pending["context_hash"]}
+        return None
+
+    async def save_pending_question(self, user_id: int, question_number: int, question: str,
+                                    context_hash: str) -> Optional[str]:
+        key = (user_id, question_number)
+        pending = self._pending_questions.get(key)
+        if pending is None or pending["context_hash"] != context_hash:
+            pending = {"question": question, "context_hash": context_hash, "created_at": _now()}
+            self._pending_questions[key] = pending
+        return pending["question"]
+
+    async def delete_pending_question(self, user_id: int, question_number: int) -> bool:
+        self._pending_questions.pop((user_id, question_number), None)
+        return True
+
+    # Kariyer planları
+
+    @staticmethod
+    def _write_plan_sections(plan: Dict[str, Any], sections: List[Dict[str, Any]]) -> None:
+        now = _now()
+        for section in sections:
+            plan["sections"][section["key"]] = {
+                "key": section["key"],
+                "title": section["title"],
+                "position": section["position"],
+                "content": section["content"],
+                "updated_at": now
+            }
+
+    def _latest_plan(self, user_id: int) -> Optional[Dict[str, Any]]:
+        plans = self._plans_by_user.get(user_id)
+        if not plans:
+            return None
+        return max(plans, key=lambda plan: (plan["created_at"], plan["id"]))
+
+    async def save_career_plan(self, user_id: int, sections: List[Dict[str, Any]]) -> Optional[int]:
+        now = _now()
+        plan = {
+            "id": self._next_id("career_plans"),
+            "user_id": user_id,
+            "version": 1,
+            "plan_content": "",
+            "created_at": now,
+            "updated_at": now,
+            "sections": {}
+        }
+        self._write_plan_sections(plan, sections)
+        self._plans[plan["id"]] = plan
+        self._plans_by_user.setdefault(user_id, []).append(plan)
+        return plan["id"]
+
+    async def save_career_plan_sections(self, plan_id: int, sections: List[Dict[str, Any]]) -> bool:
+        plan = self._plans.get(plan_id)
+        if plan is None:
+            logger.error(f"Kariyer planı bölümü kaydetme hatası: plan bulunamadı ({plan_id})")
+            return False
+        self._write_plan_sections(plan, sections)
+        plan["plan_content"] = ""
+        plan["version"] += 1
+        plan["updated_at"] = _now()
+        return True
+
+    async def get_latest_career_plan(self, user_id: int) -> Optional[Dict[str, Any]]:
+        plan = self._latest_plan(user_id)
+        if plan is None:
+            return None
+        return {
+            "id": plan["id"],
+            "version": plan["version"],
+            "plan_content": plan["plan_content"],
+            "created_at": plan["created_at"],
+            "updated_at": plan["updated_at"],
+            "sections": [
+                dict(section) for section in sorted(plan["sections"].values(), key=lambda s: s["position"])
+            ]
+        }
+
+    async def get_career_plan_version(self, user_id: int) -> Optional[Dict[str, Any]]:
+        plan = self._latest_plan(user_id)
+        if plan is None:
+            return None
+        return {key: plan[key] for key in ("id", "version", "created_at", "updated_at")}
+
+    async def get_career_plan_section(self, user_id: int, section_key: str) -> Optional[Dict[str, Any]]:
+        plan = self._latest_plan(user_id)
+        section = plan["sections"].get(section_key) if plan else None
+        if section is None:
+            return None
+        return {"plan_id": plan["id"], **section}
+
+    # Konuşmalar
+
+    def queue_conversation_message(self, user_id: int, message: str,
+                                   is_user: bool) -> "asyncio.Future[None]":
+        self._messages.setdefault(user_id, []).append({
+            "id": self._next_id("conversations"), "message": message, "is_user": int(is_user), "created_at": _now()
+        })
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+    async def wait_for_pending_writes(self, user_id: int) -> None:
+        return None
+
+    def _recent_messages(self, user_id: int, limit: int,
+                         before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """Mesajlar eklenme sırasıyla tutulur; (created_at, id) sırası eklenme sırasıyla aynıdır"""
+        page = []
+        for message in reversed(self._messages.get(user_id, [])):
+            if before is not None and (message["created_at"], message["id"]) >= tuple(before):
+                continue
+            page.append(dict(message))
+            if len(page) >= limit:
+                break
+        return page
+
+    async def get_chat_context(self, user_id: int, history_limit: int) -> Dict[str, Any]:
+        plan = self._latest_plan(user_id)
+        career_plan = None
+        if plan is not None:
+            sections = sorted(plan["sections"].values(), key=lambda section: section["position"])
+            career_plan = format_plan(sections) if sections else plan["plan_content"] or None
+        summary = self._summaries.get(user_id)
+        return {
+            "career_plan": career_plan,
+            "conversation_summary": (
+                {"summary": summary["summary"], "last_message_id": summary["last_message_id"]}
+                if summary else None
+            ),
+            "conversation_history": self._recent_messages(user_id, history_limit)
+        }
+
+    async def get_conversation_page(self, user_id: int, limit: int,
+                                    before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        return self._recent_messages(user_id, limit, before)
+
+    @staticmethod
+    def _match(terms: List[Tuple[str, bool]], text: str) -> Tuple[List[Any], List[bool]]:
+        """Metnin kelimelerini ve her kelimenin arama kelimelerinden biriyle eşleşip eşleşmediğini döndürür"""
+        tokens = list(_TOKEN_PATTERN.finditer(text))
+        folded = [_fold(token.group()) for token in tokens]
+        matched = [
+            any(word == term or (prefix and word.startswith(term)) for term, prefix in terms)
+            for word in folded
+        ]
+        return tokens, matched
+
+    @staticmethod
+    def _contains_all(terms: List[Tuple[str, bool]], text: str) -> bool:
+        """Arama kelimelerinin hepsi metinde geçiyor mu"""
+        folded = [_fold(word) for word in _TOKEN_PATTERN.findall(text)]
+        return all(
+            any(word == term or (prefix and word.startswith(term)) for word in folded)
+            for term, prefix in terms
+        )
+
+    @staticmethod
+    def _snippet(text: str, tokens: List[Any], matched: List[bool]) -> str:
+        """Eşleşmeleri <mark> ile işaretlenmiş, en fazla _SNIPPET_TOKENS kelimelik parça"""
+        if not tokens:
+            return text
+        first = matched.index(True) if any(matched) else 0
+        start = max(min(first - _SNIPPET_TOKENS // 4, len(tokens) - _SNIPPET_TOKENS), 0)
+        end = min(start + _SNIPPET_TOKENS, len(tokens))
+        parts = ["…"] if start > 0 else []
+        position = tokens[start].start()
+        for index in range(start, end):
+            token = tokens[index]
+            parts.append(text[position:token.start()])
+            parts.append(f"<mark>{token.group()}</mark>" if matched[index] else token.group())
+            position = token.end()
+        parts.append(text[position:] if end == len(tokens) else "…")
+        return "".join(parts)
+
+    async def search_user_content(self, user_id: int, match_terms: str, sources: List[str],
+                                  limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """Kelime eşleştirmeyle arama; puan eşleşen kelime sayısının eksi değeridir (bm25 yerine)"""
+        terms = [(_fold(term), bool(star)) for term, star in _MATCH_TERM_PATTERN.findall(match_terms)]
+        if not terms:
+            return []
+
+        results: List[Dict[str, Any]] = []
+        if "conversations" in sources:
+            for message in self._messages.get(user_id, []):
+                if not self._contains_all(terms, message["message"]):
+                    continue
+                tokens, matched = self._match(terms, message["message"])
+                results.append({
+                    "source": "conversation", "id": message["id"], "section_key": None,
+                    "title": None, "is_user": message["is_user"], "created_at": message["created_at"],
+                    "snippet": self._snippet(message["message"], tokens, matched),
+                    "score": -float(sum(matched))
+                })
+        if "plans" in sources:
+            for plan in self._plans_by_user.get(user_id, []):
+                for section in plan["sections"].values():
+                    if not self._contains_all(terms, f"{section['title']}\n{section['content']}"):
+                        continue
+                    # Başlıktaki eşleşmeler iki kat sayılır; parça içerikten alınır
+                    _, title_matched = self._match(terms, section["title"])
+                    tokens, matched = self._match(terms, section["content"])
+                    results.append({
+                        "source": "plan", "id": plan["id"], "section_key": section["key"],
+                        "title": section["title"], "is_user": None, "created_at": plan["created_at"],
+                        "snippet": self._snippet(section["content"], tokens, matched),
+                        "score": -float(2 * sum(title_matched) + sum(matched))
+                    })
+
+        results.sort(key=lambda result: result["created_at"], reverse=True)
+        results.sort(key=lambda result: result["score"])
+        return results[offset:offset + limit]
+
+    async def get_conversation_summary(self, user_id: int) -> Optional[Dict[str, Any]]:
+        summary = self._summaries.get(user_id)
+        if summary:
+            return {"summary": summary["summary"], "last_message_id": summary["last_message_id"]}
+        return None
+
+    async def save_conversation_summary(self, user_id: int, summary: str, last_message_id: int) -> bool:
+        self._summaries[user_id] = {
+            "summary": summary, "last_message_id": last_message_id, "updated_at": _now()
+        }
+        return True
+
+    async def get_unsummarized_messages(self, user_id: int, after_message_id: int,
+                                        keep_recent: int) -> List[Dict[str, Any]]:
+        messages = self._messages.get(user_id, [])
+        older = messages[:max(len(messages) - keep_recent, 0)]
+        return [
+            {"id": message["id"], "message": message["message"], "is_user": message["is_user"]}
+            for message in older if message["id"] > after_message_id
+        ]
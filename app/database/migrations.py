@@ -0,0 +1,427 @@
+import aiosqlite
+import logging
+from typing import List, NamedTuple, Optional
+
+# Log
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class Migration(NamedTuple):
+    """Sıralı şema değişikliği.
+
+    `report` verilirse ifadelerden sonra aynı işlemde çalıştırılır ve dönen her
+    satır uyarı olarak loglanır (ör. geçişin sildiği veya taşıdığı kayıtlar).
+    """
+    version: int
+    description: str
+    statements: List[str]
+    report: Optional[str] = None
+
+# Şema geçişleri; yeni değişiklikler listenin sonuna yeni sürüm numarasıyla eklenir,
+# uygulanmış geçişler değiştirilmez.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Temel tablolar", [
+        # Kullanıcılar tablosu
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Sorular ve cevaplar tablosu
+        """
+        CREATE TABLE IF NOT EXISTS questionnaire (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            question_number INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            answer TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        # Kariyer planları tablosu
+        """
+        CREATE TABLE IF NOT EXISTS career_plans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            plan_content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        # Konuşma geçmişi tablosu
+        """
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            is_user BOOLEAN NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+    ]),
+    Migration(2, "Bekleyen sorular tablosu", [
+        # Kullanıcıya gösterilen ve henüz cevaplanmamış sorular tablosu
+        """
+        CREATE TABLE IF NOT EXISTS pending_questions (
+            user_id INTEGER NOT NULL,
+            question_number INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            context_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, question_number),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+    ]),
+    Migration(3, "Arka plan işleri tablosu", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            job_type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            progress TEXT,
+            error TEXT,
+            run_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+    ]),
+    Migration(4, "Kullanıcı bazlı sorgular için indeksler ve anket adımı tekilliği", [
+        # Tekillik kısıtından önce yinelenen anket adımları silinir (ilk kayıt kalır).
+        # Silinen satırlar questionnaire_duplicates_backup tablosunda saklanır.
+        """
+        CREATE TABLE IF NOT EXISTS questionnaire_duplicates_backup (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            question_number INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            answer TEXT,
+            created_at TIMESTAMP,
+            removed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        INSERT INTO questionnaire_duplicates_backup (id, user_id, question_number, question, answer, created_at)
+        SELECT id, user_id, question_number, question, answer, created_at
+        FROM questionnaire
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM questionnaire GROUP BY user_id, question_number
+        )
+        """,
+        """
+        DELETE FROM questionnaire
+        WHERE id IN (SELECT id FROM questionnaire_duplicates_backup)
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_questionnaire_user_question
+        ON questionnaire (user_id, question_number)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_career_plans_user_created
+        ON career_plans (user_id, created_at)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_conversations_user_created
+        ON conversations (user_id, created_at)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after
+        ON jobs (status, run_after)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_user_type_status
+        ON jobs (user_id, job_type, status)
+        """,
+    ], report="""
+        SELECT 'Yinelenen anket cevapları silindi (questionnaire_duplicates_backup): kullanıcı '
+               || user_id || ', ' || COUNT(*) || ' satır'
+        FROM questionnaire_duplicates_backup
+        GROUP BY user_id
+        ORDER BY user_id
+    """),
+    Migration(5, "Konuşma özetleri tablosu", [
+        # Eski mesajların kademeli olarak güncellenen özeti
+        """
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            user_id INTEGER PRIMARY KEY,
+            summary TEXT NOT NULL,
+            last_message_id INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+    ]),
+    Migration(6, "Hazır ilk sorular havuzu", [
+        # Yeni kullanıcılara Gemini çağrısı yapmadan gösterilen, önceden oluşturulmuş ilk sorular
+        """
+        CREATE TABLE IF NOT EXISTS first_question_pool (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    Migration(7, "Sohbet yanıtı önbelleği", [
+        # Aynı soru, plan ve son mesajlar için daha önce üretilmiş AI yanıtları
+        """
+        CREATE TABLE IF NOT EXISTS chat_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_chat_response_cache_last_used
+        ON chat_response_cache (last_used_at)
+        """,
+    ]),
+    Migration(8, "Kariyer planı bölümleri tablosu", [
+        # Planlar bölüm bölüm saklanır; career_plans.plan_content yalnızca eski planlar için dolu kalır
+        """
+        CREATE TABLE IF NOT EXISTS career_plan_sections (
+            plan_id INTEGER NOT NULL,
+            section_key TEXT NOT NULL,
+            title TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (plan_id, section_key),
+            FOREIGN KEY (plan_id) REFERENCES career_plans (id)
+        )
+        """,
+    ]),
+    Migration(9, "Kariyer planı sürümü ve güncelleme zamanı", [
+        # ETag ve Last-Modified için; bir bölüm yeniden oluşturulduğunda sürüm artar
+        "ALTER TABLE career_plans ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE career_plans ADD COLUMN updated_at TIMESTAMP",
+        "UPDATE career_plans SET updated_at = created_at",
+    ]),
+    Migration(10, "Sohbet ve kariyer planı tam metin arama (FTS5) dizinleri", [
+        # Sohbet dizini içerik tutmaz, metni conversations tablosundan okur. Aramanın
+        # kullanıcıyla sınırlanması için kullanıcı "u<id>" belirteciyle dizinlenir.
+        """
+        CREATE VIEW IF NOT EXISTS conversations_search_source AS 
+        SELECT id, 'u' || user_id AS user_key, message FROM conversations
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+            user_key, message,
+            content = 'conversations_search_source', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+            INSERT INTO conversations_fts (rowid, user_key, message) 
+            VALUES (new.id, 'u' || new.user_id, new.message);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, user_key, message) 
+            VALUES ('delete', old.id, 'u' || old.user_id, old.message);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF user_id, message ON conversations BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, user_key, message) 
+            VALUES ('delete', old.id, 'u' || old.user_id, old.message);
+            INSERT INTO conversations_fts (rowid, user_key, message) 
+            VALUES (new.id, 'u' || new.user_id, new.message);
+        END
+        """,
+        "INSERT INTO conversations_fts (conversations_fts) VALUES ('rebuild')",
+        # Plan dizini bölüm metinlerinin kopyasını tutar. Satır ID'si plan_id * 100 + bölüm
+        # sırasıdır; bölümlenmemiş eski planların metni plan_id * 100 + 99 satırındadır.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS career_plans_fts USING fts5(
+            user_key, plan_id UNINDEXED, section_key UNINDEXED, title, content,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS career_plan_sections_fts_insert AFTER INSERT ON career_plan_sections BEGIN
+            INSERT INTO career_plans_fts (rowid, user_key, plan_id, section_key, title, content) 
+            SELECT new.plan_id * 100 + new.position, 'u' || user_id, new.plan_id, 
+                   new.section_key, new.title, new.content 
+            FROM career_plans WHERE id = new.plan_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS career_plan_sections_fts_delete AFTER DELETE ON career_plan_sections BEGIN
+            DELETE FROM career_plans_fts WHERE rowid = old.plan_id * 100 + old.position;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS career_plan_sections_fts_update AFTER UPDATE ON career_plan_sections BEGIN
+            DELETE FROM career_plans_fts WHERE rowid = old.plan_id * 100 + old.position;
+            INSERT INTO career_plans_fts (rowid, user_key, plan_id, section_key, title, content) 
+            SELECT new.plan_id * 100 + new.position, 'u' || user_id, new.plan_id, 
+                   new.section_key, new.title, new.content 
+            FROM career_plans WHERE id = new.plan_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS career_plans_fts_insert AFTER INSERT ON career_plans 
+        WHEN new.plan_content != '' BEGIN
+            INSERT INTO career_plans_fts (rowid, user_key, plan_id, section_key, title, content) 
+            VALUES (new.id * 100 + 99, 'u' || new.user_id, new.id, NULL, '', new.plan_content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS career_plans_fts_update AFTER UPDATE OF plan_content ON career_plans 
+        WHEN old.plan_content != new.plan_content BEGIN
+            DELETE FROM career_plans_fts WHERE rowid = old.id * 100 + 99;
+            INSERT INTO career_plans_fts (rowid, user_key, plan_id, section_key, title, content) 
+            SELECT new.id * 100 + 99, 'u' || new.user_id, new.id, NULL, '', new.plan_content 
+            WHERE new.plan_content != '';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS career_plans_fts_delete AFTER DELETE ON career_plans BEGIN
+            DELETE FROM career_plans_fts WHERE rowid BETWEEN old.id * 100 AND old.id * 100 + 99;
+        END
+        """,
+        """
+        INSERT INTO career_plans_fts (rowid, user_key, plan_id, section_key, title, content) 
+        SELECT s.plan_id * 100 + s.position, 'u' || p.user_id, s.plan_id, s.section_key, s.title, s.content 
+        FROM career_plan_sections AS s JOIN career_plans AS p ON p.id = s.plan_id
+        """,
+        """
+        INSERT INTO career_plans_fts (rowid, user_key, plan_id, section_key, title, content) 
+        SELECT id * 100 + 99, 'u' || user_id, id, NULL, '', plan_content 
+        FROM career_plans WHERE plan_content != ''
+        """,
+    ]),
+    Migration(11, "Idempotency anahtarları tablosu", [
+        # Tekrarlanan isteklerin (Idempotency-Key başlığı) ilk yanıtı; süresi dolunca silinir
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id INTEGER NOT NULL,
+            idempotency_key TEXT NOT NULL,
+            request_hash TEXT NOT NULL,
+            status_code INTEGER NOT NULL,
+            response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, idempotency_key),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created
+        ON idempotency_keys (created_at)
+        """,
+    ]),
+    Migration(12, "Toplu plan yenileme çalıştırmaları ve hataları", [
+        # Çevrimdışı plan yenileme aracının kaldığı yer; planlarla aynı işlemde güncellenir
+        """
+        CREATE TABLE IF NOT EXISTS plan_backfill_runs (
+            run_id TEXT PRIMARY KEY,
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS plan_backfill_failures (
+            run_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            error TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (run_id, user_id),
+            FOREIGN KEY (run_id) REFERENCES plan_backfill_runs (run_id)
+        )
+        """,
+    ]),
+    Migration(13, "Günlük Gemini kullanım özeti", [
+        # Gün, kullanıcı ve işlem başına tek satır; kullanıcısız çağrılar user_id = 0 ile saklanır
+        """
+        CREATE TABLE IF NOT EXISTS llm_usage_daily (
+            day TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            operation TEXT NOT NULL,
+            calls INTEGER NOT NULL DEFAULT 0,
+            prompt_tokens INTEGER NOT NULL DEFAULT 0,
+            output_tokens INTEGER NOT NULL DEFAULT 0,
+            latency_ms INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, user_id, operation)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_llm_usage_daily_user_day
+        ON llm_usage_daily (user_id, day)
+        """,
+    ]),
+    Migration(14, "Idempotency anahtarı ayırma durumu", [
+        # Anahtar işlemden önce ayrılır (completed_at boş); yanıt saklanınca completed_at doldurulur
+        """
+        ALTER TABLE idempotency_keys ADD COLUMN completed_at TIMESTAMP
+        """,
+        """
+        UPDATE idempotency_keys SET completed_at = created_at
+        """,
+    ]),
+]
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    """Veritabanına uygulanmış son şema sürümünü döndürür"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    async with db.execute("SELECT MAX(version) FROM schema_version") as cursor:
+        result = await cursor.fetchone()
+        return result[0] or 0
+
+async def run_migrations(db: aiosqlite.Connection, target_version: Optional[int] = None) -> int:
+    """Uygulanmamış geçişleri sırayla çalıştırır ve son şema sürümünü döndürür.
+
+    Her geçiş kendi işlemi (transaction) içinde uygulanır; hata olursa o geçiş
+    geri alınır ve sonraki geçişler çalıştırılmaz.
+    """
+    current_version = await get_schema_version(db)
+    await db.commit()
+
+    for migration in MIGRATIONS:
+        if migration.version <= current_version:
+            continue
+        if target_version is not None and migration.version > target_version:
+            break
+        try:
+            await db.execute("BEGIN")
+            for statement in migration.statements:
+                await db.execute(statement)
+            if migration.report:
+                async with db.execute(migration.report) as cursor:
+                    async for row in cursor:
+                        logger.warning(f"Şema geçişi {migration.version}: {row[0]}")
+            await db.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (migration.version, migration.description)
+            )
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Şema geçişi başarısız: {migration.version} ({e})")
+            raise
+        current_version = migration.version
+        logger.info(f"Şema geçişi uygulandı: {migration.version} - {migration.description}")
+
+    return current_version
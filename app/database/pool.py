@@ -0,0 +1,113 @@
+import aiosqlite
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+# Log
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ConnectionPool:
+    """Uygulama ömrü boyunca açık kalan SQLite bağlantılarını yönetir.
+
+    Tek bir yazma bağlantısı (SQLite aynı anda tek yazıcıya izin verir) ve
+    WAL modu sayesinde yazıcıyı beklemeden çalışan okuma bağlantıları içerir.
+    """
+
+    def __init__(self, database: str, read_pool_size: int = 4, statement_cache_size: int = 256,
+                 busy_timeout: float = 5.0):
+        self.database = database
+        self.read_pool_size = read_pool_size
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout = busy_timeout
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._all_readers: List[aiosqlite.Connection] = []
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Ayarları uygulanmış yeni bir bağlantı açar"""
+        # cached_statements: sqlite3'ün hazırlanmış ifade önbelleği
+        db = await aiosqlite.connect(
+            self.database,
+            timeout=self.busy_timeout,
+            cached_statements=self.statement_cache_size,
+            uri=self.database.startswith("file:")
+        )
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA synchronous=NORMAL")
+        if "cache=shared" in self.database:
+            # Paylaşımlı bellek içi veritabanında WAL yoktur; okuyucular yazıcının tablo kilidini beklemez
+            await db.execute("PRAGMA read_uncommitted=1")
+        return db
+
+    async def open(self) -> None:
+        """Yazma ve okuma bağlantılarını açar"""
+        self._writer = await self._connect()
+        for _ in range(self.read_pool_size):
+            reader = await self._connect()
+            self._all_readers.append(reader)
+            self._readers.put_nowait(reader)
+        logger.info(
+            f"Veritabanı bağlantı havuzu açıldı ({self.database}, {self.read_pool_size} okuyucu)"
+        )
+
+    async def close(self) -> None:
+        """Tüm bağlantıları kapatır"""
+        async with self._write_lock:
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+        for reader in self._all_readers:
+            await reader.close()
+        self._all_readers.clear()
+        self._readers = asyncio.Queue()
+        logger.info("Veritabanı bağlantı havuzu kapatıldı")
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Havuzdan bir okuma bağlantısı ödünç verir"""
+        db = await self._readers.get()
+        try:
+            yield db
+        finally:
+            self._readers.put_nowait(db)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Yazma bağlantısını kilitleyerek verir; hata durumunda işlem geri alınır"""
+        async with self._write_lock:
+            if self._writer is None:
+                raise RuntimeError("Veritabanı bağlantı havuzu açık değil")
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+_pool: Optional[ConnectionPool] = None
+
+async def open_pool(database: str, read_pool_size: int = 4, statement_cache_size: int = 256,
+                    busy_timeout: float = 5.0) -> ConnectionPool:
+    """Uygulama genelinde kullanılan bağlantı havuzunu açar"""
+    global _pool
+    if _pool is None:
+        pool = ConnectionPool(database, read_pool_size, statement_cache_size, busy_timeout)
+        await pool.open()
+        _pool = pool
+    return _pool
+
+async def close_pool() -> None:
+    """Bağlantı havuzunu kapatır"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def get_pool() -> ConnectionPool:
+    """Açık bağlantı havuzunu döndürür"""
+    if _pool is None:
+        raise RuntimeError("Veritabanı bağlantı havuzu açık değil")
+    return _pool
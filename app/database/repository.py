@@ -0,0 +1,125 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+class Repository(ABC):
+    """Kullanıcı, anket, kariyer planı ve konuşma verilerinin saklandığı depo arayüzü.
+
+    `app/database/database.py` içindeki işlevler etkin depoya yönlendirilir;
+    depo `Settings.DATABASE_URL` ile seçilir (`sqlite+aiosqlite:///...` veya
+    `memory://`). Uygulamalar aynı dönüş biçimlerini ve hata davranışını
+    korumalıdır: okuma işlevleri kullanıcının bekleyen yazmalarını görür
+    (read-your-writes), zaman damgaları "YYYY-MM-DD HH:MM:SS" (UTC) metnidir.
+    Arama puanı ve başarısız eklemelerden sonraki ID değerleri farklı olabilir
+    (bkz. tests/test_repository_parity.py).
+
+    Arayüz yalnızca yukarıdaki verileri kapsar. İşler, önbellekler, idempotency
+    anahtarları, kullanım özetleri, ilk sorular havuzu ve toplu plan yenileme
+    tabloları her iki depoda da bağlantı havuzundaki SQLite veritabanında kalır.
+    """
+
+    # Kullanıcılar
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """E-posta adresine göre kullanıcıyı getirir"""
+
+    @abstractmethod
+    async def create_user(self, email: str) -> Optional[int]:
+        """Yeni bir kullanıcı oluşturur ve kullanıcı ID'sini döndürür"""
+
+    @abstractmethod
+    async def upsert_user(self, email: str) -> Optional[int]:
+        """Kullanıcıyı oluşturur veya mevcut kullanıcının ID'sini döndürür"""
+
+    # Anket
+
+    @abstractmethod
+    async def save_question_answer(self, user_id: int, question_number: int,
+                                   question: str, answer: str) -> bool:
+        """Soru ve cevabın kaydedilmesi; soru zaten cevaplanmışsa False, diğer hatalar çağırana iletilir"""
+
+    @abstractmethod
+    async def save_question_answers(self, user_id: int, answers: List[Dict[str, Any]]) -> int:
+        """Birden fazla soru-cevabın tek işlemde kaydedilmesi; biri zaten cevaplanmışsa hiçbiri kaydedilmez ve 0 döner"""
+
+    @abstractmethod
+    async def get_user_answers(self, user_id: int) -> List[Dict[str, Any]]:
+        """Kullanıcının tüm cevaplarının soru sırasıyla alınması"""
+
+    @abstractmethod
+    async def get_user_answers_version(self, user_id: int) -> Dict[str, Any]:
+        """Kullanıcının cevap sayısı (count), son cevap ID'si (last_id) ve son cevap zamanı (updated_at)"""
+
+    @abstractmethod
+    async def get_pending_question(self, user_id: int, question_number: int) -> Optional[Dict[str, Any]]:
+        """Kullanıcı için hazırlanmış bekleyen sorunun (question, context_hash) alınması"""
+
+    @abstractmethod
+    async def save_pending_question(self, user_id: int, question_number: int, question: str,
+                                    context_hash: str) -> Optional[str]:
+        """Bekleyen sorunun kaydedilmesi; aynı bağlam için kaydedilmiş soru varsa o döndürülür"""
+
+    @abstractmethod
+    async def delete_pending_question(self, user_id: int, question_number: int) -> bool:
+        """Cevaplanan sorunun bekleyen sorulardan silinmesi"""
+
+    # Kariyer planları
+
+    @abstractmethod
+    async def save_career_plan(self, user_id: int, sections: List[Dict[str, Any]]) -> Optional[int]:
+        """Kariyer planının bölümleriyle birlikte kaydedilmesi; plan ID'sini döndürür"""
+
+    @abstractmethod
+    async def save_career_plan_sections(self, plan_id: int, sections: List[Dict[str, Any]]) -> bool:
+        """Planın verilen bölümlerinin güncellenmesi; planın sürümü artırılır ve plan_content temizlenir"""
+
+    @abstractmethod
+    async def get_latest_career_plan(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Son plan: id, version, plan_content, created_at, updated_at ve sıralı bölümler (sections)"""
+
+    @abstractmethod
+    async def get_career_plan_version(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Son planın id, version, created_at ve updated_at değerleri"""
+
+    @abstractmethod
+    async def get_career_plan_section(self, user_id: int, section_key: str) -> Optional[Dict[str, Any]]:
+        """Son planın tek bir bölümü (plan_id, key, title, position, content, updated_at)"""
+
+    # Konuşmalar
+
+    @abstractmethod
+    def queue_conversation_message(self, user_id: int, message: str,
+                                   is_user: bool) -> "asyncio.Future[None]":
+        """Konuşma mesajını kaydeder; mesaj kalıcı olduğunda None ile tamamlanan Future döndürür"""
+
+    @abstractmethod
+    async def wait_for_pending_writes(self, user_id: int) -> None:
+        """Kullanıcının bekleyen yazmaları kalıcı olana kadar bekler"""
+
+    @abstractmethod
+    async def get_chat_context(self, user_id: int, history_limit: int) -> Dict[str, Any]:
+        """Plan metni (career_plan), konuşma özeti ve yeniden eskiye son mesajlar; bekleyen yazmaları beklemez"""
+
+    @abstractmethod
+    async def get_conversation_page(self, user_id: int, limit: int,
+                                    before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """(created_at, id) imlecinden önceki mesajların yeniden eskiye alınması"""
+
+    @abstractmethod
+    async def search_user_content(self, user_id: int, match_terms: str, sources: List[str],
+                                  limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """Kullanıcının sohbetlerinde ve planlarında alaka sırasına göre (küçük puan önce) arama"""
+
+    @abstractmethod
+    async def get_conversation_summary(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Kullanıcının konuşma özeti (summary, last_message_id)"""
+
+    @abstractmethod
+    async def save_conversation_summary(self, user_id: int, summary: str, last_message_id: int) -> bool:
+        """Konuşma özetinin kaydedilmesi"""
+
+    @abstractmethod
+    async def get_unsummarized_messages(self, user_id: int, after_message_id: int,
+                                        keep_recent: int) -> List[Dict[str, Any]]:
+        """Özete eklenmemiş, son `keep_recent` mesajdan eski mesajlar (eskiden yeniye)"""
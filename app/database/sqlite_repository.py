@@ -0,0 +1,597 @@
+import asyncio
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+from app.database.pool import ConnectionPool
+from app.database.repository import Repository
+from app.database.write_buffer import WriteBuffer
+from app.services.plan_sections import format_plan
+
+# Log
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def _write_plan_sections(db: Any, plan_id: int, sections: List[Dict[str, Any]]) -> None:
+    """Plan bölümlerini ekler veya günceller (çağıran commit eder)"""
+    await db.executemany(
+        """
+        INSERT INTO career_plan_sections (plan_id, section_key, title, position, content) 
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (plan_id, section_key) DO UPDATE SET 
+            title = excluded.title,
+            position = excluded.position,
+            content = excluded.content,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        [
+            (plan_id, section["key"], section["title"], section["position"], section["content"])
+            for section in sections
+        ]
+    )
+
+# Arama kaynakları: dizin sorgusu (eşleşme ifadesi sonradan eklenir)
+_SEARCH_QUERIES: Dict[str, str] = {
+    "conversations": """
+        SELECT 'conversation' AS source, c.id AS id, NULL AS section_key, NULL AS title, 
+               c.is_user AS is_user, c.created_at AS created_at, 
+               snippet(conversations_fts, 1, '<mark>', '</mark>', '…', 16) AS snippet, 
+               bm25(conversations_fts, 0.0, 1.0) AS score 
+        FROM conversations_fts 
+        JOIN conversations AS c ON c.id = conversations_fts.rowid 
+        WHERE conversations_fts MATCH ?
+    """,
+    "plans": """
+        SELECT 'plan' AS source, p.id AS id, f.section_key AS section_key, f.title AS title, 
+               NULL AS is_user, p.created_at AS created_at, 
+               snippet(career_plans_fts, 4, '<mark>', '</mark>', '…', 16) AS snippet, 
+               bm25(career_plans_fts, 0.0, 0.0, 0.0, 2.0, 1.0) AS score 
+        FROM career_plans_fts AS f 
+        JOIN career_plans AS p ON p.id = f.plan_id 
+        WHERE career_plans_fts MATCH ?
+    """,
+}
+
+class SQLiteRepository(Repository):
+    """SQLite deposu: bağlantı havuzu üzerinden okur, yazma tamponuyla toplu yazar"""
+
+    def __init__(self, pool: ConnectionPool, write_buffer: WriteBuffer):
+        self.pool = pool
+        self.write_buffer = write_buffer
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """E-posta adresine göre kullanıcıyı getirir"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    "SELECT * FROM users WHERE email = ?", (email,)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                    if result:
+                        return dict(result)
+                    return None
+        except Exception as e:
+            logger.error(f"Kullanıcı alma hatası: {e}")
+            return None
+
+    async def create_user(self, email: str) -> Optional[int]:
+        """Yeni bir kullanıcı oluşturur ve kullanıcı ID'sini döndürür"""
+        try:
+            async with self.pool.writer() as db:
+                cursor = await db.execute(
+                    "INSERT INTO users (email) VALUES (?)", (email,)
+                )
+                await db.commit()
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"Kullanıcı oluşturma hatası: {e}")
+            return None
+
+    async def upsert_user(self, email: str) -> Optional[int]:
+        """Kullanıcıyı tek sorguda oluşturur veya mevcut kullanıcının ID'sini döndürür"""
+        try:
+            async with self.pool.writer() as db:
+                async with db.execute(
+                    """
+                    INSERT INTO users (email) VALUES (?) 
+                    ON CONFLICT (email) DO UPDATE SET email = excluded.email 
+                    RETURNING id
+                    """,
+                    (email,)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                await db.commit()
+                return result["id"] if result else None
+        except Exception as e:
+            logger.error(f"Kullanıcı oluşturma hatası: {e}")
+            return None
+
+    async def save_question_answer(self, user_id: int, question_number: int, question: str, answer: str) -> bool:
+        """Soru ve cevabın kaydedilmesi; soru numarası zaten cevaplanmışsa False, diğer hatalar çağırana iletilir"""
+        try:
+            # Yazma tamponu üzerinden diğer yazmalarla aynı işlemde commit edilir
+            await self.write_buffer.execute(
+                """
+                INSERT INTO questionnaire (user_id, question_number, question, answer) 
+                VALUES (?, ?, ?, ?)
+                """,
+                (user_id, question_number, question, answer),
+                user_id=user_id
+            )
+            return True
+        except sqlite3.IntegrityError as e:
+            # Soru numarası eşzamanlı bir istekle zaten cevaplanmış
+            logger.warning(f"Soru-cevap kaydedilmedi, cevap zaten var: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Soru-cevap kaydetme hatası: {e}")
+            raise
+
+    async def save_question_answers(self, user_id: int, answers: List[Dict[str, Any]]) -> int:
+        """Birden fazla soru-cevabın tek işlemde (transaction) kaydedilmesi.
+
+        Cevaplananların bekleyen soruları da aynı işlemde silinir. Cevaplardan biri
+        kaydedilemezse (ör. aynı soru numarası zaten cevaplanmışsa) hiçbiri
+        kaydedilmez: aynı soru numarası zaten cevaplanmışsa 0 döndürülür, diğer
+        hatalar çağırana iletilir. Kaydedilen cevap sayısını döndürür.
+        """
+        try:
+            await self.write_buffer.barrier(user_id)
+            async with self.pool.writer() as db:
+                await db.executemany(
+                    """
+                    INSERT INTO questionnaire (user_id, question_number, question, answer) 
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    [(user_id, qa["question_number"], qa["question"], qa["answer"]) for qa in answers]
+                )
+                await db.executemany(
+                    "DELETE FROM pending_questions WHERE user_id = ? AND question_number = ?",
+                    [(user_id, qa["question_number"]) for qa in answers]
+                )
+                await db.commit()
+                return len(answers)
+        except sqlite3.IntegrityError as e:
+            # Soru numaralarından biri eşzamanlı bir istekle zaten cevaplanmış
+            logger.warning(f"Toplu soru-cevap kaydedilmedi, cevap zaten var: {e}")
+            return 0
+        except Exception as e:
+            logger.error(f"Toplu soru-cevap kaydetme hatası: {e}")
+            raise
+
+    async def get_user_answers(self, user_id: int) -> List[Dict[str, Any]]:
+        """Kullanıcının tüm cevaplarının alınması"""
+        try:
+            await self.write_buffer.barrier(user_id)
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT question_number, question, answer 
+                    FROM questionnaire 
+                    WHERE user_id = ? 
+                    ORDER BY question_number
+                    """,
+                    (user_id,)
+                ) as cursor:
+                    results = await cursor.fetchall()
+                    return [dict(row) for row in results]
+        except Exception as e:
+            logger.error(f"Kullanıcı cevaplarını alma hatası: {e}")
+            return []
+
+    async def get_user_answers_version(self, user_id: int) -> Dict[str, Any]:
+        """Kullanıcının cevap sayısı, son cevap ID'si ve son cevap zamanının alınması (koşullu istekler için)"""
+        try:
+            await self.write_buffer.barrier(user_id)
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT COUNT(*) AS count, COALESCE(MAX(id), 0) AS last_id, MAX(created_at) AS updated_at 
+                    FROM questionnaire 
+                    WHERE user_id = ?
+                    """,
+                    (user_id,)
+                ) as cursor:
+                    return dict(await cursor.fetchone())
+        except Exception as e:
+            logger.error(f"Cevap sürümü alma hatası: {e}")
+            raise
+
+    async def get_pending_question(self, user_id: int, question_number: int) -> Optional[Dict[str, Any]]:
+        """Kullanıcı için hazırlanmış bekleyen sorunun alınması"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT question, context_hash 
+                    FROM pending_questions 
+                    WHERE user_id = ? AND question_number = ?
+                    """,
+                    (user_id, question_number)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                    if result:
+                        return dict(result)
+                    return None
+        except Exception as e:
+            logger.error(f"Bekleyen soru alma hatası: {e}")
+            return None
+
+    async def save_pending_question(self, user_id: int, question_number: int, question: str, 
+                                    context_hash: str) -> Optional[str]:
+        """Bekleyen sorunun kaydedilmesi; aynı bağlam için daha önce kaydedilmiş soru varsa o döndürülür"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute(
+                    """
+                    INSERT INTO pending_questions (user_id, question_number, question, context_hash) 
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_id, question_number) DO UPDATE SET 
+                        question = excluded.question,
+                        context_hash = excluded.context_hash,
+                        created_at = CURRENT_TIMESTAMP
+                    WHERE pending_questions.context_hash != excluded.context_hash
+                    """,
+                    (user_id, question_number, question, context_hash)
+                )
+                await db.commit()
+                async with db.execute(
+                    "SELECT question FROM pending_questions WHERE user_id = ? AND question_number = ?",
+                    (user_id, question_number)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                    return result["question"] if result else None
+        except Exception as e:
+            logger.error(f"Bekleyen soru kaydetme hatası: {e}")
+            return None
+
+    async def delete_pending_question(self, user_id: int, question_number: int) -> bool:
+        """Cevaplanan sorunun bekleyen sorulardan silinmesi"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute(
+                    "DELETE FROM pending_questions WHERE user_id = ? AND question_number = ?",
+                    (user_id, question_number)
+                )
+                await db.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Bekleyen soru silme hatası: {e}")
+            return False
+
+    async def save_career_plan(self, user_id: int, sections: List[Dict[str, Any]]) -> Optional[int]:
+        """Kariyer planının bölümleriyle birlikte tek işlemde kaydedilmesi; plan ID'sini döndürür"""
+        try:
+            async with self.pool.writer() as db:
+                cursor = await db.execute(
+                    "INSERT INTO career_plans (user_id, plan_content, updated_at) VALUES (?, '', CURRENT_TIMESTAMP)",
+                    (user_id,)
+                )
+                plan_id = cursor.lastrowid
+                await _write_plan_sections(db, plan_id, sections)
+                await db.commit()
+                return plan_id
+        except Exception as e:
+            logger.error(f"Kariyer planı kaydetme hatası: {e}")
+            return None
+
+    async def save_career_plan_sections(self, plan_id: int, sections: List[Dict[str, Any]]) -> bool:
+        """Planın verilen bölümlerinin güncellenmesi; planın sürümü artırılır.
+
+        Bölümleri olmayan eski planlarda tüm bölümler verilir; plan metni bölümlere
+        taşındığı için plan_content temizlenir. Plan yoksa hiçbir şey yazılmaz ve
+        False döndürülür.
+        """
+        try:
+            async with self.pool.writer() as db:
+                cursor = await db.execute(
+                    """
+                    UPDATE career_plans 
+                    SET plan_content = '', version = version + 1, updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = ?
+                    """,
+                    (plan_id,)
+                )
+                if cursor.rowcount == 0:
+                    await db.rollback()
+                    logger.error(f"Kariyer planı bölümü kaydetme hatası: plan bulunamadı ({plan_id})")
+                    return False
+                await _write_plan_sections(db, plan_id, sections)
+                await db.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Kariyer planı bölümü kaydetme hatası: {e}")
+            return False
+
+    async def get_latest_career_plan(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Kullanıcının son kariyer planının bölümleriyle birlikte tek sorguda alınması.
+
+        Dönen sözlükte id, version, plan_content (yalnızca eski planlarda dolu),
+        created_at, updated_at ve sıralı bölümler (sections) bulunur.
+        """
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT p.id, p.version, p.plan_content, p.created_at, p.updated_at AS plan_updated_at, 
+                           s.section_key, s.title, s.position, s.content, s.updated_at 
+                    FROM (
+                        SELECT id, version, plan_content, created_at, 
+                               COALESCE(updated_at, created_at) AS updated_at 
+                        FROM career_plans 
+                        WHERE user_id = ? 
+                        ORDER BY created_at DESC, id DESC LIMIT 1
+                    ) AS p 
+                    LEFT JOIN career_plan_sections AS s ON s.plan_id = p.id 
+                    ORDER BY s.position
+                    """,
+                    (user_id,)
+                ) as cursor:
+                    results = await cursor.fetchall()
+                    if not results:
+                        return None
+                    first = results[0]
+                    return {
+                        "id": first["id"],
+                        "version": first["version"],
+                        "plan_content": first["plan_content"],
+                        "created_at": first["created_at"],
+                        "updated_at": first["plan_updated_at"],
+                        "sections": [
+                            {
+                                "key": row["section_key"],
+                                "title": row["title"],
+                                "position": row["position"],
+                                "content": row["content"],
+                                "updated_at": row["updated_at"]
+                            }
+                            for row in results if row["section_key"] is not None
+                        ]
+                    }
+        except Exception as e:
+            logger.error(f"Kariyer planı alma hatası: {e}")
+            return None
+
+    async def get_career_plan_version(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Son planın yalnızca kimlik, sürüm ve güncelleme zamanının alınması (koşullu istekler için)"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT id, version, created_at, COALESCE(updated_at, created_at) AS updated_at 
+                    FROM career_plans 
+                    WHERE user_id = ? 
+                    ORDER BY created_at DESC, id DESC LIMIT 1
+                    """,
+                    (user_id,)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                    return dict(result) if result else None
+        except Exception as e:
+            logger.error(f"Kariyer planı sürümü alma hatası: {e}")
+            return None
+
+    async def get_career_plan_section(self, user_id: int, section_key: str) -> Optional[Dict[str, Any]]:
+        """Kullanıcının son kariyer planının tek bir bölümünün alınması"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT s.plan_id, s.section_key AS key, s.title, s.position, s.content, s.updated_at 
+                    FROM career_plan_sections AS s 
+                    WHERE s.section_key = ? AND s.plan_id = (
+                        SELECT id FROM career_plans 
+                        WHERE user_id = ? 
+                        ORDER BY created_at DESC, id DESC LIMIT 1
+                    )
+                    """,
+                    (section_key, user_id)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                    return dict(result) if result else None
+        except Exception as e:
+            logger.error(f"Kariyer planı bölümü alma hatası: {e}")
+            return None
+
+    def queue_conversation_message(self, user_id: int, message: str, is_user: bool) -> "asyncio.Future[None]":
+        """Konuşma mesajını yazma tamponuna ekler ve commit edilmesini beklemeden döndürür.
+
+        Dönen Future mesaj commit edildiğinde None ile tamamlanır. Kullanıcının geçmişini
+        okuyan sorgular bekleyen yazmaları beklediği için sonraki okumalar mesajı görür.
+        """
+        return self.write_buffer.submit(
+            "INSERT INTO conversations (user_id, message, is_user) VALUES (?, ?, ?)",
+            (user_id, message, is_user),
+            user_id=user_id
+        )
+
+    async def wait_for_pending_writes(self, user_id: int) -> None:
+        """Kullanıcının yazma tamponunda bekleyen yazmaları commit edilene kadar bekler"""
+        await self.write_buffer.barrier(user_id)
+
+    async def get_chat_context(self, user_id: int, history_limit: int) -> Dict[str, Any]:
+        """Sohbet promptu için planı, konuşma özetini ve son mesajları tek sorguda alır.
+
+        Kullanıcının bekleyen yazmalarını beklemez; gerekiyorsa çağıran önce
+        wait_for_pending_writes çağırır. Dönen sözlükte career_plan (metin),
+        conversation_summary ve yeniden eskiye sıralı conversation_history bulunur.
+        """
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT 'plan' AS kind, p.id AS id, COALESCE(s.content, p.plan_content) AS text, 
+                           s.title AS title, s.position AS position, NULL AS is_user, NULL AS created_at 
+                    FROM (
+                        SELECT id, plan_content FROM career_plans 
+                        WHERE user_id = ? 
+                        ORDER BY created_at DESC, id DESC LIMIT 1
+                    ) AS p 
+                    LEFT JOIN career_plan_sections AS s ON s.plan_id = p.id 
+                    UNION ALL 
+                    SELECT 'summary', last_message_id, summary, NULL, NULL, NULL, NULL 
+                    FROM conversation_summaries WHERE user_id = ? 
+                    UNION ALL 
+                    SELECT * FROM (
+                        SELECT 'message', id, message, NULL, NULL, is_user, created_at 
+                        FROM conversations 
+                        WHERE user_id = ? 
+                        ORDER BY created_at DESC, id DESC 
+                        LIMIT ?
+                    )
+                    """,
+                    (user_id, user_id, user_id, history_limit)
+                ) as cursor:
+                    results = await cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Sohbet bağlamı alma hatası: {e}")
+            raise
+
+        sections: List[Dict[str, Any]] = []
+        legacy_plan: Optional[str] = None
+        summary: Optional[Dict[str, Any]] = None
+        history: List[Dict[str, Any]] = []
+        for row in results:
+            if row["kind"] == "plan":
+                if row["title"] is not None:
+                    sections.append({"title": row["title"], "position": row["position"], "content": row["text"]})
+                else:
+                    legacy_plan = row["text"] or None
+            elif row["kind"] == "summary":
+                summary = {"summary": row["text"], "last_message_id": row["id"]}
+            else:
+                history.append({
+                    "id": row["id"], "message": row["text"],
+                    "is_user": row["is_user"], "created_at": row["created_at"]
+                })
+
+        sections.sort(key=lambda section: section["position"])
+        history.sort(key=lambda message: (message["created_at"], message["id"]), reverse=True)
+        return {
+            "career_plan": format_plan(sections) if sections else legacy_plan,
+            "conversation_summary": summary,
+            "conversation_history": history
+        }
+
+    async def get_conversation_page(self, user_id: int, limit: int, 
+                                    before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """Konuşma geçmişinin (created_at, id) imlecinden önceki sayfasının yeniden eskiye alınması.
+
+        İmleç, önceki sayfanın son mesajının (created_at, id) değeridir; sorgu
+        (user_id, created_at) indeksinde doğrudan o noktadan başladığı için sayfa
+        maliyeti konuşmanın uzunluğuna bağlı değildir.
+        """
+        try:
+            await self.write_buffer.barrier(user_id)
+            async with self.pool.reader() as db:
+                if before is None:
+                    query = """
+                        SELECT id, message, is_user, created_at 
+                        FROM conversations 
+                        WHERE user_id = ? 
+                        ORDER BY created_at DESC, id DESC 
+                        LIMIT ?
+                    """
+                    params: Tuple[Any, ...] = (user_id, limit)
+                else:
+                    query = """
+                        SELECT id, message, is_user, created_at 
+                        FROM conversations 
+                        WHERE user_id = ? AND (created_at, id) < (?, ?) 
+                        ORDER BY created_at DESC, id DESC 
+                        LIMIT ?
+                    """
+                    params = (user_id, before[0], before[1], limit)
+                async with db.execute(query, params) as cursor:
+                    results = await cursor.fetchall()
+                    return [dict(row) for row in results]
+        except Exception as e:
+            logger.error(f"Konuşma geçmişi sayfası alma hatası: {e}")
+            raise
+
+    async def search_user_content(self, user_id: int, match_terms: str, sources: List[str], 
+                                  limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """Kullanıcının sohbetlerinde ve planlarında FTS5 ile alaka sırasına göre arama yapılması.
+
+        match_terms FTS5 sorgu ifadesidir (ör. '"python" "veri"*'). Her dizinde arama
+        kullanıcının "u<id>" belirteciyle sınırlandığı için yalnızca o kullanıcının
+        kayıtları taranır; farklı kaynakların sonuçları bm25 puanına göre birleştirilir.
+        """
+        try:
+            await self.write_buffer.barrier(user_id)
+            selects = []
+            params: List[Any] = []
+            for source in sources:
+                text_columns = "message" if source == "conversations" else "{title content}"
+                selects.append(_SEARCH_QUERIES[source])
+                params.append(f"user_key : u{user_id} AND {text_columns} : ({match_terms})")
+            query = " UNION ALL ".join(selects) + " ORDER BY score, created_at DESC LIMIT ? OFFSET ?"
+            async with self.pool.reader() as db:
+                async with db.execute(query, (*params, limit, offset)) as cursor:
+                    results = await cursor.fetchall()
+                    return [dict(row) for row in results]
+        except Exception as e:
+            logger.error(f"Arama hatası: {e}")
+            raise
+
+    async def get_conversation_summary(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Kullanıcının konuşma özetinin alınması"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    "SELECT summary, last_message_id FROM conversation_summaries WHERE user_id = ?",
+                    (user_id,)
+                ) as cursor:
+                    result = await cursor.fetchone()
+                    if result:
+                        return dict(result)
+                    return None
+        except Exception as e:
+            logger.error(f"Konuşma özeti alma hatası: {e}")
+            return None
+
+    async def save_conversation_summary(self, user_id: int, summary: str, last_message_id: int) -> bool:
+        """Konuşma özetinin kaydedilmesi"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute(
+                    """
+                    INSERT INTO conversation_summaries (user_id, summary, last_message_id) 
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (user_id) DO UPDATE SET 
+                        summary = excluded.summary,
+                        last_message_id = excluded.last_message_id,
+                        updated_at = CURRENT_TIMESTAMP
+                    """,
+                    (user_id, summary, last_message_id)
+                )
+                await db.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Konuşma özeti kaydetme hatası: {e}")
+            return False
+
+    async def get_unsummarized_messages(self, user_id: int, after_message_id: int, 
+                                        keep_recent: int) -> List[Dict[str, Any]]:
+        """Özete henüz eklenmemiş, son `keep_recent` mesajdan eski mesajların alınması"""
+        try:
+            await self.write_buffer.barrier(user_id)
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """
+                    SELECT id, message, is_user 
+                    FROM conversations 
+                    WHERE user_id = ? AND id > ? AND id NOT IN (
+                        SELECT id FROM conversations 
+                        WHERE user_id = ? 
+                        ORDER BY id DESC 
+                        LIMIT ?
+                    )
+                    ORDER BY id
+                    """,
+                    (user_id, after_message_id, user_id, keep_recent)
+                ) as cursor:
+                    results = await cursor.fetchall()
+                    return [dict(row) for row in results]
+        except Exception as e:
+            logger.error(f"Özetlenecek mesajları alma hatası: {e}")
+            return []
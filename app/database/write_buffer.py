@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set
+
+from app.database.pool import ConnectionPool
+
+# Log
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _PendingWrite(NamedTuple):
+    """Sırada bekleyen tek bir yazma işlemi"""
+    sql: str
+    params: Sequence[Any]
+    user_id: Optional[int]
+    future: "asyncio.Future[None]"
+
+class WriteBuffer:
+    """Farklı isteklerden gelen INSERT/UPDATE işlemlerini tek bir işlemde (transaction) toplar.
+
+    Her yazma bir Future döndürür; Future, yazmanın dahil olduğu toplu işlem
+    commit edildiğinde None ile tamamlanır (satır ID'si döndürülmez). Böylece
+    commit (fsync) sayısı istek sayısı yerine toplu işlem sayısıyla ölçeklenir.
+    """
+
+    def __init__(self, pool: ConnectionPool, flush_interval: float = 0.005, max_batch_size: int = 500):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self._queue: "asyncio.Queue[Optional[_PendingWrite]]" = asyncio.Queue()
+        self._pending_by_user: Dict[int, Set["asyncio.Future[None]"]] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def start(self) -> None:
+        """Arka plan yazıcı görevini başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Sıradaki tüm yazmaları diske yazar ve yazıcı görevini durdurur"""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    def submit(self, sql: str, params: Sequence[Any], user_id: Optional[int] = None
+               ) -> "asyncio.Future[None]":
+        """Yazmayı sıraya ekler; commit edildiğinde tamamlanan Future döndürür"""
+        if self._task is None:
+            raise RuntimeError("Yazma tamponu çalışmıyor")
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        if user_id is not None:
+            pending = self._pending_by_user.setdefault(user_id, set())
+            pending.add(future)
+            future.add_done_callback(lambda done: self._forget(user_id, done))
+        self._queue.put_nowait(_PendingWrite(sql, params, user_id, future))
+        return future
+
+    async def execute(self, sql: str, params: Sequence[Any], user_id: Optional[int] = None) -> None:
+        """Yazmayı sıraya ekler ve commit edilmesini bekler"""
+        await asyncio.shield(self.submit(sql, params, user_id))
+
+    async def barrier(self, user_id: int) -> None:
+        """Kullanıcının sıradaki yazmaları commit edilene kadar bekler (read-your-writes)"""
+        pending = self._pending_by_user.get(user_id)
+        if pending:
+            await asyncio.gather(*list(pending), return_exceptions=True)
+
+    def _forget(self, user_id: int, future: "asyncio.Future[None]") -> None:
+        pending = self._pending_by_user.get(user_id)
+        if pending is not None:
+            pending.discard(future)
+            if not pending:
+                self._pending_by_user.pop(user_id, None)
+
+    async def _run(self) -> None:
+        """Sıradaki yazmaları kısa aralıklarla toplayıp tek işlemde yazar"""
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch: List[_PendingWrite] = [first]
+
+            # Diğer isteklerin yazmalarının da gelmesi için kısa süre beklenir
+            await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write_batch(batch)
+
+        # Kapanışta kalan yazmalar da diske yazılır
+        remaining = [item for item in self._drain() if item is not None]
+        for start in range(0, len(remaining), self.max_batch_size):
+            await self._write_batch(remaining[start:start + self.max_batch_size])
+
+    def _drain(self) -> List[Optional[_PendingWrite]]:
+        items: List[Optional[_PendingWrite]] = []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _write_batch(self, batch: List[_PendingWrite]) -> None:
+        """Toplu yazmayı tek işlemde uygular; hatalı ifade yalnızca kendi yazmasını başarısız kılar"""
+        outcomes: List[Any] = []
+        try:
+            async with self.pool.writer() as db:
+                for group in self._group_by_sql(batch):
+                    outcomes.extend(await self._write_group(db, group))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Toplu yazma hatası: {e}")
+            outcomes = [e] * len(batch)
+
+        for item, outcome in zip(batch, outcomes):
+            if item.future.done():
+                continue
+            if isinstance(outcome, Exception):
+                item.future.set_exception(outcome)
+            else:
+                item.future.set_result(outcome)
+
+    @staticmethod
+    def _group_by_sql(batch: List[_PendingWrite]) -> List[List[_PendingWrite]]:
+        """Aynı SQL ifadesine sahip ardışık yazmaları gruplar (sıra korunur)"""
+        groups: List[List[_PendingWrite]] = []
+        for item in batch:
+            if groups and groups[-1][0].sql == item.sql:
+                groups[-1].append(item)
+            else:
+                groups.append([item])
+        return groups
+
+    @staticmethod
+    async def _write_group(db: Any, group: List[_PendingWrite]) -> List[Any]:
+        """Grubu tek executemany ile yazar; hata olursa satırları tek tek yazarak hatalıyı ayırır"""
+        if len(group) > 1:
+            await db.execute("SAVEPOINT write_group")
+            try:
+                await db.executemany(group[0].sql, [item.params for item in group])
+                await db.execute("RELEASE SAVEPOINT write_group")
+                return [None] * len(group)
+            except Exception:
+                await db.execute("ROLLBACK TO SAVEPOINT write_group")
+                await db.execute("RELEASE SAVEPOINT write_group")
+
+        outcomes: List[Any] = []
+        for item in group:
+            try:
+                await db.execute(item.sql, item.params)
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+_write_buffer: Optional[WriteBuffer] = None
+
+def start_write_buffer(pool: ConnectionPool, flush_interval: float, max_batch_size: int) -> WriteBuffer:
+    """Uygulama genelinde kullanılan yazma tamponunu başlatır"""
+    global _write_buffer
+    if _write_buffer is None:
+        _write_buffer = WriteBuffer(pool, flush_interval, max_batch_size)
+        _write_buffer.start()
+    return _write_buffer
+
+async def stop_write_buffer() -> None:
+    """Yazma tamponunu boşaltır ve durdurur"""
+    global _write_buffer
+    if _write_buffer is not None:
+        await _write_buffer.stop()
+        _write_buffer = None
+
+def get_write_buffer() -> WriteBuffer:
+    """Çalışan yazma tamponunu döndürür"""
+    if _write_buffer is None:
+        raise RuntimeError("Yazma tamponu çalışmıyor")
+    return _write_buffer
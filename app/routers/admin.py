@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from typing import Any, Dict, Optional
+import logging
+import secrets
+
+from app.schemas.schemas import ErrorResponse
+from app.services.usage import get_usage_summary
+from app.config.settings import get_settings
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Yönetici endpoint'lerini ADMIN_API_TOKEN ile korur.
+
+    ADMIN_API_TOKEN boşsa yönetici endpoint'leri kapalıdır ve 404 döner;
+    `X-Admin-Token` başlığı eşleşmezse 403 döner.
+    """
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Geçersiz yönetici anahtarı"
+        )
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_token)],
+    responses={403: {"model": ErrorResponse}, 404: {"model": ErrorResponse}}
+)
+
+@router.get("/usage/summary", response_model=Dict[str, Any])
+async def get_ai_usage_summary(
+    days: int = Query(7, ge=1),
+    top: int = Query(10, ge=1, le=100)
+) -> Dict[str, Any]:
+    """Son günlerdeki AI kullanımını işlem bazında (maliyete göre sıralı) ve en çok token kullanan kullanıcıları döndürür"""
+    try:
+        return await get_usage_summary(min(days, settings.USAGE_MAX_DAYS), top)
+    except Exception as e:
+        logger.error(f"AI kullanım özeti alma hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"AI kullanım özeti alınamadı: {str(e)}"
+        )
@@ -1,23 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+import asyncio
+import base64
+import json
 import logging
-from datetime import datetime
 
 from app.schemas.schemas import (
-    SuccessResponse,
     ErrorResponse,
     CareerPlanResponse,
-    UserMessage
+    CareerPlanSectionResponse,
+    UserMessage,
+    JobCreatedResponse,
+    JobStatusResponse
 )
-from app.services.gemini_service import generate_career_plan, process_user_query
+from app.services.gemini_service import (
+    check_llm_capacity,
+    process_user_query,
+    process_user_query_stream,
+    run_cancellable
+)
+from app.services.job_queue import enqueue_job, wait_for_job
+from app.services.career_plan_service import (
+    CAREER_PLAN_JOB,
+    get_plan_section,
+    regenerate_plan_section
+)
+from app.services.plan_sections import PLAN_SECTIONS_BY_KEY, plan_text
+from app.services.http_cache import conditional_response, make_etag
+from app.services.search_service import SEARCH_SOURCES, search_content
+from app.services.question_service import TOTAL_QUESTIONS
+from app.services.chat_service import finish_chat_turn, start_chat_turn
+from app.services.usage import check_usage_quota, get_user_usage
+from app.services.response_cache import (
+    chat_cache_key,
+    get_cached_response,
+    record_cache_bypass,
+    store_cached_response
+)
+from app.config.settings import get_settings
 from app.database.database import (
     get_user_by_email,
     create_user,
     get_user_answers,
-    save_career_plan,
-    get_career_plan,
-    save_conversation_message,
-    get_conversation_history
+    get_career_plan_version,
+    get_latest_career_plan,
+    get_conversation_page,
+    iter_conversation_history,
+    get_job
 )
 from app.routers.questionnaire import get_or_create_user
 
@@ -25,17 +55,31 @@ from app.routers.questionnaire import get_or_create_user
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ayarlar
+settings = get_settings()
+
+# Prompt için okunan en fazla mesaj sayısı: son mesajlar ve henüz özetlenmemiş olanlar
+CHAT_HISTORY_WINDOW = settings.CHAT_RECENT_MESSAGES + settings.CHAT_SUMMARY_BATCH_SIZE
+
 router = APIRouter(
     prefix="/career-plan",
     tags=["career_plan"],
     responses={404: {"model": ErrorResponse}}
 )
 
-@router.post("/generate", response_model=SuccessResponse)
-async def generate_user_career_plan(email: str) -> SuccessResponse:
-    """Kullanıcının cevaplarına dayalı olarak kariyer planı oluşturur"""
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events formatında bir olay oluşturur"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/generate", response_model=JobCreatedResponse, status_code=status.HTTP_202_ACCEPTED)
+async def generate_user_career_plan(email: str) -> JobCreatedResponse:
+    """Kariyer planı oluşturma işini sıraya ekler ve iş ID'sini hemen döndürür"""
     try:
         user_id = await get_or_create_user(email)
+        
+        # Günlük token kotası dolduysa 429 döndürülür
+        await check_usage_quota(user_id)
+        
         answers = await get_user_answers(user_id)
         
         # Tüm soruların cevaplandı mı konrol edilir 
@@ -45,19 +89,20 @@ async def generate_user_career_plan(email: str) -> SuccessResponse:
                 detail=f"Lütfen önce anketi tamamlayın. {len(answers)}/10 soru cevaplandı."
             )
             
-        # Kariyer planını oluşturms işlemi
-        career_plan = await generate_career_plan(answers)
-        
-        # Oluşturulan planı kaydetme işlemi
-        success = await save_career_plan(user_id, career_plan)
+        # Kariyer planı oluşturma işini sıraya ekleme işlemi
+        job = await enqueue_job(user_id, CAREER_PLAN_JOB)
         
-        if not success:
+        if not job:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Kariyer planı kaydedilemedi"
+                detail="Kariyer planı oluşturma işi başlatılamadı"
             )
             
-        return SuccessResponse(message="Kariyer planı başarıyla oluşturuldu ve kaydedildi")
+        return JobCreatedResponse(
+            message="Kariyer planı oluşturma işi sıraya alındı",
+            job_id=job["id"],
+            status=job["status"]
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -67,14 +112,74 @@ async def generate_user_career_plan(email: str) -> SuccessResponse:
             detail=f"Kariyer planı oluşturulamadı: {str(e)}"
         )
 
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_career_plan_job(job_id: int, email: str, wait: float = 0) -> JobStatusResponse:
+    """Kariyer planı oluşturma işinin durumunu getirir; wait > 0 ise iş bitene kadar bekler (long-poll)"""
+    try:
+        user_id = await get_or_create_user(email)
+        
+        job = await get_job(job_id)
+        if not job or job["user_id"] != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="İş bulunamadı"
+            )
+        
+        # Uzun bekleme yalnızca sahiplik doğrulandıktan sonra, kullanıcının kendi işi için yapılır;
+        # iş beklerken silinirse son bilinen durumu döndürülür
+        if wait > 0:
+            job = await wait_for_job(job_id, timeout=wait) or job
+            
+        return JobStatusResponse(
+            job_id=job["id"],
+            job_type=job["job_type"],
+            status=job["status"],
+            attempts=job["attempts"],
+            max_attempts=job["max_attempts"],
+            progress=job["progress"],
+            error=job["error"],
+            created_at=job["created_at"],
+            updated_at=job["updated_at"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"İş durumu getirme hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"İş durumu alınamadı: {str(e)}"
+        )
+
 @router.get("/", response_model=CareerPlanResponse)
-async def get_user_career_plan(email: str) -> Dict[str, Any]:
-    """Kullanıcının kariyer planını getirir"""
+async def get_user_career_plan(email: str, request: Request, response: Response) -> Any:
+    """Kullanıcının kariyer planını getirir.
+
+    Yanıt ETag (plan ID ve sürümü) ve Last-Modified başlıklarıyla döner. İstemci
+    bunları If-None-Match veya If-Modified-Since ile gönderirse ve plan
+    değişmediyse plan okunmadan gövdesiz 304 döndürülür.
+    """
     try:
         user_id = await get_or_create_user(email)
         
+        # Önce yalnızca planın sürümü okunur
+        version = await get_career_plan_version(user_id)
+        
+        if not version:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Kariyer planı bulunamadı"
+            )
+        
+        # İstemcideki kopya güncelse içerik okunmaz
+        not_modified = conditional_response(
+            request, response, make_etag("plan", version["id"], version["version"]), version["updated_at"]
+        )
+        if not_modified:
+            return not_modified
+        
         # Kariyer planını alma işlemi
-        plan_content = await get_career_plan(user_id)
+        plan = await get_latest_career_plan(user_id)
+        plan_content = plan_text(plan) if plan else None
         
         if not plan_content:
             raise HTTPException(
@@ -84,7 +189,8 @@ async def get_user_career_plan(email: str) -> Dict[str, Any]:
             
         return {
             "plan_content": plan_content,
-            "created_at": datetime.now() 
+            "created_at": plan["created_at"],
+            "updated_at": plan["updated_at"]
         }
     except HTTPException:
         raise
@@ -95,53 +201,400 @@ async def get_user_career_plan(email: str) -> Dict[str, Any]:
             detail=f"Kariyer planı alınamadı: {str(e)}"
         )
 
-@router.post("/chat", response_model=Dict[str, str])
-async def chat_with_career_ai(email: str, user_message: UserMessage) -> Dict[str, str]:
-    """Kullanıcının kariyer planı hakkında AI ile sohbet etmesini sağlar"""
+def _check_section_key(section_key: str) -> None:
+    """Bilinmeyen plan bölümü için 404 döndürür"""
+    if section_key not in PLAN_SECTIONS_BY_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bilinmeyen plan bölümü. Geçerli bölümler: {', '.join(PLAN_SECTIONS_BY_KEY)}"
+        )
+
+@router.get("/sections/{section_key}", response_model=CareerPlanSectionResponse)
+async def get_user_career_plan_section(
+    section_key: str,
+    email: str,
+    request: Request,
+    response: Response
+) -> Any:
+    """Kullanıcının kariyer planının yalnızca istenen bölümünü getirir; plan gibi koşullu istekleri destekler"""
     try:
+        _check_section_key(section_key)
         user_id = await get_or_create_user(email)
         
-        # Kullanıcı mesajını kaydetme işlemi
-        await save_conversation_message(user_id, user_message.message, is_user=True)
+        # Plan değişmediyse bölüm okunmadan 304 döndürülür
+        version = await get_career_plan_version(user_id)
+        if version:
+            not_modified = conditional_response(
+                request, response,
+                make_etag("plan", version["id"], version["version"], section_key),
+                version["updated_at"]
+            )
+            if not_modified:
+                return not_modified
         
-        # Kariyer planını alma işlemi
-        career_plan = await get_career_plan(user_id)
+        # Plan bölümünü alma işlemi
+        section = await get_plan_section(user_id, section_key)
         
-        # Sohbet geçmişini alma işlemi
-        conversation_history = await get_conversation_history(user_id, limit=10)
+        if not section:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Kariyer planı bölümü bulunamadı"
+            )
+            
+        return section
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Kariyer planı bölümü getirme hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Kariyer planı bölümü alınamadı: {str(e)}"
+        )
+
+@router.post("/sections/{section_key}/regenerate", response_model=CareerPlanSectionResponse)
+async def regenerate_user_career_plan_section(
+    section_key: str,
+    email: str,
+    request: Request
+) -> Dict[str, Any]:
+    """Kariyer planının yalnızca istenen bölümünü yeniden oluşturur; diğer bölümler değişmez"""
+    try:
+        _check_section_key(section_key)
+        
+        # AI servisi yoğunsa 503 döndürülür
+        check_llm_capacity()
+        
+        user_id = await get_or_create_user(email)
         
-        # AI yanıtını oluşturma işlemi
-        ai_response = await process_user_query(
-            user_id=user_id,
-            user_query=user_message.message,
-            career_plan=career_plan,
-            conversation_history=conversation_history
+        # Günlük token kotası dolduysa 429 döndürülür
+        await check_usage_quota(user_id)
+        
+        # Cevaplar ve mevcut plan birlikte okunur
+        answers, plan = await asyncio.gather(
+            get_user_answers(user_id),
+            get_latest_career_plan(user_id)
         )
         
-        # AI yanıtını kaydetme işlemi
-        await save_conversation_message(user_id, ai_response, is_user=False)
+        # Tüm soruların cevaplandı mı konrol edilir 
+        if len(answers) < TOTAL_QUESTIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Lütfen önce anketi tamamlayın. {len(answers)}/{TOTAL_QUESTIONS} soru cevaplandı."
+            )
+        
+        if not plan:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Kariyer planı bulunamadı"
+            )
+        
+        # Bölümü yeniden oluşturma ve kaydetme işlemi
+        section = await run_cancellable(
+            request, regenerate_plan_section(user_id, section_key, plan, answers)
+        )
+        
+        if not section:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Kariyer planı bulunamadı"
+            )
+            
+        return section
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Kariyer planı bölümü yeniden oluşturma hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Kariyer planı bölümü yeniden oluşturulamadı: {str(e)}"
+        )
+
+def _chat_cache_key(use_cache: bool, user_query: str, career_plan: Optional[str],
+                    conversation_history: List[Dict[str, Any]]) -> Optional[str]:
+    """İstek önbelleği kullanıyorsa önbellek anahtarını döndürür"""
+    if not use_cache:
+        record_cache_bypass()
+        return None
+    return chat_cache_key(user_query, career_plan, conversation_history)
+
+@router.post("/chat", response_model=Dict[str, str])
+async def chat_with_career_ai(
+    email: str,
+    user_message: UserMessage,
+    request: Request,
+    use_cache: bool = True
+) -> Dict[str, str]:
+    """Kullanıcının kariyer planı hakkında AI ile sohbet etmesini sağlar.
+
+    Aynı soru, plan ve son mesajlar için daha önce üretilmiş yanıt varsa Gemini
+    çağrılmadan önbellekten döndürülür; `use_cache=false` ile önbellek atlanır.
+    """
+    try:
+        user_id = await get_or_create_user(email)
+        
+        # Günlük token kotası dolduysa mesaj kaydedilmeden 429 döndürülür
+        await check_usage_quota(user_id)
+        
+        # Kullanıcı mesajını kaydetmeye başlama ve plan, özet ve sohbet geçmişini tek sorguda alma işlemi
+        turn = await start_chat_turn(user_id, user_message.message, CHAT_HISTORY_WINDOW)
+        
+        # Önbellekteki yanıtı alma işlemi
+        cache_key = _chat_cache_key(use_cache, user_message.message, turn.career_plan,
+                                    turn.conversation_history)
+        ai_response = await get_cached_response(cache_key) if cache_key else None
+        
+        # AI yanıtını oluşturma işlemi; önbellekteki yanıtlar yoğunlukta da döndürülür,
+        # yalnızca Gemini çağrısı gerekiyorsa ve servis yoğunsa 503 döndürülür
+        if ai_response is None:
+            check_llm_capacity()
+            ai_response = await run_cancellable(request, process_user_query(
+                user_id=user_id,
+                user_query=user_message.message,
+                career_plan=turn.career_plan,
+                conversation_history=turn.conversation_history,
+                conversation_summary=turn.conversation_summary
+            ))
+            if cache_key:
+                store_cached_response(cache_key, ai_response)
+        
+        # AI yanıtını kaydetme işlemi (commit yanıt gönderildikten sonra beklenir)
+        finish_chat_turn(user_id, ai_response)
         
         return {"response": ai_response}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Sohbet işleme hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Mesaj işlenemedi: {str(e)}"
+        )
+
+@router.post("/chat/stream")
+async def stream_chat_with_career_ai(
+    email: str,
+    user_message: UserMessage,
+    request: Request,
+    use_cache: bool = True
+) -> StreamingResponse:
+    """AI yanıtını Server-Sent Events ile parça parça gönderir; önbellekteki yanıt tek parça olarak gönderilir"""
+    try:
+        user_id = await get_or_create_user(email)
+        
+        # Günlük token kotası dolduysa mesaj kaydedilmeden 429 döndürülür
+        await check_usage_quota(user_id)
+        
+        # Kullanıcı mesajını kaydetmeye başlama ve plan, özet ve sohbet geçmişini tek sorguda alma işlemi
+        turn = await start_chat_turn(user_id, user_message.message, CHAT_HISTORY_WINDOW)
+        
+        # Önbellekteki yanıtı alma işlemi
+        cache_key = _chat_cache_key(use_cache, user_message.message, turn.career_plan,
+                                    turn.conversation_history)
+        cached_response = await get_cached_response(cache_key) if cache_key else None
+        
+        # Önbellekte yanıt yoksa ve AI servisi yoğunsa akış başlamadan 503 döndürülür
+        if cached_response is None:
+            check_llm_capacity()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Sohbet işleme hatası: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Mesaj işlenemedi: {str(e)}"
         )
+    
+    async def event_stream() -> AsyncIterator[str]:
+        # Yanıt yalnızca akış hatasız tamamlanırsa önbelleğe alınır ve kaydedilir;
+        # yarıda kesilen yanıt ne önbelleğe ne de konuşma geçmişine yazılır
+        chunks = []
+        try:
+            if cached_response is not None:
+                chunks.append(cached_response)
+                yield _sse_event("message", {"text": cached_response})
+            else:
+                async for chunk in process_user_query_stream(
+                    user_id=user_id,
+                    user_query=user_message.message,
+                    career_plan=turn.career_plan,
+                    conversation_history=turn.conversation_history,
+                    conversation_summary=turn.conversation_summary
+                ):
+                    if await request.is_disconnected():
+                        logger.info("İstemci bağlantıyı kapattı, yanıt akışı durduruldu")
+                        return
+                    chunks.append(chunk)
+                    yield _sse_event("message", {"text": chunk})
+        except asyncio.CancelledError:
+            logger.info("İstemci bağlantıyı kapattı, yanıt akışı iptal edildi")
+            raise
+        except Exception as e:
+            logger.error(f"Sohbet akışı hatası: {e}")
+            yield _sse_event("error", {"error": f"Mesaj işlenemedi: {str(e)}"})
+            return
+        
+        # Akış hatasız bitince birleştirilmiş yanıtı kaydetme işlemi
+        ai_response = "".join(chunks).strip()
+        try:
+            if cache_key and cached_response is None:
+                store_cached_response(cache_key, ai_response)
+            finish_chat_turn(user_id, ai_response)
+        except Exception as e:
+            logger.error(f"Sohbet yanıtı kaydetme hatası: {e}")
+            yield _sse_event("error", {"error": f"Mesaj kaydedilemedi: {str(e)}"})
+            return
+        yield _sse_event("done", {"response": ai_response})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _encode_history_cursor(message: Dict[str, Any]) -> str:
+    """Mesajın (created_at, id) değerini istemciye verilen opak imlece dönüştürür"""
+    payload = json.dumps([message["created_at"], message["id"]])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def _decode_history_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    """İstemciden gelen imleci (created_at, id) değerine çevirir"""
+    if not cursor:
+        return None
+    try:
+        created_at, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), int(message_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Geçersiz sayfa imleci"
+        )
 
 @router.get("/chat-history", response_model=Dict[str, Any])
-async def get_chat_history(email: str, limit: int = 10) -> Dict[str, Any]:
-    """Kullanıcının sohbet geçmişini getirir"""
+async def get_chat_history(
+    email: str,
+    limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Kullanıcının sohbet geçmişini yeniden eskiye sayfa sayfa getirir.
+
+    `limit` sunucu tarafında CHAT_HISTORY_MAX_PAGE_SIZE ile sınırlanır. Daha eski
+    mesajlar için yanıttaki `next_cursor` değeri `cursor` olarak gönderilir;
+    `next_cursor` boşsa geçmişin sonuna gelinmiştir.
+    """
     try:
+        before = _decode_history_cursor(cursor)
+        page_size = min(limit, settings.CHAT_HISTORY_MAX_PAGE_SIZE)
         user_id = await get_or_create_user(email)
         
-        # Sohbet geçmişini alma işlemi
-        conversation_history = await get_conversation_history(user_id, limit=limit)
+        # Sohbet geçmişi sayfasını alma işlemi
+        conversation_history = await get_conversation_page(user_id, page_size, before)
+        next_cursor = (
+            _encode_history_cursor(conversation_history[-1])
+            if len(conversation_history) == page_size else None
+        )
         
-        return {"history": conversation_history}
+        return {"history": conversation_history, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Sohbet geçmişi alma hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Sohbet geçmişi alınamadı: {str(e)}"
+        )
+
+@router.get("/chat-history/stream")
+async def stream_chat_history(email: str, cursor: Optional[str] = None) -> StreamingResponse:
+    """Sohbet geçmişinin tamamını yeniden eskiye NDJSON (satır başına bir JSON mesaj) olarak gönderir.
+
+    Geçmiş, CHAT_HISTORY_MAX_PAGE_SIZE boyutlu sayfalarla okunur; tüm geçmiş
+    belleğe alınmaz.
+    """
+    try:
+        before = _decode_history_cursor(cursor)
+        user_id = await get_or_create_user(email)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Sohbet geçmişi alma hatası: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Sohbet geçmişi alınamadı: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+    
+    async def ndjson_stream() -> AsyncIterator[str]:
+        try:
+            async for message in iter_conversation_history(
+                user_id, settings.CHAT_HISTORY_MAX_PAGE_SIZE, before
+            ):
+                yield json.dumps(message, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            logger.error(f"Sohbet geçmişi akış hatası: {e}")
+            yield json.dumps({"error": f"Sohbet geçmişi alınamadı: {str(e)}"}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+@router.get("/search", response_model=Dict[str, Any])
+async def search_career_content(
+    email: str,
+    q: str = Query(..., min_length=1),
+    source: Optional[str] = None,
+    limit: int = Query(20, ge=1),
+    offset: int = Query(0, ge=0)
+) -> Dict[str, Any]:
+    """Kullanıcının sohbet mesajlarında ve kariyer planlarında tam metin arama yapar.
+
+    Sonuçlar alaka sırasına göre (bm25) döner; eşleşen kelimeler `snippet`
+    alanında <mark> ile işaretlenir. `source` ile yalnızca `conversations` veya
+    `plans` aranabilir. Sonraki sayfa için yanıttaki `next_offset` kullanılır.
+    """
+    try:
+        if source is not None and source not in SEARCH_SOURCES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Geçersiz arama kaynağı. Geçerli kaynaklar: {', '.join(SEARCH_SOURCES)}"
+            )
+        page_size = min(limit, settings.SEARCH_MAX_PAGE_SIZE)
+        user_id = await get_or_create_user(email)
+        
+        # Arama işlemi
+        results = await search_content(
+            user_id, q, [source] if source else list(SEARCH_SOURCES), page_size, offset
+        )
+        
+        if results is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Arama metninde aranacak kelime bulunamadı"
+            )
+        
+        next_offset = offset + len(results) if len(results) == page_size else None
+        return {"results": results, "next_offset": next_offset}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Arama hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Arama yapılamadı: {str(e)}"
+        )
+
+@router.get("/usage", response_model=Dict[str, Any])
+async def get_user_ai_usage(email: str, days: int = Query(7, ge=1)) -> Dict[str, Any]:
+    """Kullanıcının son günlerdeki AI kullanımını gün ve işlem bazında döndürür.
+
+    Her kayıtta çağrı sayısı, prompt ve çıktı token'ları, toplam ve ortalama
+    gecikme ile tahmini maliyet (USD) bulunur; `today_tokens` ve
+    `remaining_tokens` günlük kota durumunu gösterir.
+    """
+    try:
+        user_id = await get_or_create_user(email)
+        return await get_user_usage(user_id, min(days, settings.USAGE_MAX_DAYS))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"AI kullanımı alma hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"AI kullanımı alınamadı: {str(e)}"
+        )
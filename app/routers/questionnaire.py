@@ -1,49 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from typing import List, Dict, Any, Optional
 import logging
+from cachetools import TTLCache
 
 from app.schemas.schemas import (
     QuestionResponse,
     AnswerCreate,
+    AnswerBatchItem,
+    AnswerBatchCreate,
+    AnswerBatchResponse,
     SuccessResponse,
     ErrorResponse,
     QuestionnaireCompletionResponse
 )
-from app.services.gemini_service import generate_first_question, generate_next_question
+from app.services.gemini_service import run_cancellable
+from app.services.http_cache import conditional_response, make_etag
+from app.services.idempotency import run_idempotent
+from app.services.question_service import (
+    TOTAL_QUESTIONS,
+    get_current_question,
+    schedule_question_prefetch
+)
+from app.config.settings import get_settings
 from app.database.database import (
-    get_user_by_email,
-    create_user,
+    upsert_user,
     save_question_answer,
-    get_user_answers
+    save_question_answers,
+    get_user_answers,
+    get_user_answers_version,
+    delete_pending_question
 )
 
 # Loglama yapılandırması
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ayarlar
+settings = get_settings()
+
 router = APIRouter(
     prefix="/questionnaire",
     tags=["questionnaire"],
     responses={404: {"model": ErrorResponse}}
 )
 
+# E-posta -> kullanıcı ID önbelleği (boyut ve süre sınırlı)
+_user_id_cache: TTLCache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
 # Yardımcı fonksiyonlar
 async def get_or_create_user(email: str) -> int:
     """E-posta ile kullanıcıyı alır veya oluşturur ve ID'sini döndürür"""
-    user = await get_user_by_email(email)
-    if user:
-        return user["id"]
+    user_id = _user_id_cache.get(email)
+    if user_id:
+        return user_id
     
-    user_id = await create_user(email)
+    # Tek sorguda ekle-veya-getir; eşzamanlı ilk istekler yarışmaz
+    user_id = await upsert_user(email)
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Kullanıcı oluşturulamadı"
         )
+    _user_id_cache[email] = user_id
     return user_id
 
 @router.get("/status", response_model=QuestionnaireCompletionResponse)
-async def check_questionnaire_status(email: str) -> QuestionnaireCompletionResponse:
+async def check_questionnaire_status(email: str, request: Request) -> QuestionnaireCompletionResponse:
     """Kullanıcının anket tamamlama durumunu kontrol eder"""
     try:
         user_id = await get_or_create_user(email)
@@ -60,10 +85,7 @@ async def check_questionnaire_status(email: str) -> QuestionnaireCompletionRespo
             )
         
         # Sonraki soruyu hazırla
-        if current_question == 0:
-            next_question = await generate_first_question()
-        else:
-            next_question = await generate_next_question(answers)
+        next_question = await run_cancellable(request, get_current_question(user_id, answers))
             
         return QuestionnaireCompletionResponse(
             is_complete=False,
@@ -71,6 +93,8 @@ async def check_questionnaire_status(email: str) -> QuestionnaireCompletionRespo
             current_question=current_question,
             next_question=next_question
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Anket durumu kontrol hatası: {e}")
         raise HTTPException(
@@ -79,7 +103,7 @@ async def check_questionnaire_status(email: str) -> QuestionnaireCompletionRespo
         )
 
 @router.get("/question", response_model=QuestionResponse)
-async def get_next_question(email: str) -> QuestionResponse:
+async def get_next_question(email: str, request: Request) -> QuestionResponse:
     """Kullanıcı için sonraki soruyu getirir"""
     try:
         user_id = await get_or_create_user(email)
@@ -92,11 +116,8 @@ async def get_next_question(email: str) -> QuestionResponse:
                 detail="Anket zaten tamamlandı"
             )
         
-        # Soruyu oluştur
-        if question_number == 1:
-            question = await generate_first_question()
-        else:
-            question = await generate_next_question(answers)
+        # Soruyu al (daha önce oluşturulduysa kayıttan okunur)
+        question = await run_cancellable(request, get_current_question(user_id, answers))
             
         return QuestionResponse(
             question=question,
@@ -111,46 +132,68 @@ async def get_next_question(email: str) -> QuestionResponse:
             detail=f"Soru alınamadı: {str(e)}"
         )
 
+async def _save_answer(user_id: int, question_number: int, answer: str,
+                       request: Request) -> SuccessResponse:
+    """Tek bir cevabı doğrular ve kaydeder"""
+    answers = await get_user_answers(user_id)
+    
+    # Cevabın geçerli olup olmadığını kontrol et
+    current_question_number = len(answers) + 1
+    if question_number != current_question_number:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Geçersiz soru numarası. Beklenen: {current_question_number}, Alınan: {question_number}"
+        )
+        
+    # Soruyu belirle (kullanıcıya gösterilen soru)
+    question = await run_cancellable(request, get_current_question(user_id, answers))
+    
+    # Cevabı kaydet
+    success = await save_question_answer(
+        user_id=user_id,
+        question_number=question_number,
+        question=question,
+        answer=answer
+    )
+    
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Bu soru başka bir istekle zaten cevaplanmış. Anket durumunu yeniden alın."
+        )
+    
+    await delete_pending_question(user_id, question_number)
+    
+    # Sonraki soruyu arka planda hazırla
+    schedule_question_prefetch(user_id, answers + [{
+        "question_number": question_number,
+        "question": question,
+        "answer": answer
+    }])
+        
+    return SuccessResponse(message="Cevap başarıyla kaydedildi")
+
 @router.post("/answer", response_model=SuccessResponse)
 async def submit_answer(
     email: str, 
     question_number: int, 
-    answer_data: AnswerCreate
-) -> SuccessResponse:
-    """Kullanıcının cevabını kaydeder"""
+    answer_data: AnswerCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+) -> Any:
+    """Kullanıcının cevabını kaydeder.
+
+    `Idempotency-Key` başlığıyla gönderilen istek tekrarlandığında cevap yeniden
+    kaydedilmez, ilk yanıt döndürülür.
+    """
     try:
         user_id = await get_or_create_user(email)
-        answers = await get_user_answers(user_id)
-        
-        # Cevabın geçerli olup olmadığını kontrol et
-        current_question_number = len(answers) + 1
-        if question_number != current_question_number:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Geçersiz soru numarası. Beklenen: {current_question_number}, Alınan: {question_number}"
-            )
-            
-        # Soruyu belirle
-        if question_number == 1:
-            question = await generate_first_question()
-        else:
-            question = await generate_next_question(answers)
-        
-        # Cevabı kaydet
-        success = await save_question_answer(
-            user_id=user_id,
-            question_number=question_number,
-            question=question,
-            answer=answer_data.answer
+        return await run_idempotent(
+            user_id, idempotency_key, "questionnaire.answer",
+            {"question_number": question_number, "answer": answer_data.answer}, response,
+            lambda: _save_answer(user_id, question_number, answer_data.answer, request)
         )
-        
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Cevap kaydedilemedi"
-            )
-            
-        return SuccessResponse(message="Cevap başarıyla kaydedildi")
     except HTTPException:
         raise
     except Exception as e:
@@ -160,16 +203,115 @@ async def submit_answer(
             detail=f"Cevap gönderilemedi: {str(e)}"
         )
 
+async def _resolve_batch_questions(user_id: int, answers: List[Dict[str, Any]],
+                                   items: List[AnswerBatchItem]) -> List[Dict[str, Any]]:
+    """Toplu cevapların sorularını belirler; istemci soruyu göndermediyse kayıtlı soru kullanılır"""
+    history = list(answers)
+    new_answers = []
+    for item in items:
+        question = item.question or await get_current_question(user_id, history)
+        qa = {"question_number": item.question_number, "question": question, "answer": item.answer}
+        history.append(qa)
+        new_answers.append(qa)
+    return new_answers
+
+async def _save_answer_batch(user_id: int, batch: AnswerBatchCreate,
+                             request: Request) -> AnswerBatchResponse:
+    """Toplu cevapları doğrular ve tek işlemde kaydeder"""
+    answers = await get_user_answers(user_id)
+    
+    # Cevaplar sıradaki sorudan başlayarak boşluksuz olmalı
+    items = sorted(batch.answers, key=lambda item: item.question_number)
+    first_question_number = len(answers) + 1
+    expected = list(range(first_question_number, first_question_number + len(items)))
+    if [item.question_number for item in items] != expected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Geçersiz soru numaraları. Beklenen: {expected[0]}-{expected[-1]}, "
+                   f"Alınan: {[item.question_number for item in batch.answers]}"
+        )
+    if expected[-1] > TOTAL_QUESTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Anket {TOTAL_QUESTIONS} sorudan oluşur. {len(answers)} soru zaten cevaplandı."
+        )
+    
+    new_answers = await run_cancellable(request, _resolve_batch_questions(user_id, answers, items))
+    
+    # Tüm cevaplar tek işlemde kaydedilir; biri kaydedilemezse hiçbiri kaydedilmez
+    saved_count = await save_question_answers(user_id, new_answers)
+    if not saved_count:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Cevaplardan biri başka bir istekle zaten kaydedilmiş. Anket durumunu yeniden alın."
+        )
+    
+    all_answers = answers + new_answers
+    schedule_question_prefetch(user_id, all_answers)
+    
+    return AnswerBatchResponse(
+        message=f"{saved_count} cevap başarıyla kaydedildi",
+        saved_count=saved_count,
+        current_question=len(all_answers),
+        is_complete=len(all_answers) >= TOTAL_QUESTIONS
+    )
+
+@router.post("/answers/batch", response_model=AnswerBatchResponse)
+async def submit_answer_batch(
+    email: str,
+    batch: AnswerBatchCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+) -> Any:
+    """Çevrimdışı toplanan birden fazla cevabı tek istekte ve tek işlemde kaydeder.
+
+    Cevaplar sıradaki sorudan başlayarak ardışık soru numaralarıyla gönderilir;
+    her cevap için istemcinin gösterdiği soru metni de gönderilebilir.
+    `Idempotency-Key` başlığıyla tekrarlanan istekte ilk yanıt döndürülür.
+    """
+    try:
+        user_id = await get_or_create_user(email)
+        return await run_idempotent(
+            user_id, idempotency_key, "questionnaire.answers.batch", batch, response,
+            lambda: _save_answer_batch(user_id, batch, request)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Toplu cevap gönderme hatası: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Cevaplar gönderilemedi: {str(e)}"
+        )
+
 @router.get("/answers", response_model=List[Dict[str, Any]])
-async def get_all_answers(email: str) -> List[Dict[str, Any]]:
-    """Kullanıcının tüm cevaplarını getirir"""
+async def get_all_answers(email: str, request: Request, response: Response) -> Any:
+    """Kullanıcının tüm cevaplarını getirir.
+
+    Cevaplar yalnızca eklendiği için ETag cevap sayısı ve son cevap ID'sinden
+    oluşturulur; istemcinin kopyası güncelse cevaplar okunmadan 304 döndürülür.
+    """
     try:
         user_id = await get_or_create_user(email)
+        
+        # İstemcideki kopya güncelse cevaplar okunmaz
+        version = await get_user_answers_version(user_id)
+        not_modified = conditional_response(
+            request, response,
+            make_etag("answers", user_id, version["count"], version["last_id"]),
+            version["updated_at"]
+        )
+        if not_modified:
+            return not_modified
+        
         answers = await get_user_answers(user_id)
         return answers
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Cevapları getirme hatası: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Cevaplar alınamadı: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
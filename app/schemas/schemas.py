@@ -31,14 +31,37 @@ class QuestionResponse(BaseModel):
 class AnswerCreate(BaseModel):
     answer: str
 
+class AnswerBatchItem(BaseModel):
+    question_number: int
+    answer: str
+    # İstemcinin çevrimdışıyken gösterdiği soru; verilmezse kayıtlı soru kullanılır
+    question: Optional[str] = None
+
+class AnswerBatchCreate(BaseModel):
+    answers: List[AnswerBatchItem] = Field(..., min_length=1, max_length=10)
+
+class AnswerBatchResponse(BaseModel):
+    success: bool = True
+    message: str
+    saved_count: int
+    current_question: int
+    is_complete: bool
+
 # Kariyer planı tablosu
 class CareerPlanResponse(BaseModel):
     plan_content: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class CareerPlanSectionResponse(BaseModel):
+    key: str
+    title: str
+    content: str
+    updated_at: datetime
+
 # Konuşma tablosu
 class MessageBase(BaseModel):
     message: str
@@ -69,4 +92,20 @@ class QuestionnaireCompletionResponse(BaseModel):
     is_complete: bool
     total_questions: int = 10
     current_question: Optional[int] = None
-    next_question: Optional[str] = None 
\ No newline at end of file
+    next_question: Optional[str] = None
+
+# Arka plan iş şemaları
+class JobCreatedResponse(SuccessResponse):
+    job_id: int
+    status: str
+
+class JobStatusResponse(BaseModel):
+    job_id: int
+    job_type: str
+    status: str
+    attempts: int
+    max_attempts: int
+    progress: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
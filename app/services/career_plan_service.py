@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.services.gemini_service import generate_career_plan, generate_plan_section
+from app.services.plan_sections import make_section, parse_plan_sections
+from app.services.question_service import TOTAL_QUESTIONS
+from app.database.database import (
+    get_career_plan_section,
+    get_latest_career_plan,
+    get_user_answers,
+    save_career_plan,
+    save_career_plan_sections,
+    update_job_progress
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Kariyer planı oluşturma iş türü
+CAREER_PLAN_JOB = "career_plan"
+
+async def run_career_plan_job(job: Dict[str, Any]) -> None:
+    """Arka plan işi olarak kullanıcının kariyer planını oluşturur ve kaydeder"""
+    user_id = job["user_id"]
+
+    # İlerleme kaydı ve cevapların okunması birbirini beklemez
+    _, answers = await asyncio.gather(
+        update_job_progress(job["id"], "Cevaplar okunuyor"),
+        get_user_answers(user_id)
+    )
+    if len(answers) < TOTAL_QUESTIONS:
+        raise ValueError(f"Anket tamamlanmamış. {len(answers)}/{TOTAL_QUESTIONS} soru cevaplandı.")
+
+    await update_job_progress(job["id"], "Kariyer planı oluşturuluyor")
+    sections = await generate_career_plan(answers, raise_on_error=True, user_id=user_id)
+
+    await update_job_progress(job["id"], "Kariyer planı kaydediliyor")
+    if not await save_career_plan(user_id, sections):
+        raise RuntimeError("Kariyer planı kaydedilemedi")
+
+def plan_sections(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Planın bölümlerini döndürür; bölümleri olmayan eski planların metni bölümlere ayrılır.
+
+    Başlıkları tanınamayan eski plan metni kaybolmaması için ilk bölüme konur.
+    """
+    if plan["sections"]:
+        return plan["sections"]
+    content = plan["plan_content"] or ""
+    sections = parse_plan_sections(content) or [make_section("recommendations", content)]
+    for section in sections:
+        section["updated_at"] = plan["created_at"]
+    return sections
+
+async def get_plan_section(user_id: int, section_key: str) -> Optional[Dict[str, Any]]:
+    """Kullanıcının son planının tek bölümünü getirir; yalnızca o bölüm okunur"""
+    section = await get_career_plan_section(user_id, section_key)
+    if section:
+        return section
+
+    # Eski (bölümlenmemiş) planlar için plan metni bölümlere ayrılır
+    plan = await get_latest_career_plan(user_id)
+    if not plan or plan["sections"]:
+        return None
+    return next((item for item in plan_sections(plan) if item["key"] == section_key), None)
+
+async def regenerate_plan_section(user_id: int, section_key: str, plan: Dict[str, Any],
+                                  answers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Planın yalnızca verilen bölümünü yeniden oluşturup kaydeder.
+
+    Plan ve cevaplar çağıran tarafından (birlikte) okunup verilir; böylece
+    doğrulama için okunan veriler tekrar okunmaz.
+    """
+    sections = plan_sections(plan)
+    section = await generate_plan_section(section_key, answers, sections, user_id=user_id)
+
+    # Eski planlarda bölümlere ayrılan metin de yeni bölümle birlikte kaydedilir
+    to_save = [section] if plan["sections"] else [
+        item for item in sections if item["key"] != section_key
+    ] + [section]
+    if not await save_career_plan_sections(plan["id"], to_save):
+        raise RuntimeError("Kariyer planı bölümü kaydedilemedi")
+
+    return await get_career_plan_section(user_id, section_key)
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from app.config.settings import get_settings
+from app.services.conversation_summary import schedule_summary_update
+from app.database.database import (
+    get_chat_context,
+    queue_conversation_message,
+    wait_for_pending_writes
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# Commit edilmesi arka planda beklenen mesaj yazmaları
+_background_tasks: Set["asyncio.Task[Any]"] = set()
+
+class ChatTurn(NamedTuple):
+    """Sohbet turu için okunan bağlam"""
+    career_plan: Optional[str]
+    conversation_summary: Optional[Dict[str, Any]]
+    conversation_history: List[Dict[str, Any]]
+
+def _run_in_background(coroutine: Any) -> None:
+    """Yanıtı bekletmemesi gereken yazma takibini arka planda çalıştırır"""
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _ensure_written(user_id: int, message: str, is_user: bool,
+                          write: "asyncio.Future[None]") -> bool:
+    """Mesaj commit edilene kadar bekler; yazma başarısız olursa mesajı yeniden sıraya ekler"""
+    for attempt in range(1, settings.CHAT_PERSIST_MAX_ATTEMPTS + 1):
+        try:
+            await write
+            return True
+        except Exception as e:
+            if attempt == settings.CHAT_PERSIST_MAX_ATTEMPTS:
+                logger.error(f"Konuşma mesajı {attempt} denemede kaydedilemedi: {e}")
+                return False
+            logger.warning(f"Konuşma mesajı kaydedilemedi, yeniden denenecek: {e}")
+            await asyncio.sleep(settings.CHAT_PERSIST_RETRY_DELAY_SECONDS * attempt)
+            write = queue_conversation_message(user_id, message, is_user)
+    return False
+
+def _persist_message(user_id: int, message: str, is_user: bool) -> "asyncio.Future[None]":
+    """Mesajı yazma tamponuna ekler; commit'i arka planda beklenir ve gerekirse yeniden denenir"""
+    write = queue_conversation_message(user_id, message, is_user)
+    _run_in_background(_ensure_written(user_id, message, is_user, write))
+    return write
+
+async def start_chat_turn(user_id: int, user_message: str, history_limit: int) -> ChatTurn:
+    """Kullanıcı mesajını kaydetmeye başlar ve sohbet bağlamını okur.
+
+    Önce kullanıcının önceki turlardan bekleyen yazmaları (ör. son AI yanıtı)
+    beklenir. Yeni mesajın commit'i plan, özet ve geçmişi tek sorguda okuyan
+    bağlam sorgusuyla eşzamanlı ilerler; mesaj okumada görünmüyorsa geçmişin
+    başına bellekte eklenir.
+    """
+    await wait_for_pending_writes(user_id)
+    _persist_message(user_id, user_message, is_user=True)
+
+    context = await get_chat_context(user_id, history_limit)
+    history = context["conversation_history"]
+    # Mesaj okumadan önce commit edildiyse geçmişte zaten en yeni kayıttır
+    if not (history and history[0]["is_user"] and history[0]["message"] == user_message):
+        history = [{"message": user_message, "is_user": True, "created_at": None}] + history[:history_limit - 1]
+    return ChatTurn(
+        career_plan=context["career_plan"],
+        conversation_summary=context["conversation_summary"],
+        conversation_history=history
+    )
+
+def finish_chat_turn(user_id: int, ai_response: str) -> None:
+    """AI yanıtını yanıt gönderilmeden önce yazma tamponuna ekler; commit beklenmez.
+
+    Yanıt sıraya alındığı için kullanıcının sonraki okumaları onu görür;
+    kapanışta tampon ve bekleyen yazmalar boşaltılır. Yanıt commit edildikten
+    sonra konuşma özeti güncellenir.
+    """
+    write = queue_conversation_message(user_id, ai_response, is_user=False)
+
+    async def _persist_reply() -> None:
+        if await _ensure_written(user_id, ai_response, False, write):
+            schedule_summary_update(user_id)
+
+    _run_in_background(_persist_reply())
+
+async def flush_chat_writes() -> None:
+    """Commit edilmesi beklenen mesajların yazılmasını bekler (kapanışta)"""
+    while _background_tasks:
+        await asyncio.gather(*list(_background_tasks), return_exceptions=True)
@@ -0,0 +1,151 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.config.settings import get_settings
+
+# Ayarlar
+settings = get_settings()
+
+# Token sayısı tahmini için karakter/token oranı (Gemini için yaklaşık değer)
+CHARS_PER_TOKEN = 4
+
+# Markdown başlık satırları: "## Başlık", "**Başlık**" veya "1. **Başlık**"
+_HEADING_PATTERN = re.compile(r"^\s*(#{1,6}\s+.+|(\d+\.\s*)?\*\*[^*]+\*\*:?\s*)$")
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+class ChatContext(NamedTuple):
+    """Sohbet promptuna eklenecek, bütçeye göre kırpılmış bağlam"""
+    plan: str
+    history: str
+    summary: str
+
+def estimate_tokens(text: str) -> int:
+    """Metnin yaklaşık token sayısını döndürür"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Metni verilen token bütçesine sığacak şekilde kısaltır"""
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + "…"
+
+def _words(text: str) -> Set[str]:
+    """Metindeki anlamlı kelimeleri küçük harfe çevirerek döndürür"""
+    text = text.replace("I", "ı").replace("İ", "i").lower()
+    return {word for word in _WORD_PATTERN.findall(text) if len(word) >= 3}
+
+def split_plan_sections(plan: str) -> List[Tuple[str, str]]:
+    """Kariyer planını başlıklarına göre (başlık, içerik) bölümlerine ayırır"""
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    for line in plan.splitlines():
+        if _HEADING_PATTERN.match(line):
+            sections.append((line.strip(), []))
+        else:
+            sections[-1][1].append(line)
+    return [
+        (title, "\n".join(lines).strip())
+        for title, lines in sections
+        if title or "".join(lines).strip()
+    ]
+
+def select_plan_sections(plan: str, query: str, max_tokens: int) -> str:
+    """Plandan soruyla en ilgili bölümleri token bütçesi içinde seçer.
+
+    Bölümler sorudaki kelimelerle örtüşmelerine göre sıralanır; seçilen bölümler
+    plandaki orijinal sıralarıyla birleştirilir.
+    """
+    if estimate_tokens(plan) <= max_tokens:
+        return plan
+
+    sections = split_plan_sections(plan)
+    query_words = _words(query)
+    ranked = sorted(
+        range(len(sections)),
+        key=lambda index: (
+            -len(query_words & _words(sections[index][0] + " " + sections[index][1])),
+            index
+        )
+    )
+
+    selected: Dict[int, str] = {}
+    remaining = max_tokens
+    for index in ranked:
+        title, body = sections[index]
+        text = f"{title}\n{body}".strip()
+        cost = estimate_tokens(text)
+        if cost <= remaining:
+            selected[index] = text
+            remaining -= cost
+        elif not selected:
+            # En ilgili bölüm tek başına bütçeyi aşıyorsa kısaltılarak eklenir
+            selected[index] = truncate_to_tokens(text, remaining)
+            remaining = 0
+        if remaining <= 0:
+            break
+
+    return "\n\n".join(selected[index] for index in sorted(selected))
+
+def build_chat_history(conversation_history: List[Dict[str, Any]], max_tokens: int,
+                       after_message_id: int = 0) -> str:
+    """Özete dahil edilmemiş son mesajları token bütçesi içinde birleştirir.
+
+    conversation_history en yeni mesaj başta olacak şekilde sıralıdır; bütçe
+    dolduğunda daha eski mesajlar atlanır.
+    """
+    lines: List[str] = []
+    remaining = max_tokens
+    for msg in conversation_history:
+        if msg.get("id", after_message_id + 1) <= after_message_id:
+            break
+        prefix = "Kullanıcı" if msg["is_user"] else "AI"
+        line = f"{prefix}: {msg['message']}"
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+    return "\n".join(reversed(lines))
+
+def build_chat_context(user_query: str, career_plan: Optional[str],
+                       conversation_history: List[Dict[str, Any]],
+                       conversation_summary: Optional[Dict[str, Any]] = None) -> ChatContext:
+    """Sohbet promptu için plan, geçmiş ve özet bağlamını bütçeye göre hazırlar"""
+    plan = (
+        select_plan_sections(career_plan, user_query, settings.CHAT_PLAN_TOKEN_BUDGET)
+        if career_plan else "Kariyer planı henüz oluşturulmadı."
+    )
+
+    summary = ""
+    summarized_until = 0
+    if conversation_summary:
+        summary = truncate_to_tokens(
+            conversation_summary["summary"], settings.CHAT_SUMMARY_TOKEN_BUDGET
+        )
+        summarized_until = conversation_summary["last_message_id"]
+
+    history = build_chat_history(
+        conversation_history, settings.CHAT_HISTORY_TOKEN_BUDGET, summarized_until
+    )
+    return ChatContext(plan=plan, history=history, summary=summary)
+
+def build_qa_history(questions_answers: List[Dict[str, Any]], max_tokens: int) -> str:
+    """Soru-cevap geçmişini token bütçesi içinde birleştirir.
+
+    Son cevaplar tam olarak korunur; bütçe azaldıkça daha eski cevaplar kısaltılır.
+    """
+    entries: List[str] = []
+    remaining = max_tokens
+    for qa in reversed(questions_answers):
+        entry = f"Soru {qa['question_number']}: {qa['question']}\nCevap: {qa['answer']}"
+        cost = estimate_tokens(entry)
+        if cost > remaining:
+            if remaining < settings.QA_ENTRY_MIN_TOKENS:
+                break
+            entry = truncate_to_tokens(entry, remaining)
+            cost = remaining
+        entries.append(entry)
+        remaining -= cost
+    return "\n\n".join(reversed(entries))
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Dict
+
+from app.config.settings import get_settings
+from app.services.context_builder import truncate_to_tokens
+from app.services.gemini_service import summarize_conversation
+from app.database.database import (
+    get_conversation_summary,
+    get_unsummarized_messages,
+    save_conversation_summary
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# Kullanıcı başına devam eden özet güncelleme görevleri
+_summary_tasks: Dict[int, "asyncio.Task[None]"] = {}
+
+async def update_conversation_summary(user_id: int) -> None:
+    """Son mesajların dışında kalan yeni mesajları kullanıcının konuşma özetine ekler.
+
+    Özet, yeterli sayıda mesaj biriktiğinde (CHAT_SUMMARY_BATCH_SIZE) kademeli
+    olarak güncellenir; her seferinde yalnızca yeni mesajlar özetlenir.
+    """
+    current = await get_conversation_summary(user_id)
+    summarized_until = current["last_message_id"] if current else 0
+
+    messages = await get_unsummarized_messages(
+        user_id, summarized_until, settings.CHAT_RECENT_MESSAGES
+    )
+    if len(messages) < settings.CHAT_SUMMARY_BATCH_SIZE:
+        return
+
+    summary = await summarize_conversation(
+        current["summary"] if current else None, messages, user_id=user_id
+    )
+    if not summary:
+        return
+
+    await save_conversation_summary(
+        user_id,
+        truncate_to_tokens(summary, settings.CHAT_SUMMARY_TOKEN_BUDGET),
+        messages[-1]["id"]
+    )
+
+def schedule_summary_update(user_id: int) -> None:
+    """Kullanıcının konuşma özetini arka planda günceller"""
+    if user_id in _summary_tasks:
+        return
+
+    task = asyncio.create_task(update_conversation_summary(user_id))
+
+    def _on_done(finished: "asyncio.Task[None]") -> None:
+        _summary_tasks.pop(user_id, None)
+        if not finished.cancelled() and finished.exception():
+            logger.error(f"Konuşma özeti güncelleme hatası: {finished.exception()}")
+
+    task.add_done_callback(_on_done)
+    _summary_tasks[user_id] = task
+
+async def cancel_summary_updates() -> None:
+    """Devam eden özet güncelleme görevlerini iptal eder"""
+    tasks = list(_summary_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _summary_tasks.clear()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from app.config.settings import get_settings
+from app.services.gemini_service import generate_first_question_candidates
+from app.database.database import add_first_questions, delete_first_question, get_first_question_pool
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# Önceden oluşturulmuş ilk sorular; first_question_pool tablosunun bellekteki kopyası
+_pool: Deque[Dict[str, Any]] = deque()
+_refill_task: Optional["asyncio.Task[None]"] = None
+# Kullanılan soruların havuzdan silinmesi (yanıtı bekletmemek için arka planda)
+_delete_tasks: Set["asyncio.Task[bool]"] = set()
+
+def _pool_enabled() -> bool:
+    return settings.FIRST_QUESTION_POOL_ENABLED and bool(settings.GEMINI_API_KEY)
+
+async def _refill() -> None:
+    """Havuzu FIRST_QUESTION_POOL_SIZE dolana kadar toplu Gemini çağrılarıyla doldurur"""
+    while len(_pool) < settings.FIRST_QUESTION_POOL_SIZE:
+        count = min(
+            settings.FIRST_QUESTION_POOL_BATCH_SIZE,
+            settings.FIRST_QUESTION_POOL_SIZE - len(_pool)
+        )
+        questions = await generate_first_question_candidates(count)
+        added = await add_first_questions(questions) if questions else []
+        if not added:
+            # Gemini hata verdi veya yalnızca havuzda olan sorular döndü; sonraki düşüşte tekrar denenir
+            logger.warning("İlk soru havuzu doldurulamadı")
+            return
+        _pool.extend(added)
+        logger.info(f"İlk soru havuzuna {len(added)} soru eklendi (toplam {len(_pool)})")
+
+def _schedule_refill() -> None:
+    """Havuz alt sınırın altına düştüyse arka planda doldurmaya başlar"""
+    global _refill_task
+    if not _pool_enabled() or len(_pool) >= settings.FIRST_QUESTION_POOL_LOW_WATERMARK:
+        return
+    if _refill_task is not None and not _refill_task.done():
+        return
+
+    _refill_task = asyncio.create_task(_refill())
+
+    def _on_done(finished: "asyncio.Task[None]") -> None:
+        if not finished.cancelled() and finished.exception():
+            logger.error(f"İlk soru havuzu doldurma hatası: {finished.exception()}")
+
+    _refill_task.add_done_callback(_on_done)
+
+def take_first_question() -> Optional[str]:
+    """Havuzdan bir ilk soru alır; havuz boşsa None döndürür.
+
+    Soru bellekten döndürülür, veritabanından silinmesi arka planda yapılır.
+    Havuz alt sınırın altına düşerse yeniden doldurma başlatılır.
+    """
+    if not _pool_enabled():
+        return None
+
+    entry = _pool.popleft() if _pool else None
+    _schedule_refill()
+    if entry is None:
+        return None
+
+    task = asyncio.create_task(delete_first_question(entry["id"]))
+    _delete_tasks.add(task)
+    task.add_done_callback(_delete_tasks.discard)
+    return entry["question"]
+
+async def start_first_question_pool() -> None:
+    """Kaydedilmiş havuzu yükler ve gerekirse arka planda doldurmaya başlar"""
+    if not _pool_enabled():
+        return
+    _pool.clear()
+    _pool.extend(await get_first_question_pool())
+    logger.info(f"İlk soru havuzu yüklendi: {len(_pool)} soru")
+    _schedule_refill()
+
+async def stop_first_question_pool() -> None:
+    """Doldurma görevini iptal eder ve bekleyen silmelerin bitmesini bekler"""
+    global _refill_task
+    if _refill_task is not None:
+        _refill_task.cancel()
+        await asyncio.gather(_refill_task, return_exceptions=True)
+        _refill_task = None
+    await asyncio.gather(*_delete_tasks, return_exceptions=True)
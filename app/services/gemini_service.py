@@ -1,7 +1,39 @@
 from google import genai
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+import re
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from fastapi import HTTPException, Request
 from app.config.settings import get_settings
+from app.services.context_builder import build_chat_context, build_qa_history, truncate_to_tokens
+from app.services.metrics import (
+    LLM_CALL_DURATION,
+    LLM_CALLS,
+    LLM_CALLS_IN_FLIGHT,
+    LLM_PROMPT_CHARS,
+    LLM_QUEUE_WAIT,
+    LLM_RESPONSE_CHARS
+)
+from app.services.plan_sections import (
+    PLAN_SECTIONS,
+    PLAN_SECTIONS_BY_KEY,
+    format_plan,
+    make_section,
+    parse_plan_sections,
+    section_key_for_heading
+)
+from app.services.resilience import (
+    LLM_RETRIES,
+    AdmissionController,
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMOverloadedError,
+    is_retryable,
+    retry_delay
+)
+from app.services.usage import record_usage
 
 # Loglama
 logging.basicConfig(level=logging.INFO)
@@ -16,7 +48,231 @@ if settings.GEMINI_API_KEY:
 else:
     logger.warning("GEMINI_API_KEY bulunamadı. API çağrıları başarısız olacak.")
 
-async def generate_first_question() -> str:
+# Aynı anda işlenebilecek Gemini çağrısı sınırı
+_llm_semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+# Bekleyen ve çalışan çağrıların toplam sınırı (aşılırsa 503)
+_admission = AdmissionController(settings.GEMINI_MAX_PENDING_CALLS)
+# Gemini hata verdiğinde veya yavaşladığında çağrıları geçici olarak durdurur
+_breaker = CircuitBreaker(
+    window=settings.GEMINI_BREAKER_WINDOW,
+    min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+    failure_ratio=settings.GEMINI_BREAKER_FAILURE_RATIO,
+    open_seconds=settings.GEMINI_BREAKER_OPEN_SECONDS,
+    slow_call_seconds=settings.GEMINI_SLOW_CALL_SECONDS
+)
+
+T = TypeVar("T")
+
+# Liste satırlarının başındaki numara veya madde işaretleri ("1.", "2)", "-", "*")
+_LIST_MARKER_PATTERN = re.compile(r"^\s*(\d+[.)]|[-*•])\s*")
+
+# Sohbet yanıtı üretilemediğinde döndürülen hazır yanıtlar (önbelleğe alınmaz)
+CHAT_NO_API_KEY_RESPONSE = "API anahtarı eksik olduğu için yanıt üretilemedi."
+CHAT_ERROR_RESPONSE = "Sorgunuz işlenirken bir hata oluştu. Lütfen daha sonra tekrar deneyin."
+CHAT_FALLBACK_RESPONSES = (CHAT_NO_API_KEY_RESPONSE, CHAT_ERROR_RESPONSE)
+
+# İstemci bağlantıyı kapattığında döndürülen durum kodu (nginx kuralı)
+CLIENT_CLOSED_REQUEST = 499
+
+class _Flight:
+    """Aynı anahtarlı eşzamanlı isteklerin paylaştığı tek Gemini çağrısı"""
+
+    def __init__(self, task: "asyncio.Task[str]"):
+        self.task = task
+        self.waiters = 0
+
+# Devam eden çağrılar: (işlem, kullanıcı, girdi hash'i) -> çağrı
+_inflight: Dict[Tuple[str, Optional[int], str], _Flight] = {}
+
+async def _call_gemini(prompt: str, operation: str, user_id: Optional[int] = None) -> str:
+    """Gemini'ye asenkron istek gönderir; geçici hatalarda rastgele sapmalı üstel beklemeyle yeniden dener.
+
+    Bekleyen çağrı sınırı aşılmışsa LLMOverloadedError (503), devre kesici açıksa
+    CircuitOpenError fırlatılır; ikisinde de Gemini'ye istek gönderilmez.
+    """
+    LLM_PROMPT_CHARS.inc(len(prompt), operation=operation)
+    with _admission:
+        attempt = 0
+        while True:
+            try:
+                return await _call_gemini_once(prompt, operation, user_id)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                delay = retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                LLM_RETRIES.inc(operation=operation)
+                logger.warning(f"Gemini çağrısı başarısız, {delay:.1f} sn sonra yeniden denenecek: {e}")
+                await asyncio.sleep(delay)
+
+async def _acquire_call_slot(operation: str) -> None:
+    """Devre kesiciden izin alır ve eşzamanlılık sınırında yer açılmasını bekler.
+
+    Beklerken iptal edilen çağrı (ör. istemci bağlantıyı kapatırsa) yarı açık
+    devredeki deneme hakkını bırakır; aksi halde devre yarı açık kalıp sonraki
+    tüm çağrıları reddederdi.
+    """
+    _breaker.before_call()
+    try:
+        with LLM_QUEUE_WAIT.time(operation=operation):
+            await _llm_semaphore.acquire()
+    except BaseException:
+        _breaker.record_ignored()
+        raise
+
+async def _call_gemini_once(prompt: str, operation: str, user_id: Optional[int] = None) -> str:
+    """Tek bir Gemini çağrısı; eşzamanlılık sınırı, zaman aşımı ve devre kesici uygulanır.
+
+    Başarılı çağrının token sayıları ve süresi kullanıcı ve işlem bazında kaydedilir.
+    """
+    await _acquire_call_slot(operation)
+    start = time.perf_counter()
+    try:
+        with LLM_CALLS_IN_FLIGHT.track(), LLM_CALL_DURATION.time(operation=operation):
+            response = await asyncio.wait_for(
+                client.aio.models.generate_content(
+                    model=settings.GEMINI_MODEL,
+                    contents=[prompt]
+                ),
+                timeout=settings.GEMINI_TIMEOUT_SECONDS
+            )
+    except BaseException as e:
+        _record_failure(e)
+        LLM_CALLS.inc(operation=operation, outcome=_call_outcome(e))
+        raise
+    finally:
+        _llm_semaphore.release()
+    duration = time.perf_counter() - start
+    _breaker.record_success(duration)
+    LLM_CALLS.inc(operation=operation, outcome="success")
+    record_usage(operation, user_id, response.usage_metadata, duration)
+    text = response.text.strip()
+    LLM_RESPONSE_CHARS.inc(len(text), operation=operation)
+    return text
+
+def _record_failure(error: BaseException) -> None:
+    """Geçici hataları devre kesiciye hata olarak bildirir; diğerleri sayılmaz"""
+    if is_retryable(error):
+        _breaker.record_failure()
+    else:
+        _breaker.record_ignored()
+
+def check_llm_capacity() -> None:
+    """Yeni Gemini çağrısı için yer yoksa LLMOverloadedError (503) fırlatır"""
+    _admission.check()
+
+def _call_outcome(error: BaseException) -> str:
+    """Başarısız Gemini çağrısının metrik etiketi"""
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+async def _single_flight(key: Tuple[str, Optional[int], str], 
+                         factory: Callable[[], Awaitable[str]]) -> str:
+    """Aynı anahtarla devam eden bir çağrı varsa onun sonucunu bekler, yoksa yeni çağrı başlatır.
+
+    Bekleyenlerden biri iptal edilirse (ör. istemci bağlantıyı kapatırsa) ortak çağrı
+    sürer; yalnızca son bekleyen de ayrılırsa çağrı iptal edilir.
+    """
+    flight = _inflight.get(key)
+    if flight is None:
+        flight = _Flight(asyncio.ensure_future(factory()))
+        _inflight[key] = flight
+
+        def _on_done(_: "asyncio.Task[str]") -> None:
+            if _inflight.get(key) is flight:
+                _inflight.pop(key, None)
+
+        flight.task.add_done_callback(_on_done)
+    else:
+        logger.info(f"Devam eden Gemini çağrısına katılındı: {key[0]}")
+
+    flight.waiters += 1
+    try:
+        return await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        if flight.waiters == 1 and not flight.task.done():
+            flight.task.cancel()
+        raise
+    finally:
+        flight.waiters -= 1
+
+async def _generate_text(prompt: str, operation: str, user_id: Optional[int] = None) -> str:
+    """Gemini'den metin üretir; aynı işlem, kullanıcı ve girdiyle eşzamanlı istekler tek çağrıyı paylaşır"""
+    key = (operation, user_id, hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    return await _single_flight(key, lambda: _call_gemini(prompt, operation, user_id))
+
+async def _generate_text_stream(prompt: str, operation: str, 
+                                user_id: Optional[int] = None) -> AsyncIterator[str]:
+    """Gemini yanıtını parça parça döndürür; her parça için zaman aşımı uygulanır.
+
+    Parçalar istemciye iletildiği için akış yarıda kalırsa yeniden denenmez. Her
+    parçadaki kullanım bilgisi o ana kadarki toplamı gösterdiği için son parçanınki kaydedilir.
+    """
+    LLM_PROMPT_CHARS.inc(len(prompt), operation=operation)
+    with _admission:
+        await _acquire_call_slot(operation)
+        start = time.perf_counter()
+        usage_metadata = None
+        try:
+            with LLM_CALLS_IN_FLIGHT.track(), LLM_CALL_DURATION.time(operation=operation):
+                stream = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(
+                        model=settings.GEMINI_MODEL,
+                        contents=[prompt]
+                    ),
+                    timeout=settings.GEMINI_TIMEOUT_SECONDS
+                )
+                iterator = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(
+                            iterator.__anext__(), timeout=settings.GEMINI_TIMEOUT_SECONDS
+                        )
+                    except StopAsyncIteration:
+                        break
+                    if chunk.usage_metadata is not None:
+                        usage_metadata = chunk.usage_metadata
+                    if chunk.text:
+                        LLM_RESPONSE_CHARS.inc(len(chunk.text), operation=operation)
+                        yield chunk.text
+        except BaseException as e:
+            _record_failure(e)
+            LLM_CALLS.inc(operation=operation, outcome=_call_outcome(e))
+            raise
+        finally:
+            _llm_semaphore.release()
+        duration = time.perf_counter() - start
+        _breaker.record_success(duration)
+        LLM_CALLS.inc(operation=operation, outcome="success")
+        record_usage(operation, user_id, usage_metadata, duration)
+
+async def run_cancellable(request: Request, awaitable: Awaitable[T]) -> T:
+    """İşlemi çalıştırır; istemci bağlantıyı kapatırsa işlemi iptal eder"""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {task}, timeout=settings.DISCONNECT_POLL_INTERVAL_SECONDS
+            )
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("İstemci bağlantıyı kapattı, Gemini çağrısı iptal ediliyor")
+                task.cancel()
+                raise HTTPException(
+                    status_code=CLIENT_CLOSED_REQUEST,
+                    detail="İstemci bağlantıyı kapattı"
+                )
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def generate_first_question(user_id: Optional[int] = None) -> str:
     """İlk soruyu oluşturulur"""
     try:
         if not settings.GEMINI_API_KEY:
@@ -30,26 +286,49 @@ async def generate_first_question() -> str:
         Sadece soruyu yaz, başka bir açıklama yapma.
         """
         
-        response = client.models.generate_content(
-            model=settings.GEMINI_MODEL,
-            contents=[prompt]
-        )
-        return response.text.strip()
+        return await _generate_text(prompt, "first_question", user_id)
+    except LLMOverloadedError:
+        raise
     except Exception as e:
         logger.error(f"İlk soru oluşturma hatası: {e}")
         return "Kariyer yolculuğunuzda hangi alanlar veya endüstriler sizi en çok heyecanlandırıyor?"
 
-async def generate_next_question(previous_questions_answers: List[Dict[str, Any]]) -> str:
+async def generate_first_question_candidates(count: int) -> List[str]:
+    """Anketin ilk sorusu olarak kullanılabilecek birbirinden farklı sorular oluşturulur"""
+    try:
+        if not settings.GEMINI_API_KEY:
+            logger.warning("GEMINI_API_KEY bulunamadı. İlk soru adayları oluşturulamıyor.")
+            return []
+
+        prompt = f"""
+        Profesyonel bir kariyer danışmanısın. Kullanıcıya kariyer planlaması yapmak için 
+        kişisel ilgi alanları, becerileri, değerleri ve hedefleri hakkında sormak 
+        isteyebileceğin {count} farklı ilk soru yaz. Her biri anket serisinin ilk sorusu olabilmeli.
+        Sorular farklı konulara odaklansın ve farklı ifadelerle yazılsın.
+        Her satıra yalnızca bir soru yaz; numara, madde işareti veya açıklama ekleme.
+        """
+
+        text = await _generate_text(prompt, "first_question_candidates")
+        questions = []
+        for line in text.splitlines():
+            question = _LIST_MARKER_PATTERN.sub("", line).strip()
+            if question and question not in questions:
+                questions.append(question)
+        return questions[:count]
+    except Exception as e:
+        logger.error(f"İlk soru adayları oluşturma hatası: {e}")
+        return []
+
+async def generate_next_question(previous_questions_answers: List[Dict[str, Any]], 
+                                 user_id: Optional[int] = None) -> str:
     """Önceki sorulara ve cevaplara dayalı olarak bir sonraki soru oluşturulur"""
     try:
         if not settings.GEMINI_API_KEY:
             logger.warning("GEMINI_API_KEY bulunamadı. Standart soru döndürülüyor.")
             return "Kariyer hedeflerinize ulaşmak için ne tür beceriler geliştirmeniz gerektiğini düşünüyorsunuz?"
         
-        # Soru-cevap geçmişi
-        qa_history = ""
-        for qa in previous_questions_answers:
-            qa_history += f"Soru {qa['question_number']}: {qa['question']}\nCevap: {qa['answer']}\n\n"
+        # Soru-cevap geçmişi (token bütçesine göre kırpılır)
+        qa_history = build_qa_history(previous_questions_answers, settings.QUESTION_HISTORY_TOKEN_BUDGET)
         
         prompt = f"""
         Kariyer danışmanı rolündesin. Aşağıda kullanıcının daha önce cevapladığı soru ve cevaplar bulunmaktadır:
@@ -61,89 +340,212 @@ async def generate_next_question(previous_questions_answers: List[Dict[str, Any]
         Sadece soruyu yaz, başka bir açıklama yapma.
         """
         
-        response = client.models.generate_content(
-            model=settings.GEMINI_MODEL,
-            contents=[prompt]
-        )
-        return response.text.strip()
+        return await _generate_text(prompt, "next_question", user_id)
+    except LLMOverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Sonraki soru oluşturma hatası: {e}")
         return "Kariyer hedeflerinize ulaşmak için ne tür beceriler geliştirmeniz gerektiğini düşünüyorsunuz?"
 
-async def generate_career_plan(questions_answers: List[Dict[str, Any]]) -> str:
-    """Kullanıcının cevaplarına dayalı olarak kişiselleştirilmiş bir kariyer planı oluşturur"""
+async def generate_career_plan(questions_answers: List[Dict[str, Any]], 
+                               raise_on_error: bool = False, 
+                               user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Kullanıcının cevaplarına dayalı olarak bölümlere ayrılmış kişiselleştirilmiş bir kariyer planı oluşturur.
+
+    raise_on_error True ise hata durumunda standart metin yerine istisna fırlatılır
+    (yeniden deneme yapan arka plan işleri için).
+    """
     try:
         if not settings.GEMINI_API_KEY:
             logger.warning("GEMINI_API_KEY bulunamadı. Standart kariyer planı döndürülüyor.")
-            return "Standart kariyer planı (API anahtarı eksik)"
+            return [make_section("recommendations", "Standart kariyer planı (API anahtarı eksik)")]
         
         # Soru-cevap geçmişi
         qa_content = ""
         for qa in questions_answers:
             qa_content += f"Soru: {qa['question']}\nCevap: {qa['answer']}\n\n"
         
+        section_list = "\n        ".join(
+            f'{index}. "## {section.title}" - {section.description}'
+            for index, section in enumerate(PLAN_SECTIONS, start=1)
+        )
         prompt = f"""
         Kariyer danışmanı rolündesin. Aşağıdaki soru-cevap geçmişine dayanarak, kullanıcı için 
         kişiselleştirilmiş, kapsamlı bir kariyer planı oluştur:
         
         {qa_content}
         
-        Kariyer planı şunları içermelidir:
-        1. Kullanıcının ilgi alanları, becerileri ve değerlerine dayalı kariyer önerileri
-        2. Önerilen kariyerler için gerekli eğitim ve beceri gereksinimleri
-        3. Kısa vadeli hedefler (6 ay - 1 yıl)
-        4. Orta vadeli hedefler (1-3 yıl)
-        5. Uzun vadeli hedefler (3-5 yıl)
-        6. Tavsiye edilen kaynaklar ve öğrenme yolları
+        Kariyer planı aşağıdaki bölümlerden oluşmalı ve bu sırayla yazılmalıdır:
+        {section_list}
         
-        Her bölüm için başlıklar kullan ve kullanıcının verdiği cevaplara dayalı olarak 
+        Her bölüme yukarıdaki başlığı "## " ile başlayan bir satır olarak aynen yaz; 
+        bölüm içinde alt başlık gerekiyorsa "###" veya kalın yazı kullan. Plan dışında 
+        giriş veya kapanış metni ekleme. Kullanıcının verdiği cevaplara dayalı olarak 
         olabildiğince kişiselleştirilmiş tavsiyeler ver.
         """
         
-        response = client.models.generate_content(
-            model=settings.GEMINI_MODEL,
-            contents=[prompt]
-        )
-        return response.text.strip()
+        text = await _generate_text(prompt, "career_plan", user_id)
+        sections = parse_plan_sections(text)
+        if not sections:
+            raise ValueError("Kariyer planı bölümlere ayrılamadı")
+        missing = [section.key for section in PLAN_SECTIONS 
+                   if section.key not in {parsed["key"] for parsed in sections}]
+        if missing:
+            logger.warning(f"Kariyer planında eksik bölümler: {', '.join(missing)}")
+        return sections
     except Exception as e:
         logger.error(f"Kariyer planı oluşturma hatası: {e}")
-        return "Kariyer planı oluşturulurken bir hata oluştu. Lütfen daha sonra tekrar deneyin."
+        if raise_on_error:
+            raise
+        return [make_section(
+            "recommendations", "Kariyer planı oluşturulurken bir hata oluştu. Lütfen daha sonra tekrar deneyin."
+        )]
+
+async def generate_plan_section(section_key: str, questions_answers: List[Dict[str, Any]],
+                                current_sections: List[Dict[str, Any]],
+                                user_id: Optional[int] = None) -> Dict[str, Any]:
+    """Kariyer planının tek bir bölümünü, diğer bölümleri bağlam olarak kullanarak yeniden oluşturur.
+
+    Planın tamamı yeniden üretilmez; hata durumunda istisna fırlatılır, mevcut
+    bölüm değiştirilmez.
+    """
+    if not settings.GEMINI_API_KEY:
+        raise RuntimeError("GEMINI_API_KEY bulunamadı. Plan bölümü oluşturulamıyor.")
+    
+    section = PLAN_SECTIONS_BY_KEY[section_key]
+    qa_history = build_qa_history(questions_answers, settings.QUESTION_HISTORY_TOKEN_BUDGET)
+    other_sections = truncate_to_tokens(
+        format_plan([item for item in current_sections if item["key"] != section_key]),
+        settings.CHAT_PLAN_TOKEN_BUDGET
+    )
+    
+    prompt = f"""
+    Kariyer danışmanı rolündesin. Aşağıda kullanıcının soru-cevap geçmişi ve kariyer planının 
+    diğer bölümleri bulunmaktadır:
+    
+    {qa_history}
+    
+    Planın diğer bölümleri:
+    {other_sections or "Planın başka bölümü yok."}
+    
+    Kariyer planının "{section.title}" bölümünü yeniden yaz. Bu bölüm şunu içermelidir: 
+    {section.description}.
+    Diğer bölümlerle tutarlı ol ve onları tekrar etme. Kullanıcının cevaplarına dayalı, 
+    kişiselleştirilmiş tavsiyeler ver. Sadece bölüm içeriğini yaz, bölüm başlığını ekleme.
+    """
+    
+    text = await _generate_text(prompt, "career_plan_section", user_id)
+    # Model yine de başlık eklediyse başlık satırı atlanır
+    lines = text.splitlines()
+    if lines and lines[0].lstrip().startswith(("#", "**")) and section_key_for_heading(lines[0]) == section_key:
+        text = "\n".join(lines[1:])
+    if not text.strip():
+        raise ValueError("Plan bölümü boş döndü")
+    return make_section(section_key, text)
+
+def _build_chat_prompt(user_query: str, career_plan: Optional[str], 
+                       conversation_history: List[Dict[str, Any]],
+                       conversation_summary: Optional[Dict[str, Any]] = None) -> str:
+    """Sohbet isteği için token bütçesine uygun prompt oluşturur"""
+    context = build_chat_context(user_query, career_plan, conversation_history, conversation_summary)
+    
+    summary_section = ""
+    if context.summary:
+        summary_section = f"""
+    Önceki konuşmanın özeti:
+    {context.summary}
+    """
+    
+    return f"""
+    Kariyer danışmanı rolündesin. Kullanıcı için oluşturulan kariyer planının ilgili bölümleri:
+    
+    {context.plan}
+    {summary_section}
+    Konuşma geçmişi:
+    {context.history}
+    
+    Kullanıcı şu soruyu sordu: "{user_query}"
+    
+    Bu soruya, kariyer planına ve konuşma geçmişine dayanarak yardımcı ve bilgilendirici bir şekilde yanıt ver.
+    Yanıtın, kullanıcının kariyer planını ilerletmesine yardımcı olacak özel tavsiyeleri içermelidir.
+    """
 
 async def process_user_query(user_id: int, user_query: str, career_plan: Optional[str], 
-                            conversation_history: List[Dict[str, Any]]) -> str:
+                            conversation_history: List[Dict[str, Any]],
+                            conversation_summary: Optional[Dict[str, Any]] = None) -> str:
     """Kullanıcının sorgusu için bir yanıt oluşturur"""
     try:
         if not settings.GEMINI_API_KEY:
             logger.warning("GEMINI_API_KEY bulunamadı. Standart yanıt döndürülüyor.")
-            return "API anahtarı eksik olduğu için yanıt üretilemedi."
+            return CHAT_NO_API_KEY_RESPONSE
         
-        # Konuşma geçmişi
-        chat_history = ""
-        for msg in reversed(conversation_history):
-            prefix = "Kullanıcı" if msg["is_user"] else "AI"
-            chat_history += f"{prefix}: {msg['message']}\n"
+        prompt = _build_chat_prompt(
+            user_query, career_plan, conversation_history, conversation_summary
+        )
+        return await _generate_text(prompt, "chat", user_id)
+    except LLMOverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Kullanıcı sorgusu işleme hatası: {e}")
+        return CHAT_ERROR_RESPONSE
+
+async def process_user_query_stream(user_id: int, user_query: str, career_plan: Optional[str], 
+                                    conversation_history: List[Dict[str, Any]],
+                                    conversation_summary: Optional[Dict[str, Any]] = None
+                                    ) -> AsyncIterator[str]:
+    """Kullanıcının sorgusu için yanıtı parça parça (token akışı) üretir.
+
+    Hiç parça üretilmeden hata olursa hazır hata yanıtı döndürülür; parçalar
+    gönderildikten sonra oluşan hata çağırana iletilir, böylece yarıda kesilen
+    yanıt tamamlanmış bir yanıtla karıştırılmaz.
+    """
+    produced = False
+    try:
+        if not settings.GEMINI_API_KEY:
+            logger.warning("GEMINI_API_KEY bulunamadı. Standart yanıt döndürülüyor.")
+            yield CHAT_NO_API_KEY_RESPONSE
+            return
         
-        career_plan_content = career_plan if career_plan else "Kariyer planı henüz oluşturulmadı."
+        prompt = _build_chat_prompt(
+            user_query, career_plan, conversation_history, conversation_summary
+        )
+        async for chunk in _generate_text_stream(prompt, "chat_stream", user_id):
+            produced = True
+            yield chunk
+    except Exception as e:
+        logger.error(f"Kullanıcı sorgusu akış hatası: {e}")
+        if produced:
+            raise
+        yield CHAT_ERROR_RESPONSE
+
+async def summarize_conversation(previous_summary: Optional[str], 
+                                 messages: List[Dict[str, Any]], 
+                                 user_id: Optional[int] = None) -> Optional[str]:
+    """Önceki özeti yeni mesajlarla birleştirerek güncel konuşma özetini oluşturur"""
+    try:
+        if not settings.GEMINI_API_KEY:
+            return None
         
-        prompt = f"""
-        Kariyer danışmanı rolündesin. Kullanıcı için aşağıdaki kariyer planı oluşturuldu:
+        new_messages = ""
+        for msg in messages:
+            prefix = "Kullanıcı" if msg["is_user"] else "AI"
+            new_messages += f"{prefix}: {msg['message']}\n"
         
-        {career_plan_content}
+        prompt = f"""
+        Bir kariyer danışmanlığı sohbetinin özetini güncelliyorsun.
         
-        Konuşma geçmişi:
-        {chat_history}
+        Mevcut özet:
+        {previous_summary or "Henüz özet yok."}
         
-        Kullanıcı şu soruyu sordu: "{user_query}"
+        Yeni mesajlar:
+        {truncate_to_tokens(new_messages, settings.SUMMARY_INPUT_TOKEN_BUDGET)}
         
-        Bu soruya, kariyer planına ve konuşma geçmişine dayanarak yardımcı ve bilgilendirici bir şekilde yanıt ver.
-        Yanıtın, kullanıcının kariyer planını ilerletmesine yardımcı olacak özel tavsiyeleri içermelidir.
+        Mevcut özeti yeni mesajlarla birleştirerek kullanıcının hedeflerini, sorularını, 
+        verilen önemli tavsiyeleri ve alınan kararları içeren kısa bir özet yaz.
+        Özet en fazla {settings.CHAT_SUMMARY_TOKEN_BUDGET // 2} kelime olsun. Sadece özeti yaz.
         """
         
-        response = client.models.generate_content(
-            model=settings.GEMINI_MODEL,
-            contents=[prompt]
-        )
-        return response.text.strip()
+        return await _generate_text(prompt, "summary", user_id)
     except Exception as e:
-        logger.error(f"Kullanıcı sorgusu işleme hatası: {e}")
-        return "Sorgunuz işlenirken bir hata oluştu. Lütfen daha sonra tekrar deneyin." 
\ No newline at end of file
+        logger.error(f"Konuşma özeti oluşturma hatası: {e}")
+        return None
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Union
+
+from fastapi import Request, Response, status
+
+from app.config.settings import get_settings
+
+# Ayarlar
+settings = get_settings()
+
+def make_etag(*parts: Any) -> str:
+    """Kaynağın kimliği ve sürümünden güçlü (strong) ETag oluşturur"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+def _to_utc(value: Union[str, datetime]) -> datetime:
+    """SQLite zaman damgasını (UTC, "YYYY-MM-DD HH:MM:SS") saniye hassasiyetinde datetime'a çevirir"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+def cache_headers(etag: str, last_modified: Optional[Union[str, datetime]]) -> Dict[str, str]:
+    """Yanıta eklenecek ETag, Last-Modified ve Cache-Control başlıkları.
+
+    Yanıtlar kullanıcıya özel olduğu için paylaşılan önbelleklerde saklanmaz
+    (private); HTTP_CACHE_MAX_AGE_SECONDS 0 ise istemci her seferinde koşullu
+    istekle doğrulama yapar (no-cache).
+    """
+    max_age = settings.HTTP_CACHE_MAX_AGE_SECONDS
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}" if max_age > 0 else "private, no-cache",
+    }
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(_to_utc(last_modified), usegmt=True)
+    return headers
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match listesinde ETag var mı (GET için zayıf karşılaştırma)"""
+    if header.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+def is_not_modified(request: Request, etag: str,
+                    last_modified: Optional[Union[str, datetime]]) -> bool:
+    """İstemcideki kopya güncel mi; If-None-Match varsa If-Modified-Since dikkate alınmaz"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _to_utc(last_modified) <= since
+    return False
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """Gövdesiz 304 yanıtı; doğrulama başlıkları tekrar gönderilir"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         last_modified: Optional[Union[str, datetime]]) -> Optional[Response]:
+    """Başlıkları yanıta ekler; istemcinin kopyası güncelse döndürülecek 304 yanıtını verir"""
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+    return None
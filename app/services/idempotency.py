@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from app.config.settings import get_settings
+from app.services.metrics import registry
+from app.database.database import (
+    get_idempotency_record,
+    prune_idempotency_keys,
+    release_idempotency_key,
+    reserve_idempotency_key,
+    save_idempotency_record
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# Yanıtın saklanan ilk yanıttan döndürüldüğünü belirten başlık
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+IDEMPOTENT_REQUESTS = registry.counter(
+    "idempotent_requests_total", "Idempotency-Key başlığıyla gelen istekler", ("result",)
+)
+
+_stores_since_prune = 0
+_background_tasks: Set["asyncio.Task[Any]"] = set()
+
+def request_hash(scope: str, payload: Any) -> str:
+    """Endpoint ve istek gövdesinden, anahtarın başka bir istekle kullanılıp kullanılmadığını ayırt eden özet"""
+    body = json.dumps([scope, jsonable_encoder(payload)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+def check_idempotency_key(idempotency_key: Optional[str]) -> Optional[str]:
+    """Idempotency-Key başlığını doğrular; geçersizse 400 döndürülür"""
+    if idempotency_key is None:
+        return None
+    key = idempotency_key.strip()
+    if not key or len(key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH or not key.isprintable():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key 1-{settings.IDEMPOTENCY_KEY_MAX_LENGTH} karakter uzunluğunda olmalıdır"
+        )
+    return key
+
+def _run_in_background(coroutine: Any) -> None:
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def run_idempotent(user_id: int, idempotency_key: Optional[str], scope: str, payload: Any,
+                         response: Response, operation: Callable[[], Awaitable[Any]]) -> Any:
+    """İşlemi anahtar başına bir kez çalıştırır; tekrarlanan istekte saklanan yanıtı döndürür.
+
+    Anahtar yoksa işlem doğrudan çalıştırılır. Anahtar işlemden önce
+    veritabanında ayrılır; böylece başka bir işçi sürecine gelen tekrar da,
+    işlem bitip yanıt saklanmadan çöken bir sürecin ardından gelen tekrar da
+    işlemi ikinci kez çalıştıramaz (ayırma IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+    sonra yeniden alınabilir). Yalnızca başarılı yanıtlar saklanır; hata alan
+    isteğin ayırması silinir ve aynı anahtarla yeniden denenebilir. Aynı anahtar
+    farklı bir istek gövdesiyle kullanılırsa 422, ilk istek hâlâ sürüyorsa 409
+    döndürülür.
+    """
+    key = check_idempotency_key(idempotency_key)
+    if key is None:
+        return await operation()
+
+    fingerprint = request_hash(scope, payload)
+    reserved = await reserve_idempotency_key(
+        user_id, key, fingerprint,
+        settings.IDEMPOTENCY_KEY_TTL_SECONDS, settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+    )
+    if not reserved:
+        stored = await get_idempotency_record(user_id, key, settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+        if stored and stored["request_hash"] != fingerprint:
+            IDEMPOTENT_REQUESTS.inc(result="mismatch")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Bu Idempotency-Key farklı bir istek için kullanılmış"
+            )
+        if not stored or stored["completed_at"] is None:
+            IDEMPOTENT_REQUESTS.inc(result="in_progress")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Bu Idempotency-Key ile gönderilen istek hâlâ işleniyor",
+                headers={"Retry-After": "1"}
+            )
+        IDEMPOTENT_REQUESTS.inc(result="replayed")
+        response.status_code = stored["status_code"]
+        response.headers[REPLAYED_HEADER] = "true"
+        return json.loads(stored["response"])
+
+    try:
+        result = await operation()
+    except BaseException:
+        await asyncio.shield(release_idempotency_key(user_id, key))
+        raise
+    # Yanıt gönderilmeden saklanır; istemci yanıtı alamayıp tekrar denerse aynı yanıtı alır
+    if not await save_idempotency_record(
+        user_id, key, fingerprint, response.status_code or status.HTTP_200_OK,
+        json.dumps(jsonable_encoder(result), ensure_ascii=False)
+    ):
+        logger.warning(f"Idempotency yanıtı saklanamadı, anahtar ayrılmış kalacak: {user_id}")
+    IDEMPOTENT_REQUESTS.inc(result="executed")
+
+    global _stores_since_prune
+    _stores_since_prune += 1
+    if _stores_since_prune >= settings.IDEMPOTENCY_PRUNE_EVERY:
+        _stores_since_prune = 0
+        _run_in_background(prune_idempotency_records())
+    return result
+
+async def prune_idempotency_records() -> None:
+    """Süresi dolmuş idempotency anahtarlarını siler"""
+    deleted = await prune_idempotency_keys(settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    if deleted:
+        logger.info(f"{deleted} süresi dolmuş idempotency anahtarı silindi")
+
+async def flush_idempotency_tasks() -> None:
+    """Devam eden temizlik görevlerinin bitmesini bekler (kapanışta)"""
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
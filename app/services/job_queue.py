@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config.settings import get_settings
+from app.database.database import (
+    claim_next_job,
+    complete_job,
+    create_job,
+    fail_job,
+    get_active_job,
+    get_job,
+    requeue_job
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# İş durumları
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+TERMINAL_JOB_STATUSES = (JOB_COMPLETED, JOB_FAILED)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+_workers: List["asyncio.Task[None]"] = []
+_wakeup = asyncio.Event()
+# Uzun sorgulama (long-poll) yapan istekler için iş başına olaylar
+_job_events: Dict[int, asyncio.Event] = {}
+
+def _notify_job(job_id: int) -> None:
+    """İş durumunu bekleyen istekleri uyandırır"""
+    event = _job_events.pop(job_id, None)
+    if event:
+        event.set()
+
+def retry_delay(attempts: int) -> float:
+    """Deneme sayısına göre rastgele sapmalı üstel bekleme süresini hesaplar"""
+    delay = settings.JOB_RETRY_BASE_DELAY_SECONDS * (2 ** max(attempts - 1, 0))
+    delay = min(delay, settings.JOB_RETRY_MAX_DELAY_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+async def enqueue_job(user_id: int, job_type: str) -> Optional[Dict[str, Any]]:
+    """İşi sıraya ekler; kullanıcının aynı türde aktif işi varsa onu döndürür"""
+    active_job = await get_active_job(user_id, job_type)
+    if active_job:
+        return active_job
+
+    job_id = await create_job(user_id, job_type, settings.JOB_MAX_ATTEMPTS)
+    if not job_id:
+        return None
+    _wakeup.set()
+    return await get_job(job_id)
+
+async def wait_for_job(job_id: int, timeout: float) -> Optional[Dict[str, Any]]:
+    """İş tamamlanana veya süre dolana kadar bekler ve son durumu döndürür"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(timeout, settings.JOB_LONG_POLL_MAX_SECONDS)
+    while True:
+        job = await get_job(job_id)
+        remaining = deadline - loop.time()
+        if not job or job["status"] in TERMINAL_JOB_STATUSES or remaining <= 0:
+            return job
+        event = _job_events.setdefault(job_id, asyncio.Event())
+        try:
+            # Başka bir işçi sürecinde çalışan işler için periyodik olarak da kontrol edilir
+            await asyncio.wait_for(
+                event.wait(), timeout=min(remaining, settings.JOB_POLL_INTERVAL_SECONDS)
+            )
+        except asyncio.TimeoutError:
+            pass
+
+async def _run_job(job: Dict[str, Any]) -> None:
+    """Tek bir işi çalıştırır ve sonucunu kaydeder"""
+    handler = _handlers.get(job["job_type"])
+    try:
+        if handler is None:
+            raise ValueError(f"Bilinmeyen iş türü: {job['job_type']}")
+        await handler(job)
+        await complete_job(job["id"])
+        logger.info(f"İş tamamlandı: {job['id']} ({job['job_type']})")
+    except asyncio.CancelledError:
+        # İşçi durduruluyor; iş bir sonraki başlatmada hemen tekrar alınabilsin ve
+        # yarıda kalan deneme hakkından düşülmesin
+        await requeue_job(job["id"])
+        raise
+    except Exception as e:
+        if job["attempts"] < job["max_attempts"]:
+            delay = retry_delay(job["attempts"])
+            logger.warning(
+                f"İş başarısız, {delay:.0f} sn sonra yeniden denenecek: {job['id']} ({e})"
+            )
+            await fail_job(job["id"], str(e), retry_delay_seconds=delay)
+        else:
+            logger.error(f"İş kalıcı olarak başarısız oldu: {job['id']} ({e})")
+            await fail_job(job["id"], str(e), retry_delay_seconds=None)
+    finally:
+        _notify_job(job["id"])
+
+async def _worker_loop(worker_number: int) -> None:
+    """Sıradaki işleri alıp çalıştıran işçi döngüsü"""
+    logger.info(f"İş işçisi başlatıldı: {worker_number}")
+    while True:
+        _wakeup.clear()
+        job = await claim_next_job(settings.JOB_STALE_AFTER_SECONDS)
+        if job:
+            _notify_job(job["id"])
+            await _run_job(job)
+            continue
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+async def start_job_workers(handlers: Dict[str, JobHandler]) -> None:
+    """İş işleyicilerini kaydeder ve işçi havuzunu başlatır"""
+    _handlers.update(handlers)
+    for worker_number in range(settings.JOB_WORKER_COUNT):
+        _workers.append(asyncio.create_task(_worker_loop(worker_number)))
+
+async def stop_job_workers() -> None:
+    """İşçi havuzunu durdurur; yarıda kalan işler yeniden başlatmada tekrar alınır"""
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
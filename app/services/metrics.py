@@ -0,0 +1,288 @@
+import functools
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+LabelValues = Tuple[str, ...]
+
+# Prometheus varsayılan süre aralıkları (saniye)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Gemini çağrıları saniyeler sürdüğü için daha geniş aralıklar
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    """Etiketli metriklerin ortak yapısı"""
+    metric_type = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    """Yalnızca artan sayaç"""
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+class Gauge(_Metric):
+    """Artıp azalabilen anlık değer (ör. devam eden istek sayısı)"""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Blok süresince değeri bir artırır"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+class Histogram(_Metric):
+    """Değerleri aralıklara (bucket) göre sayan dağılım; süre ölçümleri için kullanılır"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Etiket değerleri -> (aralık sayaçları, toplam, adet)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = ([0] * len(self.buckets), [0.0, 0.0])
+            self._values[key] = entry
+        counts, totals = entry
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        totals[0] += value
+        totals[1] += 1
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return int(entry[1][1]) if entry else 0
+
+    def sum(self, **labels: str) -> float:
+        entry = self._values.get(self._key(labels))
+        return entry[1][0] if entry else 0.0
+
+    def totals(self) -> Dict[LabelValues, Tuple[int, float]]:
+        """Etiket değerleri başına (adet, toplam) döndürür"""
+        return {key: (int(totals[1]), totals[0]) for key, (_, totals) in self._values.items()}
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Bloğun süresini ölçer"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, totals) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {int(totals[1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(totals[0])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {int(totals[1])}")
+        return lines
+
+class MetricsRegistry:
+    """Uygulama metriklerini tutar ve Prometheus metin biçiminde dışa aktarır"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+# Uygulama genelinde kullanılan metrik kaydı
+registry = MetricsRegistry()
+
+# HTTP istekleri
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "İşlenen HTTP isteği sayısı", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP isteği işleme süresi", ("method", "route")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Devam eden HTTP isteği sayısı"
+)
+
+# Gemini çağrıları
+LLM_CALLS = registry.counter(
+    "gemini_calls_total", "Gemini çağrısı sayısı", ("operation", "outcome")
+)
+LLM_CALL_DURATION = registry.histogram(
+    "gemini_call_duration_seconds", "Gemini çağrısı süresi", ("operation",), buckets=LLM_BUCKETS
+)
+LLM_QUEUE_WAIT = registry.histogram(
+    "gemini_queue_wait_seconds", "Gemini eşzamanlılık sınırında bekleme süresi", ("operation",)
+)
+LLM_CALLS_IN_FLIGHT = registry.gauge(
+    "gemini_calls_in_flight", "Devam eden Gemini çağrısı sayısı"
+)
+LLM_PROMPT_CHARS = registry.counter(
+    "gemini_prompt_chars_total", "Gemini'ye gönderilen prompt karakter sayısı", ("operation",)
+)
+LLM_RESPONSE_CHARS = registry.counter(
+    "gemini_response_chars_total", "Gemini'den alınan yanıt karakter sayısı", ("operation",)
+)
+LLM_TOKENS = registry.counter(
+    "gemini_tokens_total", "Gemini'nin bildirdiği token sayısı", ("operation", "kind")
+)
+
+# Veritabanı sorguları
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "Veritabanı işlevi süresi", ("query",)
+)
+DB_QUERIES_IN_FLIGHT = registry.gauge(
+    "db_queries_in_flight", "Devam eden veritabanı işlevi sayısı"
+)
+
+def timed_query(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Veritabanı işlevinin süresini işlev adıyla ölçen dekoratör"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        with DB_QUERIES_IN_FLIGHT.track(), DB_QUERY_DURATION.time(query=name):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+class MetricsMiddleware:
+    """Her HTTP isteğinin süresini ve durum kodunu rota şablonuna göre ölçen ASGI ara katmanı.
+
+    Rota etiketi olarak gerçek yol yerine şablon (ör. /career-plan/jobs/{job_id})
+    kullanılır; böylece etiket sayısı sınırlı kalır. Akış (SSE) yanıtlarında süre,
+    yanıtın son parçası gönderilene kadar ölçülür.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code: Optional[int] = None
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=route_path)
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=str(status_code or 500))
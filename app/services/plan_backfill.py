@@ -0,0 +1,197 @@
+"""Anketi tamamlamış tüm kullanıcıların kariyer planlarını yeniden oluşturan çevrimdışı araç.
+
+Plan promptu değiştiğinde kullanılır. Kullanıcılar veritabanından ID sırasıyla
+gruplar hâlinde okunur; her grubun cevapları tek sorguda alınır ve planlar
+sınırlı eşzamanlılıkla (isteğe bağlı dakika başı sınırla) oluşturulur. Grubun
+planları, hataları ve kaldığı yer tek işlemde yazılır; araç durdurulup aynı
+`--run-id` ile yeniden çalıştırıldığında kaldığı yerden devam eder. Planı
+oluşturulamayan kullanıcılar `--retry-failed` ile yeniden denenir.
+
+Canlı trafiği etkilememek için eşzamanlılık düşük tutulur ve her grup kısa bir
+yazma işlemiyle kaydedilir. Gemini devre kesicisi açıldığında kullanıcılar
+başarısız sayılmaz; beklenip yeniden denenir.
+
+Kullanım:
+    python -m app.services.plan_backfill --run-id plan-prompt-v2 --concurrency 4 --max-rpm 120
+    python -m app.services.plan_backfill --run-id plan-prompt-v2 --retry-failed
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.settings import get_settings
+from app.services.gemini_service import generate_career_plan
+from app.services.question_service import TOTAL_QUESTIONS
+from app.services.resilience import CircuitOpenError, LLMOverloadedError
+from app.services.usage import start_usage_recorder, stop_usage_recorder
+from app.database.database import (
+    connect_db,
+    count_completed_questionnaire_users,
+    disconnect_db,
+    finish_plan_backfill_run,
+    get_answers_for_users,
+    get_completed_questionnaire_users,
+    get_plan_backfill_failures,
+    init_db,
+    is_persistent_database,
+    save_plan_backfill_chunk,
+    start_plan_backfill_run
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# Hata mesajlarının saklanan en uzun hâli
+_MAX_ERROR_LENGTH = 500
+
+class RateLimiter:
+    """Gemini çağrılarının başlangıcını dakikada en fazla `per_minute` ile sınırlar (0: sınırsız)"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def _generate_plan(user_id: int, answers: List[Dict[str, Any]], semaphore: asyncio.Semaphore,
+                         limiter: RateLimiter) -> List[Dict[str, Any]]:
+    """Kullanıcının planını oluşturur; Gemini yoğunsa kullanıcı başarısız sayılmadan beklenir"""
+    async with semaphore:
+        while True:
+            await limiter.wait()
+            try:
+                return await generate_career_plan(answers, raise_on_error=True, user_id=user_id)
+            except (CircuitOpenError, LLMOverloadedError) as e:
+                logger.warning(f"Gemini yoğun, {settings.GEMINI_BREAKER_OPEN_SECONDS:.0f} sn beklenecek: {e}")
+                await asyncio.sleep(settings.GEMINI_BREAKER_OPEN_SECONDS)
+
+async def process_chunk(run_id: str, user_ids: List[int], semaphore: asyncio.Semaphore,
+                        limiter: RateLimiter, advance_checkpoint: bool) -> Tuple[int, int]:
+    """Bir grup kullanıcının planlarını oluşturup tek işlemde kaydeder; (başarılı, hatalı) döndürür"""
+    answers_by_user = await get_answers_for_users(user_ids)
+    results = await asyncio.gather(
+        *(_generate_plan(user_id, answers_by_user[user_id], semaphore, limiter) for user_id in user_ids),
+        return_exceptions=True
+    )
+
+    plans: List[Tuple[int, List[Dict[str, Any]]]] = []
+    failures: List[Tuple[int, str]] = []
+    for user_id, result in zip(user_ids, results):
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+        if isinstance(result, BaseException):
+            failures.append((user_id, f"{type(result).__name__}: {result}"[:_MAX_ERROR_LENGTH]))
+        else:
+            plans.append((user_id, result))
+
+    await save_plan_backfill_chunk(
+        run_id, plans, failures, last_user_id=user_ids[-1] if advance_checkpoint else None
+    )
+    return len(plans), len(failures)
+
+async def run_backfill(run_id: str, chunk_size: int, concurrency: int, max_rpm: float,
+                       limit: Optional[int] = None, retry_failed: bool = False) -> Dict[str, Any]:
+    """Çalıştırmayı kaldığı yerden sürdürür ve son durumunu döndürür"""
+    run = await start_plan_backfill_run(run_id)
+    if retry_failed:
+        after_user_id = 0
+        total = run["failed"]
+    else:
+        after_user_id = run["last_user_id"]
+        total = await count_completed_questionnaire_users(after_user_id, TOTAL_QUESTIONS)
+    if limit is not None:
+        total = min(total, limit)
+    logger.info(f"Plan yenileme '{run_id}': {total} kullanıcı işlenecek (son kullanıcı ID: {after_user_id})")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(max_rpm)
+    done = succeeded = failed = 0
+    start = time.monotonic()
+    while limit is None or done < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - done)
+        if retry_failed:
+            user_ids = await get_plan_backfill_failures(run_id, after_user_id, size)
+        else:
+            user_ids = await get_completed_questionnaire_users(after_user_id, TOTAL_QUESTIONS, size)
+        if not user_ids:
+            break
+
+        chunk_succeeded, chunk_failed = await process_chunk(
+            run_id, user_ids, semaphore, limiter, advance_checkpoint=not retry_failed
+        )
+        after_user_id = user_ids[-1]
+        done += len(user_ids)
+        succeeded += chunk_succeeded
+        failed += chunk_failed
+
+        elapsed = time.monotonic() - start
+        remaining = (total - done) * elapsed / done if total > done else 0.0
+        logger.info(
+            f"Plan yenileme '{run_id}': {done}/{total} kullanıcı, {succeeded} başarılı, {failed} hatalı "
+            f"({done * 60 / elapsed:.1f} plan/dk, kalan ~{remaining / 60:.0f} dk)"
+        )
+
+    # Tüm kullanıcılar işlendiyse çalıştırma tamamlandı olarak işaretlenir
+    if not retry_failed and (limit is None or done < limit):
+        return await finish_plan_backfill_run(run_id)
+    return await start_plan_backfill_run(run_id)
+
+async def main_async(args: argparse.Namespace) -> int:
+    await connect_db()
+    try:
+        await init_db()
+        if args.dry_run:
+            run = await start_plan_backfill_run(args.run_id)
+            total = await count_completed_questionnaire_users(run["last_user_id"], TOTAL_QUESTIONS)
+            print(f"'{args.run_id}': {total} kullanıcının planı yenilenecek, "
+                  f"{run['processed']} işlendi, {run['failed']} hatalı")
+            return 0
+
+        start_usage_recorder()
+        try:
+            run = await run_backfill(
+                args.run_id, args.chunk_size, args.concurrency, args.max_rpm,
+                limit=args.limit, retry_failed=args.retry_failed
+            )
+        finally:
+            await stop_usage_recorder()
+        print(f"'{run['run_id']}': {run['processed']} plan yenilendi, {run['failed']} hatalı kullanıcı"
+              + (", tamamlandı" if run["finished_at"] else ""))
+        return 1 if run["failed"] else 0
+    finally:
+        await disconnect_db()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Anketi tamamlamış kullanıcıların kariyer planlarını yeniden oluşturur")
+    parser.add_argument("--run-id", required=True, help="Çalıştırma adı; aynı adla yeniden çalıştırınca kaldığı yerden devam eder")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Tek işlemde kaydedilen kullanıcı sayısı")
+    parser.add_argument("--concurrency", type=int, default=4, help="Aynı anda oluşturulan plan sayısı")
+    parser.add_argument("--max-rpm", type=float, default=0, help="Dakika başına en fazla Gemini çağrısı (0: sınırsız)")
+    parser.add_argument("--limit", type=int, default=None, help="Bu çalıştırmada işlenecek en fazla kullanıcı")
+    parser.add_argument("--retry-failed", action="store_true", help="Yalnızca planı oluşturulamayan kullanıcıları yeniden dene")
+    parser.add_argument("--dry-run", action="store_true", help="Plan oluşturmadan işlenecek kullanıcı sayısını göster")
+    args = parser.parse_args()
+
+    if not is_persistent_database(settings.DATABASE_URL):
+        parser.error("Plan yenileme aracı kalıcı bir SQLite veritabanı gerektirir (DATABASE_URL)")
+    if not args.dry_run and not settings.GEMINI_API_KEY:
+        parser.error("GEMINI_API_KEY tanımlı değil; planlar oluşturulamaz")
+    raise SystemExit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
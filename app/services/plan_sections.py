@@ -0,0 +1,135 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.services.context_builder import split_plan_sections
+
+class PlanSection(NamedTuple):
+    """Kariyer planının sabit bir bölümü"""
+    key: str
+    title: str
+    description: str
+    keywords: Tuple[str, ...]
+
+# Kariyer planı bölümleri (plandaki sırasıyla)
+PLAN_SECTIONS: List[PlanSection] = [
+    PlanSection(
+        "recommendations", "Kariyer Önerileri",
+        "Kullanıcının ilgi alanları, becerileri ve değerlerine dayalı kariyer önerileri",
+        ("kariyer öneri", "öneri")
+    ),
+    PlanSection(
+        "skills", "Eğitim ve Beceri Gereksinimleri",
+        "Önerilen kariyerler için gerekli eğitim ve beceri gereksinimleri",
+        ("beceri", "eğitim")
+    ),
+    PlanSection(
+        "short_term_goals", "Kısa Vadeli Hedefler (6 ay - 1 yıl)",
+        "Kısa vadeli hedefler (6 ay - 1 yıl)",
+        ("kısa vade",)
+    ),
+    PlanSection(
+        "medium_term_goals", "Orta Vadeli Hedefler (1-3 yıl)",
+        "Orta vadeli hedefler (1-3 yıl)",
+        ("orta vade",)
+    ),
+    PlanSection(
+        "long_term_goals", "Uzun Vadeli Hedefler (3-5 yıl)",
+        "Uzun vadeli hedefler (3-5 yıl)",
+        ("uzun vade",)
+    ),
+    PlanSection(
+        "resources", "Kaynaklar ve Öğrenme Yolları",
+        "Tavsiye edilen kaynaklar ve öğrenme yolları",
+        ("kaynak", "öğrenme yol")
+    ),
+]
+PLAN_SECTIONS_BY_KEY: Dict[str, PlanSection] = {section.key: section for section in PLAN_SECTIONS}
+# Başlık eşleştirme sırası: özel anahtar kelimeler önce, "öneri" gibi genel kelimeler en son
+_MATCH_ORDER = [
+    PLAN_SECTIONS_BY_KEY[key] for key in (
+        "short_term_goals", "medium_term_goals", "long_term_goals",
+        "resources", "skills", "recommendations"
+    )
+]
+
+# Başlık satırındaki markdown işaretleri ("##", "**", "1.")
+_HEADING_MARKER_PATTERN = re.compile(r"^\s*(#{1,6}\s*|\d+[.)]\s*)|\*\*|:\s*$")
+
+def _normalize(text: str) -> str:
+    text = _HEADING_MARKER_PATTERN.sub("", text).strip()
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+def section_key_for_heading(heading: str) -> Optional[str]:
+    """Başlık satırının ait olduğu plan bölümünün anahtarını döndürür"""
+    normalized = _normalize(heading)
+    if not normalized:
+        return None
+    for section in _MATCH_ORDER:
+        if any(keyword in normalized for keyword in section.keywords):
+            return section.key
+    return None
+
+def make_section(key: str, content: str) -> Dict[str, Any]:
+    """Bölüm anahtarı ve içeriğinden kaydedilecek bölüm sözlüğünü oluşturur"""
+    section = PLAN_SECTIONS_BY_KEY[key]
+    return {
+        "key": section.key,
+        "title": section.title,
+        "position": PLAN_SECTIONS.index(section),
+        "content": content.strip()
+    }
+
+def _heading_level(title: str) -> int:
+    """Markdown başlığının düzeyi ("##" -> 2); markdown başlığı değilse 0"""
+    return len(title) - len(title.lstrip("#"))
+
+def _is_section_heading(title: str) -> bool:
+    """Bölüm başlığı olabilecek markdown başlığı ("#" veya "##")"""
+    return 1 <= _heading_level(title) <= 2
+
+def _is_subheading(title: str) -> bool:
+    """Prompt'ta alt başlıklar için istenen "###" ve daha derin başlıklar"""
+    return _heading_level(title) > 2
+
+def parse_plan_sections(text: str) -> List[Dict[str, Any]]:
+    """Gemini'nin ürettiği plan metnini sabit bölümlere ayırır.
+
+    Bölümleri yalnızca "##" başlıkları (bunlar yoksa kalın veya numaralı satırlar)
+    başlatır; "###" alt başlıkları ve tanınmayan başlıklar bulunduğu bölümün içeriğine
+    eklenir; ilk bölümden önceki giriş metni atlanır. Tanınan bölümler plandaki
+    sırasıyla döndürülür.
+    """
+    parts = split_plan_sections(text)
+    # Markdown başlıklarıyla bölüm bulunuyorsa kalın satırlar alt başlık sayılır
+    use_markdown_headings = any(
+        _is_section_heading(title) and section_key_for_heading(title) for title, _ in parts
+    )
+
+    contents: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for title, body in parts:
+        key = None
+        if title and not _is_subheading(title) and (
+                _is_section_heading(title) or not use_markdown_headings):
+            key = section_key_for_heading(title)
+        if key and key not in contents:
+            current = key
+            contents[key] = [body]
+        elif current:
+            contents[current].append(f"{title}\n{body}".strip())
+
+    return [
+        make_section(section.key, "\n\n".join(part for part in contents[section.key] if part))
+        for section in PLAN_SECTIONS
+        if section.key in contents
+    ]
+
+def format_plan(sections: List[Dict[str, Any]]) -> str:
+    """Bölümleri başlıklarıyla tek bir markdown metninde birleştirir"""
+    return "\n\n".join(f"## {section['title']}\n{section['content']}" for section in sections)
+
+def plan_text(plan: Dict[str, Any]) -> Optional[str]:
+    """Planın metni; bölümleri olmayan eski planlarda kaydedilen metin döndürülür"""
+    if plan["sections"]:
+        return format_plan(plan["sections"])
+    return plan["plan_content"] or None
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+from app.config.settings import get_settings
+from app.services.gemini_service import generate_first_question, generate_next_question
+from app.services.first_question_pool import take_first_question
+from app.database.database import get_pending_question, save_pending_question
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# Anketteki toplam soru sayısı
+TOTAL_QUESTIONS = 10
+
+# Arka planda hazırlanan sorular: (user_id, question_number) -> (context_hash, görev)
+_prefetch_tasks: Dict[Tuple[int, int], Tuple[str, "asyncio.Task[str]"]] = {}
+
+def answers_hash(answers: List[Dict[str, Any]]) -> str:
+    """Soru-cevap geçmişinin özetini (hash) döndürür"""
+    history = [(qa["question_number"], qa["question"], qa["answer"]) for qa in answers]
+    payload = json.dumps(history, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def _generate_and_store(user_id: int, answers: List[Dict[str, Any]], context_hash: str) -> str:
+    """Soruyu oluşturur ve bekleyen soru olarak kaydeder"""
+    question_number = len(answers) + 1
+    if question_number == 1:
+        # İlk soru önce hazır havuzdan alınır; havuz boşsa Gemini'ye sorulur
+        question = take_first_question() or await generate_first_question(user_id=user_id)
+    else:
+        question = await generate_next_question(answers, user_id=user_id)
+
+    # Eşzamanlı bir istek aynı soruyu önce kaydettiyse onun sorusu kullanılır
+    stored_question = await save_pending_question(user_id, question_number, question, context_hash)
+    return stored_question or question
+
+async def get_current_question(user_id: int, answers: List[Dict[str, Any]]) -> str:
+    """Kullanıcının cevaplaması gereken soruyu döndürür.
+
+    Soru her adım için yalnızca bir kez oluşturulur ve `pending_questions`
+    tablosunda saklanır; sonraki çağrılar aynı soruyu veritabanından okur.
+    Soru arka planda hazırlanıyorsa devam eden görev beklenir.
+    """
+    question_number = len(answers) + 1
+    context_hash = answers_hash(answers)
+
+    pending = await get_pending_question(user_id, question_number)
+    if pending and pending["context_hash"] == context_hash:
+        return pending["question"]
+
+    inflight = _prefetch_tasks.get((user_id, question_number))
+    if inflight:
+        prefetch_hash, task = inflight
+        if prefetch_hash == context_hash:
+            try:
+                # shield: istemci bağlantıyı kapatsa da arka plan görevi iptal edilmez
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # İsteğin kendisi iptal edildiyse iptal yayılır; yalnızca ön hazırlık
+                # görevi iptal edildiyse (yeni ön hazırlık veya kapanış) soru burada oluşturulur
+                if not task.cancelled():
+                    raise
+                logger.info("Soru ön hazırlığı iptal edildi, soru yeniden oluşturuluyor")
+        else:
+            # Cevap geçmişi değişmiş, eski ön hazırlık geçersiz
+            task.cancel()
+
+    return await _generate_and_store(user_id, answers, context_hash)
+
+def schedule_question_prefetch(user_id: int, answers: List[Dict[str, Any]]) -> None:
+    """Cevap kaydedildikten sonra bir sonraki soruyu arka planda hazırlamaya başlar"""
+    if not settings.QUESTION_PREFETCH_ENABLED:
+        return
+
+    question_number = len(answers) + 1
+    if question_number > TOTAL_QUESTIONS:
+        return
+
+    key = (user_id, question_number)
+    context_hash = answers_hash(answers)
+
+    inflight = _prefetch_tasks.get(key)
+    if inflight:
+        prefetch_hash, task = inflight
+        if prefetch_hash == context_hash:
+            return
+        task.cancel()
+        _prefetch_tasks.pop(key, None)
+
+    # İşçi başına arka plan işini sınırla
+    if len(_prefetch_tasks) >= settings.QUESTION_PREFETCH_MAX_TASKS:
+        logger.info("Soru ön hazırlık sınırına ulaşıldı, ön hazırlık atlanıyor")
+        return
+
+    task = asyncio.create_task(_generate_and_store(user_id, answers, context_hash))
+
+    def _on_done(finished: "asyncio.Task[str]") -> None:
+        current = _prefetch_tasks.get(key)
+        if current and current[1] is finished:
+            _prefetch_tasks.pop(key, None)
+        if not finished.cancelled() and finished.exception():
+            logger.error(f"Soru ön hazırlık hatası: {finished.exception()}")
+
+    task.add_done_callback(_on_done)
+    _prefetch_tasks[key] = (context_hash, task)
+
+async def cancel_question_prefetches() -> None:
+    """Devam eden tüm ön hazırlık görevlerini iptal eder"""
+    tasks = [task for _, task in _prefetch_tasks.values()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _prefetch_tasks.clear()
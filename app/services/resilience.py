@@ -0,0 +1,204 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Optional
+
+from fastapi import HTTPException, status
+from google.genai import errors
+
+from app.config.settings import get_settings
+from app.services.metrics import registry
+
+# Ayarlar
+settings = get_settings()
+
+# Devre kesici durumları
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_HALF_OPEN = "half_open"
+CIRCUIT_OPEN = "open"
+_CIRCUIT_STATE_VALUES = {CIRCUIT_CLOSED: 0, CIRCUIT_HALF_OPEN: 1, CIRCUIT_OPEN: 2}
+
+# "retryDelay": "12s" veya "1.5s" biçimindeki bekleme ipuçları
+_RETRY_DELAY_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)s\s*$")
+
+CIRCUIT_STATE = registry.gauge(
+    "gemini_circuit_state", "Gemini devre kesici durumu (0: kapalı, 1: yarı açık, 2: açık)"
+)
+LLM_RETRIES = registry.counter(
+    "gemini_retries_total", "Yeniden denenen Gemini çağrısı sayısı", ("operation",)
+)
+LLM_REJECTED = registry.counter(
+    "gemini_rejected_total", "Gemini'ye gönderilmeden reddedilen çağrı sayısı", ("reason",)
+)
+
+class CircuitOpenError(Exception):
+    """Devre kesici açıkken Gemini çağrısı yapılmaz; çağıran hazır yanıtı döndürür"""
+
+class LLMOverloadedError(HTTPException):
+    """Bekleyen Gemini çağrısı sınırı aşıldığında istek 503 ile reddedilir"""
+
+    def __init__(self, retry_after: float = 1.0):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI servisi şu anda yoğun. Lütfen biraz sonra tekrar deneyin.",
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))}
+        )
+
+class CircuitBreaker:
+    """Son çağrıların hata oranına göre Gemini çağrılarını geçici olarak durdurur.
+
+    Kapalı durumda son `window` çağrının en az `min_calls` tanesi bilindiğinde hata
+    oranı `failure_ratio` değerine ulaşırsa devre açılır. Açık durumda çağrılar
+    hemen reddedilir; `open_seconds` sonra tek bir deneme çağrısına izin verilir
+    (yarı açık). Deneme başarılıysa devre kapanır, başarısızsa yeniden açılır.
+    Yavaş çağrılar (`slow_call_seconds` üzeri) hata sayılır.
+    """
+
+    def __init__(self, window: int, min_calls: int, failure_ratio: float,
+                 open_seconds: float, slow_call_seconds: float):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = CIRCUIT_CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        CIRCUIT_STATE.set(_CIRCUIT_STATE_VALUES[self._state])
+
+    @property
+    def state(self) -> str:
+        if self._state == CIRCUIT_OPEN and self.retry_after() <= 0:
+            return CIRCUIT_HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> float:
+        """Devrenin yeniden deneme çağrısına izin vermesine kalan süre"""
+        if self._state != CIRCUIT_OPEN:
+            return 0.0
+        return max(self._opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_STATE.set(_CIRCUIT_STATE_VALUES[state])
+
+    def before_call(self) -> None:
+        """Çağrıya izin verilip verilmediğini kontrol eder; izin yoksa CircuitOpenError fırlatır"""
+        if self._state == CIRCUIT_CLOSED:
+            return
+        if self._state == CIRCUIT_OPEN:
+            if self.retry_after() > 0:
+                LLM_REJECTED.inc(reason="circuit_open")
+                raise CircuitOpenError("Gemini devre kesicisi açık")
+            self._set_state(CIRCUIT_HALF_OPEN)
+        # Yarı açık durumda aynı anda yalnızca bir deneme çağrısı yapılır
+        if self._probe_in_flight:
+            LLM_REJECTED.inc(reason="circuit_open")
+            raise CircuitOpenError("Gemini devre kesicisi yarı açık, deneme çağrısı sürüyor")
+        self._probe_in_flight = True
+
+    def record_success(self, duration: float) -> None:
+        if duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._outcomes.clear()
+            self._probe_in_flight = False
+            self._set_state(CIRCUIT_CLOSED)
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._probe_in_flight = False
+            self._trip()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if (self._state == CIRCUIT_CLOSED and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_ratio):
+            self._trip()
+
+    def record_ignored(self) -> None:
+        """Sonucu sayılmayan çağrı (ör. iptal); yarı açık denemenin kilidini kaldırır"""
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _trip(self) -> None:
+        self._opened_at = time.monotonic()
+        self._set_state(CIRCUIT_OPEN)
+
+class AdmissionController:
+    """Bekleyen ve çalışan Gemini çağrılarının toplamını sınırlar.
+
+    Sınır aşıldığında yeni çağrı kuyruğa alınmadan LLMOverloadedError ile
+    reddedilir; böylece yukarı akış yavaşladığında istekler birikmez.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+
+    def check(self) -> None:
+        """Yeni çağrı için yer olup olmadığını kontrol eder"""
+        if self.pending >= self.max_pending:
+            LLM_REJECTED.inc(reason="overloaded")
+            raise LLMOverloadedError()
+
+    def __enter__(self) -> "AdmissionController":
+        self.check()
+        self.pending += 1
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.pending -= 1
+
+def is_retryable(error: BaseException) -> bool:
+    """Geçici (yeniden denenebilir) Gemini hatalarını ayırt eder: 429, 5xx ve zaman aşımı"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if isinstance(error, errors.APIError):
+        return error.code == 429 or error.code >= 500
+    return False
+
+def retry_hint_seconds(error: BaseException) -> Optional[float]:
+    """429 yanıtındaki bekleme ipucunu (Retry-After başlığı veya RetryInfo) saniye olarak döndürür"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []) or []:
+            match = _RETRY_DELAY_PATTERN.match(str(detail.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    return None
+
+def retry_delay(error: BaseException, attempt: int) -> Optional[float]:
+    """Yeniden denemeden önce beklenecek süreyi döndürür; denenmemesi gerekiyorsa None.
+
+    Sunucunun verdiği bekleme ipucu varsa ona uyulur; ipucu izin verilen en uzun
+    beklemeyi aşıyorsa yeniden denenmez ve hata hemen döndürülür.
+    """
+    if attempt >= settings.GEMINI_MAX_RETRIES or not is_retryable(error):
+        return None
+
+    hint = retry_hint_seconds(error)
+    if hint is not None:
+        if hint > settings.GEMINI_RETRY_MAX_DELAY_SECONDS:
+            return None
+        return hint + random.uniform(0, settings.GEMINI_RETRY_BASE_DELAY_SECONDS)
+
+    delay = min(
+        settings.GEMINI_RETRY_BASE_DELAY_SECONDS * (2 ** attempt),
+        settings.GEMINI_RETRY_MAX_DELAY_SECONDS
+    )
+    return random.uniform(0, delay)
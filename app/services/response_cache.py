@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from cachetools import TTLCache
+
+from app.config.settings import get_settings
+from app.services.gemini_service import CHAT_FALLBACK_RESPONSES
+from app.services.metrics import registry
+from app.database.database import (
+    get_cached_chat_response,
+    prune_chat_response_cache,
+    save_cached_chat_response,
+    touch_cached_chat_response
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+CHAT_CACHE_REQUESTS = registry.counter(
+    "chat_cache_requests_total", "Sohbet yanıtı önbelleği sorguları", ("result",)
+)
+
+# Bellekteki önbellek: en az kullanılan kayıt önce atılır, süre dolunca kayıt geçersiz olur
+_memory_cache: TTLCache = TTLCache(
+    maxsize=settings.CHAT_CACHE_MAX_SIZE, ttl=settings.CHAT_CACHE_TTL_SECONDS
+)
+_stores_since_prune = 0
+_background_tasks: Set["asyncio.Task[Any]"] = set()
+
+def normalize_query(query: str) -> str:
+    """Soruyu karşılaştırma için normalleştirir: küçük harf, noktalama ve fazla boşluk olmadan"""
+    text = query.replace("I", "ı").replace("İ", "i").lower()
+    text = _PUNCTUATION_PATTERN.sub(" ", text)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def chat_cache_key(user_query: str, career_plan: Optional[str],
+                   conversation_history: List[Dict[str, Any]]) -> str:
+    """Normalleştirilmiş soru, plan içeriği ve son mesajlardan önbellek anahtarı üretir.
+
+    conversation_history en yeni mesaj başta olacak şekilde sıralıdır; yanıtlanan
+    soru zaten kaydedildiyse pencereye dahil edilmez.
+    """
+    history = conversation_history
+    if history and history[0]["is_user"] and history[0]["message"] == user_query:
+        history = history[1:]
+    window = [
+        (bool(msg["is_user"]), msg["message"])
+        for msg in history[:settings.CHAT_CACHE_CONTEXT_MESSAGES]
+    ]
+    window_hash = _text_hash(json.dumps(window, ensure_ascii=False))
+    payload = json.dumps(
+        [normalize_query(user_query), _text_hash(career_plan or ""), window_hash], ensure_ascii=False
+    )
+    return _text_hash(payload)
+
+def _run_in_background(coroutine: Any) -> None:
+    """Yanıtı bekletmemesi gereken önbellek yazmalarını arka planda çalıştırır"""
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def get_cached_response(cache_key: str) -> Optional[str]:
+    """Önbellekteki yanıtı döndürür; önce bellek, sonra veritabanı kontrol edilir"""
+    if not settings.CHAT_CACHE_ENABLED:
+        return None
+
+    response = _memory_cache.get(cache_key)
+    if response is not None:
+        CHAT_CACHE_REQUESTS.inc(result="hit_memory")
+        return response
+
+    response = await get_cached_chat_response(cache_key, settings.CHAT_CACHE_TTL_SECONDS)
+    if response is not None:
+        CHAT_CACHE_REQUESTS.inc(result="hit_db")
+        _memory_cache[cache_key] = response
+        _run_in_background(touch_cached_chat_response(cache_key))
+        return response
+
+    CHAT_CACHE_REQUESTS.inc(result="miss")
+    return None
+
+def store_cached_response(cache_key: str, response: str) -> None:
+    """Yanıtı önbelleğe ekler; veritabanı yazması ve temizlik arka planda yapılır.
+
+    Hata durumunda döndürülen hazır yanıtlar önbelleğe alınmaz.
+    """
+    global _stores_since_prune
+    if not settings.CHAT_CACHE_ENABLED or not response or response in CHAT_FALLBACK_RESPONSES:
+        return
+
+    _memory_cache[cache_key] = response
+    _run_in_background(save_cached_chat_response(cache_key, response))
+
+    _stores_since_prune += 1
+    if _stores_since_prune >= settings.CHAT_CACHE_PRUNE_EVERY:
+        _stores_since_prune = 0
+        _run_in_background(prune_response_cache())
+
+async def prune_response_cache() -> None:
+    """Süresi dolmuş ve satır sınırını aşan kayıtları veritabanından siler"""
+    deleted = await prune_chat_response_cache(
+        settings.CHAT_CACHE_TTL_SECONDS, settings.CHAT_CACHE_MAX_ROWS
+    )
+    if deleted:
+        logger.info(f"Sohbet yanıtı önbelleğinden {deleted} kayıt silindi")
+
+def record_cache_bypass() -> None:
+    """İstemcinin önbelleği kullanmamayı seçtiği istekleri sayar"""
+    CHAT_CACHE_REQUESTS.inc(result="bypass")
+
+async def flush_response_cache_writes() -> None:
+    """Bekleyen önbellek yazmalarının bitmesini bekler (kapanışta)"""
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
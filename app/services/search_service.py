@@ -0,0 +1,45 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import get_settings
+from app.database.database import search_user_content
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+# Aranabilecek kaynaklar
+SEARCH_SOURCES = ("conversations", "plans")
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def build_match_query(query: str) -> Optional[str]:
+    """Kullanıcının yazdığı metni güvenli bir FTS5 sorgusuna çevirir.
+
+    Kelimeler tırnak içine alınır (FTS5 operatörleri ve özel karakterler
+    yorumlanmaz) ve hepsinin geçmesi gerekir; yazarken arama için son kelime
+    önek olarak eşleşir. Aranacak kelime yoksa None döndürülür.
+    """
+    terms = _TERM_PATTERN.findall(query)[:settings.SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= settings.SEARCH_MIN_PREFIX_LENGTH:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+async def search_content(user_id: int, query: str, sources: List[str],
+                         limit: int, offset: int) -> Optional[List[Dict[str, Any]]]:
+    """Kullanıcının sohbet ve planlarında arama yapar; sorgu geçersizse None döndürür"""
+    match_terms = build_match_query(query)
+    if match_terms is None:
+        return None
+    results = await search_user_content(user_id, match_terms, sources, limit, offset)
+    for result in results:
+        if result["is_user"] is not None:
+            result["is_user"] = bool(result["is_user"])
+    return results
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException, status
+
+from app.config.settings import get_settings
+from app.services.metrics import LLM_TOKENS, registry
+from app.database.database import (
+    add_llm_usage,
+    get_llm_usage_by_operation,
+    get_top_llm_users,
+    get_user_llm_usage,
+    get_user_token_usage
+)
+
+# Loglama
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ayarlar
+settings = get_settings()
+
+USAGE_QUOTA_REJECTED = registry.counter(
+    "usage_quota_rejected_total", "Günlük token kotası aşıldığı için reddedilen istek sayısı"
+)
+
+# Kullanıcısız çağrılar (ör. ilk soru havuzu) özet tabloda bu ID ile tutulur
+SYSTEM_USER_ID = 0
+
+# Henüz yazılmamış kullanım: (gün, kullanıcı, işlem) -> [çağrı, prompt token, çıktı token, gecikme ms]
+_pending: Dict[Tuple[str, int, str], List[int]] = {}
+# Kota kontrolü için yazılmamış token toplamı: (gün, kullanıcı) -> token
+_pending_tokens: Dict[Tuple[str, int], int] = {}
+# Veritabanındaki günlük token toplamı: (gün, kullanıcı) -> token
+_daily_tokens: TTLCache = TTLCache(maxsize=10000, ttl=60)
+_flush_lock = asyncio.Lock()
+_flush_task: Optional["asyncio.Task[None]"] = None
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+def _since_day(days: int) -> str:
+    """Son `days` günün ilk günü (bugün dahil)"""
+    return (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+def _seconds_until_midnight() -> int:
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(int((midnight - now).total_seconds()) + 1, 1)
+
+def usage_cost(prompt_tokens: int, output_tokens: int) -> float:
+    """Token sayılarından tahmini maliyet (USD)"""
+    return round(
+        prompt_tokens * settings.GEMINI_INPUT_PRICE_PER_MILLION / 1_000_000
+        + output_tokens * settings.GEMINI_OUTPUT_PRICE_PER_MILLION / 1_000_000,
+        6
+    )
+
+def token_counts(usage_metadata: Any) -> Tuple[int, int]:
+    """Gemini yanıtındaki kullanım bilgisinden (prompt, çıktı) token sayıları.
+
+    Düşünme token'ları çıktı olarak ücretlendirildiği için çıktıya eklenir.
+    """
+    if usage_metadata is None:
+        return 0, 0
+    prompt_tokens = getattr(usage_metadata, "prompt_token_count", None) or 0
+    output_tokens = (getattr(usage_metadata, "candidates_token_count", None) or 0) + \
+        (getattr(usage_metadata, "thoughts_token_count", None) or 0)
+    return prompt_tokens, output_tokens
+
+def record_usage(operation: str, user_id: Optional[int], usage_metadata: Any, duration: float) -> None:
+    """Başarılı Gemini çağrısının token ve gecikme bilgisini bellekteki özete ekler.
+
+    Özet USAGE_FLUSH_INTERVAL_SECONDS aralıklarla tek işlemde veritabanına yazılır.
+    """
+    prompt_tokens, output_tokens = token_counts(usage_metadata)
+    LLM_TOKENS.inc(prompt_tokens, operation=operation, kind="prompt")
+    LLM_TOKENS.inc(output_tokens, operation=operation, kind="output")
+
+    day = _today()
+    user_key = user_id or SYSTEM_USER_ID
+    totals = _pending.setdefault((day, user_key, operation), [0, 0, 0, 0])
+    totals[0] += 1
+    totals[1] += prompt_tokens
+    totals[2] += output_tokens
+    totals[3] += int(duration * 1000)
+    _pending_tokens[(day, user_key)] = _pending_tokens.get((day, user_key), 0) + prompt_tokens + output_tokens
+
+async def flush_usage() -> None:
+    """Bellekteki kullanım özetini veritabanına yazar; yazılamazsa sonraki denemede tekrar eklenir"""
+    global _pending, _pending_tokens
+    async with _flush_lock:
+        if not _pending:
+            return
+        batch, _pending = _pending, {}
+        batch_tokens, _pending_tokens = _pending_tokens, {}
+        rows = [
+            (day, user_id, operation, *totals)
+            for (day, user_id, operation), totals in batch.items()
+        ]
+        if not await add_llm_usage(rows):
+            for key, totals in batch.items():
+                current = _pending.setdefault(key, [0, 0, 0, 0])
+                for index, value in enumerate(totals):
+                    current[index] += value
+            for key, tokens in batch_tokens.items():
+                _pending_tokens[key] = _pending_tokens.get(key, 0) + tokens
+            return
+        # Yazılan kullanıcıların veritabanı toplamı bir sonraki kontrolde yeniden okunur
+        for key in batch_tokens:
+            _daily_tokens.pop(key, None)
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.USAGE_FLUSH_INTERVAL_SECONDS)
+        try:
+            await flush_usage()
+        except Exception as e:
+            logger.error(f"Gemini kullanımı yazma hatası: {e}")
+
+def start_usage_recorder() -> None:
+    """Kullanım özetini düzenli aralıklarla yazan arka plan görevini başlatır"""
+    global _flush_task
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_loop())
+
+async def stop_usage_recorder() -> None:
+    """Arka plan görevini durdurur ve kalan kullanımı yazar (kapanışta)"""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        await asyncio.gather(_flush_task, return_exceptions=True)
+        _flush_task = None
+    await flush_usage()
+
+async def get_daily_tokens(user_id: int) -> int:
+    """Kullanıcının bugünkü token kullanımı (yazılmamış kullanım dahil)"""
+    key = (_today(), user_id)
+    stored = _daily_tokens.get(key)
+    if stored is None:
+        stored = await get_user_token_usage(user_id, key[0])
+        _daily_tokens[key] = stored
+    return stored + _pending_tokens.get(key, 0)
+
+async def check_usage_quota(user_id: int) -> None:
+    """Kullanıcı günlük token kotasını aştıysa 429 fırlatır (USER_DAILY_TOKEN_QUOTA 0 ise sınırsız).
+
+    Kota UTC gece yarısı sıfırlanır; devam eden çağrılar kota aşılsa da tamamlanır.
+    """
+    quota = settings.USER_DAILY_TOKEN_QUOTA
+    if quota <= 0:
+        return
+    if await get_daily_tokens(user_id) >= quota:
+        USAGE_QUOTA_REJECTED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Günlük AI kullanım kotanız doldu. Lütfen yarın tekrar deneyin.",
+            headers={"Retry-After": str(_seconds_until_midnight())}
+        )
+
+def _with_cost(row: Dict[str, Any]) -> Dict[str, Any]:
+    row["cost"] = usage_cost(row["prompt_tokens"], row["output_tokens"])
+    row["avg_latency_ms"] = round(row["latency_ms"] / row["calls"], 1) if row["calls"] else 0.0
+    return row
+
+def _totals(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    totals = {
+        key: sum(row[key] for row in rows)
+        for key in ("calls", "prompt_tokens", "output_tokens", "latency_ms")
+    }
+    return _with_cost(totals)
+
+async def get_user_usage(user_id: int, days: int) -> Dict[str, Any]:
+    """Kullanıcının son `days` gündeki gün ve işlem başına kullanımı, toplamı ve kota durumu"""
+    await flush_usage()
+    records = [_with_cost(row) for row in await get_user_llm_usage(user_id, _since_day(days))]
+    today_tokens = await get_daily_tokens(user_id)
+    quota = settings.USER_DAILY_TOKEN_QUOTA
+    return {
+        "days": days,
+        "records": records,
+        "totals": _totals(records),
+        "today_tokens": today_tokens,
+        "daily_quota": quota or None,
+        "remaining_tokens": max(quota - today_tokens, 0) if quota > 0 else None
+    }
+
+async def get_usage_summary(days: int, top_users: int) -> Dict[str, Any]:
+    """Son `days` gündeki işlem başına kullanım ve en çok token kullanan kullanıcılar"""
+    await flush_usage()
+    since_day = _since_day(days)
+    operations, users = await asyncio.gather(
+        get_llm_usage_by_operation(since_day), get_top_llm_users(since_day, top_users)
+    )
+    operations = sorted(
+        (_with_cost(row) for row in operations), key=lambda row: row["cost"], reverse=True
+    )
+    return {
+        "days": days,
+        "operations": operations,
+        "top_users": [_with_cost(row) for row in users],
+        "totals": _totals(operations)
+    }
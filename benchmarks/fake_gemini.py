@@ -0,0 +1,126 @@
+"""Ölçümler için Gemini API yerine kullanılan yerel, deterministik istemci.
+
+`google.genai.Client` arayüzünün uygulamanın kullandığı kısmını
+(`client.aio.models.generate_content` ve `generate_content_stream`) taklit eder.
+Gecikme, gecikme sapması ve hata oranları ayarlanabilir; aynı `seed` ile aynı
+yanıt ve hata dizisi üretilir. Gerçek API kotası harcanmaz.
+
+Kullanım:
+    from benchmarks.fake_gemini import FakeGeminiClient, install_fake_client
+    install_fake_client(FakeGeminiClient(latency=0.8, jitter=0.2, error_rate=0.01))
+"""
+import asyncio
+import random
+import types
+from typing import Any, AsyncIterator, List, Optional
+
+from google.genai import errors
+
+from app.services.plan_sections import PLAN_SECTIONS
+
+class FakeGeminiModels:
+    """`client.aio.models` yerine geçen sahte model arayüzü"""
+
+    def __init__(self, latency: float, jitter: float, error_rate: float,
+                 rate_limit_rate: float, seed: int, chunk_count: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.chunk_count = chunk_count
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _maybe_fail(self) -> None:
+        """Ayarlanan oranlarda 429 (kota) veya 503 (sunucu) hatası üretir"""
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            self.failures += 1
+            raise errors.ClientError(429, {"error": {
+                "code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Sahte kota aşımı"
+            }})
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.failures += 1
+            raise errors.ServerError(503, {"error": {
+                "code": 503, "status": "UNAVAILABLE", "message": "Sahte sunucu hatası"
+            }})
+
+    def _response_text(self, prompt: str) -> str:
+        """Prompt türüne göre uygulamanın beklediği biçimde yanıt üretir"""
+        number = self.calls
+        if "farklı ilk soru" in prompt:
+            return "\n".join(
+                f"{index + 1}. Kariyerinizde sizi en çok ne motive ediyor? ({number}-{index})"
+                for index in range(10)
+            )
+        if "kariyer planı oluştur" in prompt:
+            return "\n\n".join(
+                f"## {section.title}\n" + " ".join(["Bu bölümde yapılacak adımlar açıklanır."] * 8)
+                for section in PLAN_SECTIONS
+            )
+        if "bölümünü yeniden yaz" in prompt:
+            return " ".join([f"Bu bölüm yeniden yazıldı ({number})."] * 8)
+        if "özetini güncelliyorsun" in prompt:
+            return "Kullanıcı kariyer hedeflerini ve geliştirmek istediği becerileri konuştu."
+        if "sonraki soruyu" in prompt or "ilk soruyu" in prompt:
+            return f"Hangi çalışma ortamında kendinizi daha verimli hissediyorsunuz? ({number})"
+        return "Planınızdaki ilk adım olarak temel becerilerinizi güçlendirmenizi öneririm."
+
+    @staticmethod
+    def _response(text: str, prompt: str) -> Any:
+        prompt_tokens = len(prompt) // 4 + 1
+        output_tokens = len(text) // 4 + 1
+        return types.SimpleNamespace(
+            text=text,
+            usage_metadata=types.SimpleNamespace(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens
+            )
+        )
+
+    async def generate_content(self, model: str, contents: List[str], config: Optional[Any] = None) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        self._maybe_fail()
+        prompt = "\n".join(str(part) for part in contents)
+        return self._response(self._response_text(prompt), prompt)
+
+    async def generate_content_stream(self, model: str, contents: List[str],
+                                      config: Optional[Any] = None) -> AsyncIterator[Any]:
+        self.calls += 1
+        self._maybe_fail()
+        prompt = "\n".join(str(part) for part in contents)
+        words = self._response_text(prompt).split(" ")
+        size = max(len(words) // self.chunk_count, 1)
+        chunks = [" ".join(words[start:start + size]) + " " for start in range(0, len(words), size)]
+        delay = self._delay() / len(chunks)
+
+        async def stream() -> AsyncIterator[Any]:
+            # Gerçek API'de olduğu gibi her parçanın kullanım bilgisi o ana kadarki toplamı gösterir
+            streamed = ""
+            for chunk in chunks:
+                await asyncio.sleep(delay)
+                streamed += chunk
+                response = self._response(streamed, prompt)
+                response.text = chunk
+                yield response
+
+        return stream()
+
+class FakeGeminiClient:
+    """`google.genai.Client` yerine geçen sahte istemci"""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 42, chunk_count: int = 8):
+        self.models = FakeGeminiModels(latency, jitter, error_rate, rate_limit_rate, seed, chunk_count)
+        self.aio = types.SimpleNamespace(models=self.models)
+
+def install_fake_client(client: FakeGeminiClient) -> None:
+    """gemini_service içindeki istemciyi sahte istemciyle değiştirir"""
+    from app.services import gemini_service
+    gemini_service.client = client
@@ -0,0 +1,217 @@
+"""Sahte Gemini istemcisiyle uçtan uca kullanıcı yolculuklarını çalıştıran yük testi.
+
+Her sanal kullanıcı şu yolculuğu izler: anket durumu → 10 soru/cevap → kariyer
+planı oluşturma (iş tamamlanana kadar beklenir) → N sohbet mesajı. Yolculuklar
+belirtilen eşzamanlılıkla FastAPI uygulamasına süreç içinde (ASGI) gönderilir;
+geçici bir veritabanı kullanılır ve Gemini kotası harcanmaz. `--memory` ile
+veriler bellekte tutulur; disk G/Ç'si olmadan HTTP ve Gemini yükü ölçülür.
+
+Rapor: toplam süre, yolculuk ve istek verimi, endpoint başına p50/p95/p99
+gecikme ve hata sayısı, veritabanı ve Gemini'de geçen süre.
+
+Kullanım:
+    python -m benchmarks.load_test --users 50 --concurrency 10 --chat-turns 3 \\
+        --latency 0.5 --jitter 0.2 --error-rate 0.01
+    python -m benchmarks.load_test --users 200 --concurrency 50 --latency 0 --jitter 0 --memory
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# Uygulama ayarları içe aktarılmadan önce belirlenmeli: anahtar yoksa Gemini çağrıları atlanır
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import httpx
+
+from app.config.settings import get_settings
+from app.database.database import MEMORY_URL_PREFIX
+from app.services.metrics import DB_QUERY_DURATION, LLM_CALL_DURATION, LLM_QUEUE_WAIT
+from benchmarks.fake_gemini import FakeGeminiClient, install_fake_client
+from main import app
+
+# Endpoint başına ölçülen süreler (saniye) ve hata sayıları
+Timings = Dict[str, List[float]]
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Sıralı değerlerden en yakın sıra yöntemiyle yüzdelik değeri döndürür"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+class JourneyRunner:
+    """Kullanıcı yolculuklarını çalıştırır ve endpoint sürelerini toplar"""
+
+    def __init__(self, client: httpx.AsyncClient, chat_turns: int, stream_chat: bool):
+        self.client = client
+        self.chat_turns = chat_turns
+        self.stream_chat = stream_chat
+        self.timings: Timings = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.completed = 0
+        self.failed = 0
+
+    async def _request(self, name: str, method: str, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[name] += 1
+            return None
+        finally:
+            self.timings[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    async def _stream_chat(self, email: str, message: str) -> None:
+        name = "POST /career-plan/chat/stream"
+        start = time.perf_counter()
+        try:
+            async with self.client.stream(
+                "POST", "/career-plan/chat/stream", params={"email": email}, json={"message": message}
+            ) as response:
+                async for _ in response.aiter_bytes():
+                    pass
+                if response.status_code >= 400:
+                    self.errors[name] += 1
+        except Exception:
+            self.errors[name] += 1
+        finally:
+            self.timings[name].append(time.perf_counter() - start)
+
+    async def run_journey(self, email: str) -> None:
+        """Tek bir kullanıcının anketten sohbete kadar tüm yolculuğu"""
+        try:
+            await self._request("GET /questionnaire/status", "GET", "/questionnaire/status",
+                                params={"email": email})
+            for number in range(1, 11):
+                response = await self._request("GET /questionnaire/question", "GET",
+                                               "/questionnaire/question", params={"email": email})
+                if response is None or response.status_code != 200:
+                    raise RuntimeError("Soru alınamadı")
+                question_number = response.json()["question_number"]
+                response = await self._request(
+                    "POST /questionnaire/answer", "POST", "/questionnaire/answer",
+                    params={"email": email, "question_number": question_number},
+                    json={"answer": f"Veri analizi ve yazılım geliştirmeyle ilgileniyorum ({number})"}
+                )
+                if response is None or response.status_code != 200:
+                    raise RuntimeError("Cevap kaydedilemedi")
+
+            response = await self._request("POST /career-plan/generate", "POST",
+                                           "/career-plan/generate", params={"email": email})
+            if response is None or response.status_code != 202:
+                raise RuntimeError("Plan işi oluşturulamadı")
+            job_id = response.json()["job_id"]
+            while True:
+                response = await self._request(
+                    "GET /career-plan/jobs/{job_id}", "GET", f"/career-plan/jobs/{job_id}",
+                    params={"email": email, "wait": 30}
+                )
+                if response is None or response.status_code != 200:
+                    raise RuntimeError("İş durumu alınamadı")
+                job_status = response.json()["status"]
+                if job_status == "failed":
+                    raise RuntimeError("Plan oluşturulamadı")
+                if job_status == "completed":
+                    break
+
+            for turn in range(self.chat_turns):
+                message = f"Planımdaki beceri geliştirme adımlarını açar mısın? ({turn})"
+                if self.stream_chat:
+                    await self._stream_chat(email, message)
+                else:
+                    await self._request("POST /career-plan/chat", "POST", "/career-plan/chat",
+                                        params={"email": email}, json={"message": message})
+            self.completed += 1
+        except Exception:
+            self.failed += 1
+
+async def run(users: int, concurrency: int, chat_turns: int, stream_chat: bool,
+              fake_client: FakeGeminiClient) -> None:
+    # Uygulama, veritabanını çalışma dizinine açar; ölçüm geçici bir dizinde yapılır
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        install_fake_client(fake_client)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                         timeout=120) as client:
+                runner = JourneyRunner(client, chat_turns, stream_chat)
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def journey(user_number: int) -> None:
+                    async with semaphore:
+                        await runner.run_journey(f"benchmark{user_number}@example.com")
+
+                start = time.perf_counter()
+                await asyncio.gather(*(journey(number) for number in range(users)))
+                elapsed = time.perf_counter() - start
+        os.chdir(working_directory)
+
+    report(runner, elapsed, fake_client, DB_QUERY_DURATION.totals(),
+           LLM_CALL_DURATION.totals(), LLM_QUEUE_WAIT.totals())
+
+def report(runner: JourneyRunner, elapsed: float, fake_client: FakeGeminiClient,
+           db_totals: Dict[Any, Any], llm_totals: Dict[Any, Any], queue_totals: Dict[Any, Any]) -> None:
+    total_requests = sum(len(values) for values in runner.timings.values())
+    print(f"Süre: {elapsed:.2f} sn")
+    print(f"Yolculuk: {runner.completed} tamamlandı, {runner.failed} başarısız "
+          f"({runner.completed / elapsed:.2f} yolculuk/sn)")
+    print(f"İstek: {total_requests} ({total_requests / elapsed:.1f} istek/sn)")
+    print(f"Gemini: {fake_client.models.calls} çağrı, {fake_client.models.failures} sahte hata")
+    print()
+
+    print(f"{'endpoint':<36} {'adet':>6} {'hata':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name in sorted(runner.timings):
+        values = runner.timings[name]
+        print(
+            f"{name:<36} {len(values):>6} {runner.errors.get(name, 0):>5} "
+            f"{percentile(values, 0.50) * 1000:>9.1f} "
+            f"{percentile(values, 0.95) * 1000:>9.1f} "
+            f"{percentile(values, 0.99) * 1000:>9.1f}"
+        )
+    print()
+
+    db_count = sum(count for count, _ in db_totals.values())
+    db_seconds = sum(total for _, total in db_totals.values())
+    print(f"Veritabanı: {db_count} işlev çağrısı, toplam {db_seconds:.2f} sn")
+    for (query,), (count, total) in sorted(db_totals.items(), key=lambda item: -item[1][1])[:8]:
+        print(f"  {query:<34} {count:>6} çağrı {total * 1000 / count:>8.2f} ms ort.")
+
+    llm_seconds = sum(total for _, total in llm_totals.values())
+    queue_seconds = sum(total for _, total in queue_totals.values())
+    print(f"Gemini: toplam {llm_seconds:.2f} sn çağrı, {queue_seconds:.2f} sn eşzamanlılık sınırında bekleme")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sahte Gemini ile uçtan uca yük testi")
+    parser.add_argument("--users", type=int, default=20, help="Toplam sanal kullanıcı sayısı")
+    parser.add_argument("--concurrency", type=int, default=10, help="Aynı anda çalışan yolculuk sayısı")
+    parser.add_argument("--chat-turns", type=int, default=3, help="Kullanıcı başına sohbet mesajı")
+    parser.add_argument("--stream", action="store_true", help="Sohbeti SSE endpoint'i ile yap")
+    parser.add_argument("--latency", type=float, default=0.5, help="Gemini çağrı gecikmesi (sn)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Gecikme sapması (± sn)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 hata oranı (0-1)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 hata oranı (0-1)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--memory", action="store_true", help="Verileri diske yazmadan bellekte tut")
+    args = parser.parse_args()
+
+    if args.memory:
+        get_settings().DATABASE_URL = MEMORY_URL_PREFIX
+
+    fake_client = FakeGeminiClient(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, seed=args.seed
+    )
+    asyncio.run(run(args.users, args.concurrency, args.chat_turns, args.stream, fake_client))
+
+if __name__ == "__main__":
+    main()
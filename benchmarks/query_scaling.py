@@ -0,0 +1,106 @@
+"""Kullanıcı bazlı sorguların satır sayısı arttıkça nasıl ölçeklendiğini ölçer.
+
+Geçici bir SQLite veritabanı, indeksler olmadan (şema sürümü 3) ve indekslerle
+(son şema sürümü) farklı satır sayılarıyla doldurulur; `get_user_answers`,
+`get_career_plan` ve `get_conversation_history` sorgularının ortalama süresi
+raporlanır.
+
+Kullanım:
+    python -m benchmarks.query_scaling --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiosqlite
+
+from app.database.migrations import run_migrations
+
+# Ölçülen sorgular (app/database/database.py ile aynı)
+QUERIES: Dict[str, str] = {
+    "get_user_answers": """
+        SELECT question_number, question, answer 
+        FROM questionnaire 
+        WHERE user_id = ? 
+        ORDER BY question_number
+    """,
+    "get_career_plan": """
+        SELECT plan_content FROM career_plans 
+        WHERE user_id = ? 
+        ORDER BY created_at DESC LIMIT 1
+    """,
+    "get_conversation_history": """
+        SELECT message, is_user, created_at 
+        FROM conversations 
+        WHERE user_id = ? 
+        ORDER BY created_at DESC 
+        LIMIT 10
+    """,
+}
+
+# İndeks geçişinden önceki şema sürümü
+UNINDEXED_SCHEMA_VERSION = 3
+
+async def populate(db: aiosqlite.Connection, rows: int) -> int:
+    """Tabloları yaklaşık `rows` satırla doldurur ve kullanıcı sayısını döndürür"""
+    users = max(rows // 20, 1)
+    await db.executemany(
+        "INSERT INTO users (id, email) VALUES (?, ?)",
+        ((user_id, f"user{user_id}@example.com") for user_id in range(1, users + 1))
+    )
+    await db.executemany(
+        "INSERT INTO questionnaire (user_id, question_number, question, answer) VALUES (?, ?, ?, ?)",
+        ((user_id, number, f"Soru {number}", f"Cevap {number}")
+         for user_id in range(1, users + 1) for number in range(1, 11))
+    )
+    await db.executemany(
+        "INSERT INTO career_plans (user_id, plan_content, created_at) VALUES (?, ?, datetime('now', ?))",
+        ((user_id, "Kariyer planı", f"-{user_id % 100} minutes") for user_id in range(1, users + 1))
+    )
+    await db.executemany(
+        "INSERT INTO conversations (user_id, message, is_user, created_at) VALUES (?, ?, ?, datetime('now', ?))",
+        ((user_id, f"Mesaj {number}", number % 2 == 0, f"-{number} seconds")
+         for user_id in range(1, users + 1) for number in range(10))
+    )
+    await db.commit()
+    return users
+
+async def measure(rows: int, schema_version: Optional[int], repeats: int) -> Dict[str, float]:
+    """Verilen şema sürümü ve satır sayısı için sorgu başına ortalama süreyi (ms) ölçer"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.db")
+        async with aiosqlite.connect(path) as db:
+            await run_migrations(db, target_version=schema_version)
+            users = await populate(db, rows)
+            user_ids = [random.randint(1, users) for _ in range(repeats)]
+
+            results: Dict[str, float] = {}
+            for name, query in QUERIES.items():
+                start = time.perf_counter()
+                for user_id in user_ids:
+                    async with db.execute(query, (user_id,)) as cursor:
+                        await cursor.fetchall()
+                results[name] = (time.perf_counter() - start) * 1000 / repeats
+            return results
+
+async def main(sizes: List[int], repeats: int) -> None:
+    header = f"{'satır':>10} {'şema':>10} " + " ".join(f"{name:>26}" for name in QUERIES)
+    print(header)
+    for rows in sizes:
+        for label, version in (("indekssiz", UNINDEXED_SCHEMA_VERSION), ("indeksli", None)):
+            results = await measure(rows, version, repeats)
+            print(
+                f"{rows:>10} {label:>10} "
+                + " ".join(f"{results[name]:>23.3f} ms" for name in QUERIES)
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sorgu ölçeklenme ölçümü")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeats))
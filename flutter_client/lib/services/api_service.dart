@@ -84,11 +84,29 @@ class ApiService {
       Uri.parse('$baseUrl/career-plan/generate?email=$email'),
     );
 
-    if (response.statusCode == 200) {
-      return SuccessResponse.fromJson(jsonDecode(utf8.decode(response.bodyBytes)));
-    } else {
+    if (response.statusCode != 202 && response.statusCode != 200) {
       throw Exception('Kariyer planı oluşturulamadı: ${response.body}');
     }
+
+    // Plan arka planda oluşturulur; iş bitene kadar durum sorgulanır (long-poll)
+    final jobId = jsonDecode(utf8.decode(response.bodyBytes))['job_id'];
+    while (true) {
+      final jobResponse = await client.get(
+        Uri.parse('$baseUrl/career-plan/jobs/$jobId?email=$email&wait=25'),
+      );
+
+      if (jobResponse.statusCode != 200) {
+        throw Exception('Kariyer planı durumu alınamadı: ${jobResponse.body}');
+      }
+
+      final job = jsonDecode(utf8.decode(jobResponse.bodyBytes));
+      if (job['status'] == 'completed') {
+        return SuccessResponse(success: true, message: job['progress'] ?? 'Tamamlandı');
+      }
+      if (job['status'] == 'failed') {
+        throw Exception('Kariyer planı oluşturulamadı: ${job['error']}');
+      }
+    }
   }
 
   Future<CareerPlan> getCareerPlan() async {
@@ -1,12 +1,22 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
 from contextlib import asynccontextmanager
 
-from app.routers import questionnaire, career_plan
-from app.database.database import init_db
+from app.routers import admin, questionnaire, career_plan
+from app.database.database import connect_db, disconnect_db, init_db
 from app.config.settings import get_settings
+from app.services.question_service import cancel_question_prefetches
+from app.services.job_queue import start_job_workers, stop_job_workers
+from app.services.career_plan_service import CAREER_PLAN_JOB, run_career_plan_job
+from app.services.conversation_summary import cancel_summary_updates
+from app.services.chat_service import flush_chat_writes
+from app.services.first_question_pool import start_first_question_pool, stop_first_question_pool
+from app.services.metrics import MetricsMiddleware, registry
+from app.services.response_cache import flush_response_cache_writes, prune_response_cache
+from app.services.idempotency import flush_idempotency_tasks, prune_idempotency_records
+from app.services.usage import start_usage_recorder, stop_usage_recorder
 
 # Loglama yapılandırması
 logging.basicConfig(level=logging.INFO)
@@ -20,11 +30,26 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     # Başlangıç
     logger.info("Uygulama başlatılıyor...")
+    await connect_db()
     await init_db()
     logger.info("Veritabanı başlatıldı")
+    await start_first_question_pool()
+    await prune_response_cache()
+    await prune_idempotency_records()
+    start_usage_recorder()
+    await start_job_workers({CAREER_PLAN_JOB: run_career_plan_job})
     yield
     # Kapanış
     logger.info("Uygulama kapatılıyor...")
+    await stop_job_workers()
+    await cancel_question_prefetches()
+    await flush_chat_writes()
+    await cancel_summary_updates()
+    await stop_first_question_pool()
+    await flush_response_cache_writes()
+    await flush_idempotency_tasks()
+    await stop_usage_recorder()
+    await disconnect_db()
 
 # FastAPI uygulamasını oluştur
 app = FastAPI(
@@ -43,6 +68,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# İstek süresi ve durum kodu metrikleri
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Genel istisna işleyici
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
@@ -55,6 +84,7 @@ async def general_exception_handler(request: Request, exc: Exception):
 # Yönlendiricileri ekle
 app.include_router(questionnaire.router)
 app.include_router(career_plan.router)
+app.include_router(admin.router)
 
 # Ana sayfa
 @app.get("/")
@@ -70,6 +100,13 @@ async def root():
 async def health_check():
     return {"status": "OK", "app_version": settings.APP_VERSION}
 
+# Prometheus metrikleri
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Metrikler devre dışı", status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Direkt çalışırsa
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,49 @@
+"""Kariyer planı metninin sabit bölümlere ayrılmasını doğrular.
+
+Çalıştırma: python -m pytest -q tests
+"""
+from app.services.plan_sections import parse_plan_sections
+
+_PLAN_WITH_SUBHEADINGS = """Kişiselleştirilmiş kariyer planınız aşağıdadır.
+
+## Kariyer Önerileri
+Veri analisti ve yazılım geliştirici rolleri size uygun.
+### Kısa Vadeli Öneriler
+Bir staj başvurusu yapın.
+
+## Eğitim ve Beceri Gereksinimleri
+Python ve SQL öğrenin.
+### Önerilen Eğitim Kaynakları
+Çevrim içi kurslar.
+#### Uzun vadede faydalı beceriler
+İstatistik.
+
+## Kısa Vadeli Hedefler (6 ay - 1 yıl)
+İlk projenizi tamamlayın.
+
+## Kaynaklar ve Öğrenme Yolları
+Açık kaynak projelere katkı verin.
+"""
+
+def test_subheadings_stay_in_their_section():
+    sections = {section["key"]: section for section in parse_plan_sections(_PLAN_WITH_SUBHEADINGS)}
+
+    assert list(sections) == ["recommendations", "skills", "short_term_goals", "resources"]
+    assert "### Kısa Vadeli Öneriler\nBir staj başvurusu yapın." in sections["recommendations"]["content"]
+    assert "### Önerilen Eğitim Kaynakları\nÇevrim içi kurslar." in sections["skills"]["content"]
+    assert "#### Uzun vadede faydalı beceriler\nİstatistik." in sections["skills"]["content"]
+    assert sections["short_term_goals"]["content"] == "İlk projenizi tamamlayın."
+    assert sections["resources"]["content"] == "Açık kaynak projelere katkı verin."
+
+def test_bold_headings_are_used_without_markdown_sections():
+    plan = """**Kariyer Önerileri**
+Veri analisti.
+
+**Eğitim ve Beceri Gereksinimleri**
+### Kaynak önerileri
+Python öğrenin.
+"""
+    sections = parse_plan_sections(plan)
+
+    assert [section["key"] for section in sections] == ["recommendations", "skills"]
+    assert "### Kaynak önerileri\nPython öğrenin." in sections[1]["content"]
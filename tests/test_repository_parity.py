@@ -0,0 +1,147 @@
+"""SQLite ve bellek depolarının aynı çağrılara aynı sonuçları verdiğini doğrular.
+
+Çalıştırma: python -m pytest -q tests
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.database.memory_repository import MemoryRepository
+from app.database.migrations import run_migrations
+from app.database.pool import ConnectionPool
+from app.database.repository import Repository
+from app.database.sqlite_repository import SQLiteRepository
+from app.database.write_buffer import WriteBuffer
+from app.services.plan_sections import PLAN_SECTIONS
+
+# Çalışma anına bağlı alanlar karşılaştırılmaz; arama puanı (bm25 / kelime sayısı) depoya özeldir
+_VOLATILE_KEYS = {"created_at", "updated_at", "score"}
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if key not in _VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+def _sections(label: str) -> List[Dict[str, Any]]:
+    return [
+        {"key": section.key, "title": section.title, "position": position,
+         "content": f"{label} planı için {section.title.lower()} adımları ve python kaynakları"}
+        for position, section in enumerate(PLAN_SECTIONS)
+    ]
+
+async def _scenario(repo: Repository) -> List[Any]:
+    """Depo arayüzünün tüm işlevlerini sırayla çağırır ve sonuçlarını döndürür"""
+    results: List[Any] = []
+    record = results.append
+
+    # Kullanıcılar; SQLite başarısız eklemelerde ID atlayabildiği için kullanıcılar önce oluşturulur
+    user_id = await repo.create_user("ayse@ornek.com")
+    record(user_id)
+    other_id = await repo.upsert_user("mehmet@ornek.com")
+    record(other_id)
+    record(await repo.create_user("ayse@ornek.com"))
+    record(await repo.upsert_user("ayse@ornek.com"))
+    record(await repo.get_user_by_email("ayse@ornek.com"))
+    record(await repo.get_user_by_email("yok@ornek.com"))
+
+    # Anket ve bekleyen sorular
+    record(await repo.save_pending_question(user_id, 1, "İlk soru?", "h0"))
+    record(await repo.save_pending_question(user_id, 1, "Başka ilk soru?", "h0"))
+    record(await repo.get_pending_question(user_id, 1))
+    record(await repo.save_pending_question(user_id, 1, "Yeni bağlam sorusu?", "h1"))
+    record(await repo.save_question_answer(user_id, 1, "İlk soru?", "Yazılım"))
+    record(await repo.delete_pending_question(user_id, 1))
+    record(await repo.get_pending_question(user_id, 1))
+    record(await repo.save_question_answer(user_id, 1, "İlk soru?", "Tekrar"))
+    record(await repo.save_pending_question(user_id, 2, "İkinci soru?", "h2"))
+    record(await repo.save_question_answers(user_id, [
+        {"question_number": 2, "question": "İkinci soru?", "answer": "Veri"},
+        {"question_number": 1, "question": "İlk soru?", "answer": "Çakışma"}
+    ]))
+    record(await repo.save_question_answers(user_id, [
+        {"question_number": 2, "question": "İkinci soru?", "answer": "Veri"},
+        {"question_number": 3, "question": "Üçüncü soru?", "answer": "Uzaktan"}
+    ]))
+    record(await repo.get_pending_question(user_id, 2))
+    record(await repo.get_user_answers(user_id))
+    record(await repo.get_user_answers(other_id))
+    record(await repo.get_user_answers_version(user_id))
+    record(await repo.get_user_answers_version(other_id))
+
+    # Kariyer planları
+    record(await repo.get_latest_career_plan(user_id))
+    record(await repo.get_career_plan_version(user_id))
+    plan_id = await repo.save_career_plan(user_id, _sections("Veri bilimi"))
+    record(plan_id)
+    record(await repo.save_career_plan(other_id, _sections("Tasarım")))
+    record(await repo.save_career_plan_sections(plan_id, [
+        {**_sections("Güncel veri bilimi")[0]}
+    ]))
+    record(await repo.save_career_plan_sections(9999, _sections("Yok")))
+    record(await repo.get_latest_career_plan(user_id))
+    record(await repo.get_career_plan_version(user_id))
+    record(await repo.get_career_plan_section(user_id, PLAN_SECTIONS[0].key))
+    record(await repo.get_career_plan_section(user_id, "yok"))
+
+    # Konuşmalar ve özet
+    messages = [
+        ("Python öğrenmeye nereden başlamalıyım?", True),
+        ("Temel python kaynaklarıyla başlayın.", False),
+        ("Veri analizi için hangi kütüphaneler?", True),
+        ("Pandas ve NumPy ile başlayın.", False),
+        ("Staj başvurusu ne zaman yapılmalı?", True),
+    ]
+    writes = [repo.queue_conversation_message(user_id, text, is_user) for text, is_user in messages]
+    record(await asyncio.gather(*writes))
+    await repo.wait_for_pending_writes(user_id)
+    context = await repo.get_chat_context(user_id, 3)
+    record(context)
+    first_page = await repo.get_conversation_page(user_id, 2)
+    record(first_page)
+    cursor = (first_page[-1]["created_at"], first_page[-1]["id"])
+    record(await repo.get_conversation_page(user_id, 10, cursor))
+    record(await repo.get_conversation_page(other_id, 10))
+    record(await repo.get_conversation_summary(user_id))
+    record(await repo.get_unsummarized_messages(user_id, 0, 2))
+    record(await repo.save_conversation_summary(user_id, "Kullanıcı python öğreniyor.", 2))
+    record(await repo.get_conversation_summary(user_id))
+    record(await repo.get_unsummarized_messages(user_id, 2, 2))
+    record((await repo.get_chat_context(user_id, 1))["conversation_summary"])
+
+    # Arama: eşit puanlı sonuçların sırası depoya göre değişebileceği için sonuçlar sıralanır
+    for match_terms, sources in (
+        ('"python"', ["conversations", "plans"]),
+        ('"pyth"*', ["conversations"]),
+        ('"pandas" "numpy"', ["conversations"]),
+        ('"kütüphane"*', ["conversations"]),
+        ('"tasarım"', ["plans"]),
+        ('"olmayan"', ["conversations", "plans"]),
+    ):
+        found = await repo.search_user_content(user_id, match_terms, sources, 50)
+        record(sorted(
+            (_normalize(result) for result in found),
+            key=lambda result: (result["source"], result["id"], result["section_key"] or "")
+        ))
+    return results
+
+async def _with_sqlite(tmp_path: Any, scenario: Callable[[Repository], Awaitable[List[Any]]]) -> List[Any]:
+    pool = ConnectionPool(str(tmp_path / "parity.db"), read_pool_size=2)
+    await pool.open()
+    write_buffer = WriteBuffer(pool, flush_interval=0.001)
+    write_buffer.start()
+    try:
+        async with pool.writer() as db:
+            await run_migrations(db)
+        return await scenario(SQLiteRepository(pool, write_buffer))
+    finally:
+        await write_buffer.stop()
+        await pool.close()
+
+def test_memory_repository_matches_sqlite(tmp_path):
+    sqlite_results = asyncio.run(_with_sqlite(tmp_path, _scenario))
+    memory_results = asyncio.run(_scenario(MemoryRepository()))
+
+    assert len(sqlite_results) == len(memory_results)
+    for step, (expected, actual) in enumerate(zip(sqlite_results, memory_results)):
+        assert _normalize(actual) == _normalize(expected), f"adım {step}"
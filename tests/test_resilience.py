@@ -0,0 +1,57 @@
+"""Devre kesicinin yarı açık deneme çağrısının iptalde kilitli kalmadığını doğrular.
+
+Çalıştırma: python -m pytest -q tests
+"""
+import asyncio
+from typing import Any, Callable, Coroutine
+
+from app.services import gemini_service
+from app.services.resilience import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CircuitBreaker
+from benchmarks.fake_gemini import FakeGeminiClient
+
+def _half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(window=4, min_calls=1, failure_ratio=0.5,
+                             open_seconds=0.0, slow_call_seconds=60.0)
+    # Tek hata devreyi açar; open_seconds=0 olduğu için sonraki çağrı deneme çağrısıdır
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    return breaker
+
+async def _collect_stream(prompt: str, operation: str) -> str:
+    return "".join([chunk async for chunk in gemini_service._generate_text_stream(prompt, operation)])
+
+async def _cancelled_probe(call: Callable[[str, str], Coroutine[Any, Any, str]]) -> None:
+    breaker = gemini_service._breaker
+    semaphore = gemini_service._llm_semaphore
+
+    # Eşzamanlılık sınırı dolu; deneme çağrısı sırada bekler
+    await semaphore.acquire()
+    probe = asyncio.create_task(call("Merhaba", "chat"))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert breaker._probe_in_flight
+
+    # İstemci bağlantıyı kapattı
+    probe.cancel()
+    try:
+        await probe
+    except asyncio.CancelledError:
+        pass
+    assert not breaker._probe_in_flight
+    semaphore.release()
+
+    # Sonraki çağrı deneme hakkını alır ve başarılı olunca devre kapanır
+    assert await call("Merhaba", "chat")
+    assert breaker.state == CIRCUIT_CLOSED
+
+def _run_cancelled_probe(monkeypatch, call: Callable[[str, str], Coroutine[Any, Any, str]]) -> None:
+    monkeypatch.setattr(gemini_service, "client", FakeGeminiClient(latency=0.0, jitter=0.0), raising=False)
+    monkeypatch.setattr(gemini_service, "_breaker", _half_open_breaker())
+    monkeypatch.setattr(gemini_service, "_llm_semaphore", asyncio.Semaphore(1))
+    asyncio.run(_cancelled_probe(call))
+
+def test_cancelled_half_open_probe_releases_breaker(monkeypatch):
+    _run_cancelled_probe(monkeypatch, gemini_service._call_gemini_once)
+
+def test_cancelled_half_open_stream_probe_releases_breaker(monkeypatch):
+    _run_cancelled_probe(monkeypatch, _collect_stream)